@@ -0,0 +1,243 @@
+"""
+Address Lists - Known-scam and allow lists for millions of addresses
+Memory-mapped sorted array of 20-byte addresses behind a Bloom filter,
+hot-swapped when a new list version is written
+
+Build a list file from text (one 0x address per line):
+    python address_lists.py build scams.txt scams.bin
+"""
+from typing import Dict, Iterable, Optional
+import argparse
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+
+MAGIC = b"VETOADR1"
+# magic, address count, Bloom filter size in bits, hash count
+HEADER = struct.Struct("<8sQQI")
+ADDRESS_SIZE = 20
+
+# ~1% false positives at 10 bits and 7 hashes per address
+BLOOM_BITS_PER_ADDRESS = 10
+BLOOM_HASHES = 7
+
+def address_bytes(address: str) -> Optional[bytes]:
+    """20-byte form of a 0x address (any case), or None if malformed"""
+    if not isinstance(address, str) or len(address) != 42 or address[:2].lower() != "0x":
+        return None
+    try:
+        return bytes.fromhex(address[2:])
+    except ValueError:
+        return None
+
+def _bloom_positions(key: bytes, num_bits: int, num_hashes: int):
+    """
+    Double hashing on the address bytes themselves (addresses are already
+    uniformly distributed). 64-bit wraparound matches the NumPy build.
+    """
+    h1 = int.from_bytes(key[0:8], "big")
+    h2 = int.from_bytes(key[8:16], "big") | 1
+    return (((h1 + i * h2) & 0xFFFFFFFFFFFFFFFF) % num_bits for i in range(num_hashes))
+
+def build_list(addresses: Iterable[str], path: str) -> int:
+    """
+    Write a list file: header, Bloom filter, then the sorted unique
+    addresses. Written to a temp file and renamed, so readers never see a
+    partial file. Returns the number of addresses written.
+    """
+    # Packed 20-byte records, not a list of bytes objects: lists have millions of entries
+    raw = bytearray()
+    for address in addresses:
+        key = address_bytes(address.strip())
+        if key is not None:
+            raw += key
+    keys = np.unique(np.frombuffer(bytes(raw), dtype=f"S{ADDRESS_SIZE}"))
+    count = len(keys)
+
+    num_bits = max(64, count * BLOOM_BITS_PER_ADDRESS)
+    bloom = np.zeros((num_bits + 7) // 8, dtype=np.uint8)
+    if count:
+        columns = keys.view(np.uint8).reshape(count, ADDRESS_SIZE)
+        h1 = columns[:, 0:8].copy().view(">u8").ravel().astype(np.uint64)
+        h2 = columns[:, 8:16].copy().view(">u8").ravel().astype(np.uint64) | np.uint64(1)
+        for i in range(BLOOM_HASHES):
+            # Same arithmetic as _bloom_positions, modulo 2**64
+            bits = (h1 + np.uint64(i) * h2) % np.uint64(num_bits)
+            np.bitwise_or.at(bloom, (bits >> np.uint64(3)).astype(np.int64), (1 << (bits & np.uint64(7))).astype(np.uint8))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, count, num_bits, BLOOM_HASHES))
+        f.write(bloom.tobytes())
+        f.write(keys.tobytes())
+    os.replace(tmp_path, path)
+    return count
+
+
+class AddressList:
+    """
+    Read-only view of a list file. Lookups check the Bloom filter first
+    (most recipients are on no list) and confirm hits with a binary
+    search of the sorted addresses, both straight from the page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.version = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.num_bits, self.num_hashes = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an address list file (build it with address_lists.py build)")
+        self._bloom_offset = HEADER.size
+        self._keys_offset = self._bloom_offset + (self.num_bits + 7) // 8
+        expected_size = self._keys_offset + self.count * ADDRESS_SIZE
+        if len(self._mm) != expected_size:
+            raise ValueError(f"{path} is truncated ({len(self._mm)} of {expected_size} bytes)")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __contains__(self, address: str) -> bool:
+        key = address_bytes(address)
+        return key is not None and self.contains_bytes(key)
+
+    def contains_bytes(self, key: bytes) -> bool:
+        if self.count == 0:
+            return False
+        mm = self._mm
+        for bit in _bloom_positions(key, self.num_bits, self.num_hashes):
+            if not mm[self._bloom_offset + (bit >> 3)] & (1 << (bit & 7)):
+                return False
+
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            start = self._keys_offset + mid * ADDRESS_SIZE
+            candidate = mm[start:start + ADDRESS_SIZE]
+            if candidate < key:
+                low = mid + 1
+            elif candidate > key:
+                high = mid
+            else:
+                return True
+        return False
+
+
+class ScreeningLists:
+    """
+    The current scam list and allow list. A reload maps the new file and
+    swaps the reference in one assignment, so lookups in flight finish on
+    the old version (unmapped once nothing references it) and no restart
+    is needed. Files are checked for a new version every poll_interval
+    seconds in a background thread.
+    """
+
+    def __init__(self, scam_list_path: Optional[str] = None, allow_list_path: Optional[str] = None):
+        self.paths = {"scam": scam_list_path, "allow": allow_list_path}
+        self.lists: Dict[str, Optional[AddressList]] = {"scam": None, "allow": None}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+        self.reload()
+
+    def reload(self) -> bool:
+        """Load list files whose version changed. Returns True if any list was swapped"""
+        swapped = False
+        with self._lock:
+            for name, path in self.paths.items():
+                if not path:
+                    continue
+                current = self.lists[name]
+                try:
+                    stat = os.stat(path)
+                    if current is not None and current.version == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                        continue
+                    self.lists[name] = AddressList(path)
+                except Exception as e:
+                    print(f"⚠️ Could not load {name} list from {path}: {e}")
+                    continue
+                swapped = True
+                self.reloads += 1
+                print(f"✅ Loaded {name} list: {len(self.lists[name])} addresses")
+        return swapped
+
+    def lookup(self, address: str) -> Optional[str]:
+        """'scam' or 'allow' if the address is listed (scam takes precedence), else None"""
+        key = address_bytes(address)
+        return self.lookup_key(key) if key is not None else None
+
+    def lookup_key(self, key: bytes) -> Optional[str]:
+        """lookup() for a 20-byte address"""
+        for name in ("scam", "allow"):
+            address_list = self.lists[name]
+            if address_list is not None and address_list.contains_bytes(key):
+                return name
+        return None
+
+    def start(self, poll_interval: float) -> None:
+        """Check the list files for new versions in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(poll_interval,), name="address-lists", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, poll_interval: float) -> None:
+        while not self._stop.wait(poll_interval):
+            self.reload()
+
+    def stats(self) -> Dict:
+        stats = {
+            name: {"path": address_list.path, "addresses": len(address_list)} if address_list is not None else None
+            for name, address_list in self.lists.items()
+        }
+        stats["reloads"] = self.reloads
+        return stats
+
+# Singleton instance
+_screening_lists: Optional[ScreeningLists] = None
+_screening_lists_lock = threading.Lock()
+
+def get_screening_lists() -> ScreeningLists:
+    """
+    Get or create the screening lists from SCAM_LIST_PATH / ALLOW_LIST_PATH
+    (both optional), polled for new versions every ADDRESS_LIST_POLL_SECONDS
+    """
+    global _screening_lists
+    if _screening_lists is None:
+        with _screening_lists_lock:
+            if _screening_lists is None:
+                lists = ScreeningLists(
+                    scam_list_path=os.getenv("SCAM_LIST_PATH") or None,
+                    allow_list_path=os.getenv("ALLOW_LIST_PATH") or None
+                )
+                if any(lists.paths.values()):
+                    lists.start(float(os.getenv("ADDRESS_LIST_POLL_SECONDS", 30)))
+                _screening_lists = lists
+    return _screening_lists
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="VETO address list tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build a list file from a text file of addresses")
+    build.add_argument("source", help="Text file, one 0x address per line")
+    build.add_argument("output", help="List file to write (replaced atomically)")
+    args = parser.parse_args()
+
+    with open(args.source) as f:
+        count = build_list(f, args.output)
+    print(f"✅ Wrote {count} addresses to {args.output}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,139 @@
+"""
+Benchmark Chain - Local dev node with synthetic wallets
+Starts anvil (or a Hardhat node) and seeds fresh, penny-dropped,
+contract and aged recipients. Wallet age is measured on the chain's
+clock, so aged wallets are made old by moving that clock forward.
+"""
+from typing import Dict, List, Optional
+import os
+import shutil
+import subprocess
+import time
+
+from eth_account import Account
+from web3 import Web3
+
+CONTRACTS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "contracts")
+
+# Init code deploying a 10-byte runtime that returns 42
+CONTRACT_INIT_CODE = "0x600a600c600039600a6000f3602a60005260206000f3"
+
+AGED_DAYS = 90
+
+class LocalChain:
+    """A dev node subprocess on 127.0.0.1:port (anvil preferred, Hardhat otherwise)"""
+
+    def __init__(self, port: int = 8545):
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.process: Optional[subprocess.Popen] = None
+
+    def start(self, timeout: float = 60.0) -> str:
+        if shutil.which("anvil"):
+            # Genesis AGED_DAYS (plus a day) in the past: after seed_wallets
+            # moves the clock forward the chain is back near the wall clock
+            genesis = int(time.time()) - (AGED_DAYS + 1) * 86400
+            cmd, cwd = ["anvil", "--port", str(self.port), "--silent", "--timestamp", str(genesis)], None
+        elif shutil.which("npx"):
+            cmd, cwd = ["npx", "hardhat", "node", "--port", str(self.port)], CONTRACTS_DIR
+        else:
+            raise Exception("Neither anvil nor npx found - install Foundry or Node, or pass --rpc-url")
+
+        self.process = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        w3 = Web3(Web3.HTTPProvider(self.url))
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise Exception(f"{cmd[0]} exited with code {self.process.returncode}")
+            if w3.is_connected():
+                print(f"✅ Local chain ({cmd[0]}) at {self.url}")
+                return self.url
+            time.sleep(0.5)
+        self.stop()
+        raise Exception(f"Local chain did not start within {timeout}s")
+
+    def stop(self) -> None:
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            self.process.wait(10)
+
+
+def _send(w3: Web3, account, to: str, value: int) -> None:
+    tx = {
+        "from": account.address,
+        "to": to,
+        "value": value,
+        "gas": 21000,
+        "gasPrice": w3.eth.gas_price,
+        "nonce": w3.eth.get_transaction_count(account.address),
+        "chainId": w3.eth.chain_id
+    }
+    w3.eth.wait_for_transaction_receipt(w3.eth.send_raw_transaction(account.sign_transaction(tx).raw_transaction))
+
+def _fund(w3: Web3, funder: str, to: str, ether: float) -> None:
+    w3.eth.wait_for_transaction_receipt(
+        w3.eth.send_transaction({"from": funder, "to": to, "value": Web3.to_wei(ether, "ether")})
+    )
+
+def _advance_time(w3: Web3, seconds: int) -> None:
+    """Move the dev chain clock forward (anvil/Hardhat)"""
+    before = w3.eth.get_block("latest")["timestamp"]
+    w3.provider.make_request("evm_increaseTime", [seconds])
+    w3.provider.make_request("evm_mine", [])
+    after = w3.eth.get_block("latest")["timestamp"]
+    if after - before < seconds:
+        raise Exception(f"Chain clock did not move forward {seconds}s (moved {after - before}s) - aged wallets would look new")
+
+def seed_wallets(rpc_url: str, per_kind: int = 5) -> Dict[str, List[str]]:
+    """
+    Create per_kind recipients of each kind and return their addresses:
+    - aged: 25 transactions, then the chain clock is moved AGED_DAYS
+      forward (check_aged_wallets verifies the pipeline sees them as old)
+    - fresh: funded, 2 outgoing transactions
+    - penny: received one 0.001 ETH transfer, nothing else
+    - contract: deployed contract code
+    Funds come from the node's first unlocked dev account.
+    """
+    w3 = Web3(Web3.HTTPProvider(rpc_url))
+    funder = w3.eth.accounts[0]
+    wallets: Dict[str, List[str]] = {"aged": [], "fresh": [], "penny": [], "contract": []}
+
+    for _ in range(per_kind):
+        account = Account.create()
+        _fund(w3, funder, account.address, 1.0)
+        for _ in range(25):
+            _send(w3, account, funder, 1)
+        wallets["aged"].append(account.address)
+    _advance_time(w3, AGED_DAYS * 86400)
+
+    for _ in range(per_kind):
+        account = Account.create()
+        _fund(w3, funder, account.address, 0.05)
+        for _ in range(2):
+            _send(w3, account, funder, 1)
+        wallets["fresh"].append(account.address)
+
+    for _ in range(per_kind):
+        account = Account.create()
+        _fund(w3, funder, account.address, 0.001)
+        wallets["penny"].append(account.address)
+
+    for _ in range(per_kind):
+        tx_hash = w3.eth.send_transaction({"from": funder, "data": CONTRACT_INIT_CODE})
+        wallets["contract"].append(w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"])
+
+    print(f"✅ Seeded {per_kind} wallets per kind at block {w3.eth.block_number}")
+    return wallets
+
+async def check_aged_wallets(addresses: List[str]) -> None:
+    """Fail the run unless every aged wallet is profiled at AGED_DAYS or more, from its real first activity"""
+    from blockchain_service import get_async_blockchain_service
+    blockchain = await get_async_blockchain_service()
+    for address in addresses:
+        profile = await blockchain.get_wallet_profile(address, use_cache=False)
+        if profile.get("age_source") != "first_activity" or profile.get("wallet_age_days", 0) < AGED_DAYS:
+            raise Exception(
+                f"Aged wallet {address} profiled as {profile.get('wallet_age_days')} days "
+                f"({profile.get('age_source') or profile.get('error')}), expected >= {AGED_DAYS}"
+            )
+    print(f"✅ {len(addresses)} aged wallets are >= {AGED_DAYS} days old")
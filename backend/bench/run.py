@@ -0,0 +1,169 @@
+"""
+Benchmark Runner - Load driver for the risk pipeline
+Seeds a local chain, swaps in the stub LLM and drives
+/api/analyze-transfer, /api/wallet-profile and RiskEngine directly at
+fixed concurrency levels, reporting throughput, p50/p95/p99 latency and
+JSON-RPC calls per request.
+
+Usage (from backend/):
+    python bench/run.py                              # start anvil/Hardhat and seed it
+    python bench/run.py --rpc-url http://127.0.0.1:8545 --concurrency 1,16,64
+    python bench/run.py --llm-latency-ms 800 --json results.json
+"""
+from typing import Awaitable, Callable, Dict, List
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chain import LocalChain, check_aged_wallets, seed_wallets
+from stub_llm import StubChatModel
+
+SCENARIOS = ("analyze", "profile", "engine")
+
+def _rpc_calls() -> float:
+    """HTTP round-trips to the node so far (a JSON-RPC batch counts once)"""
+    from metrics import RPC_LATENCY
+    return sum(
+        sample.value
+        for metric in RPC_LATENCY.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_count")
+    )
+
+def _reset_caches() -> None:
+    """Start every run cold so levels are comparable"""
+    import blockchain_service
+    from fraud_agent import get_verdict_cache
+    blockchain_service.get_profile_cache().clear()
+    blockchain_service._first_activity.clear()
+    get_verdict_cache().clear()
+
+async def _drive(call: Callable[[int], Awaitable[bool]], total: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            i = next_index
+            next_index += 1
+            start = time.perf_counter()
+            try:
+                ok = await call(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += 0 if ok else 1
+
+    rpc_before = _rpc_calls()
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    rpc_calls = _rpc_calls() - rpc_before
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "rpc_calls_per_request": round(rpc_calls / total, 2)
+    }
+
+async def run(args) -> List[Dict]:
+    import httpx
+    import main
+    import fraud_agent
+    from risk_engine import get_risk_engine
+
+    os.environ.setdefault("AGENT_VERBOSE", "false")
+    fraud_agent._fraud_agent = fraud_agent.FraudDetectionAgent(
+        llm=StubChatModel(latency_seconds=args.llm_latency_ms / 1000)
+    )
+    await main.startup_event()
+    await main.wait_for_warm_up()
+    await check_aged_wallets(args.wallets["aged"])
+
+    sender = args.sender
+    recipients = [address for kind in args.wallets.values() for address in kind]
+    engine = get_risk_engine()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://bench")
+
+    async def analyze(i: int) -> bool:
+        body = {"sender": sender, "recipient": recipients[i % len(recipients)], "amount": 100, "explain": args.explain}
+        return (await client.post("/api/analyze-transfer", json=body)).status_code == 200
+
+    async def profile(i: int) -> bool:
+        return (await client.get(f"/api/wallet-profile/{recipients[i % len(recipients)]}")).status_code == 200
+
+    async def direct(i: int) -> bool:
+        await engine.analyze_transfer_async(sender, recipients[i % len(recipients)], 100)
+        return True
+
+    calls = {"analyze": analyze, "profile": profile, "engine": direct}
+    results = []
+    for scenario in args.scenarios:
+        for concurrency in args.concurrency:
+            _reset_caches()
+            result = {"scenario": scenario, "concurrency": concurrency}
+            result.update(await _drive(calls[scenario], args.requests, concurrency))
+            results.append(result)
+            print(
+                f"{scenario:<8} c={concurrency:<4} {result['throughput_rps']:>8} req/s  "
+                f"p50 {result['p50_ms']:>7} ms  p95 {result['p95_ms']:>7} ms  p99 {result['p99_ms']:>7} ms  "
+                f"rpc/req {result['rpc_calls_per_request']:>5}  errors {result['errors']}"
+            )
+    await client.aclose()
+    return results
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description="VETO risk pipeline benchmark")
+    parser.add_argument("--rpc-url", help="Use an already running dev node instead of starting one")
+    parser.add_argument("--port", type=int, default=8545, help="Port for the started node")
+    parser.add_argument("--wallets-per-kind", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and concurrency level")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--explain", action="store_true", help="Ask for an AI explanation on every analysis")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",")]
+    args.scenarios = [s for s in args.scenarios.split(",") if s in SCENARIOS]
+
+    chain = None
+    rpc_url = args.rpc_url
+    if rpc_url is None:
+        chain = LocalChain(args.port)
+        rpc_url = chain.start()
+    try:
+        args.wallets = seed_wallets(rpc_url, args.wallets_per_kind)
+        from web3 import Web3
+        args.sender = Web3(Web3.HTTPProvider(rpc_url)).eth.accounts[0]
+
+        # Configure the services before main.py reads the environment
+        os.environ["ETHEREUM_RPC_URL"] = rpc_url
+        os.environ.pop("ETHEREUM_RPC_URLS", None)
+        results = asyncio.run(run(args))
+    finally:
+        if chain is not None:
+            chain.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Results written to {args.json}")
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,85 @@
+"""
+Stub LLM - Deterministic LangChain chat model for benchmarks
+Fixed answers with configurable latency, no network or API keys
+"""
+from typing import Any, AsyncIterator, Iterator, List, Optional
+import asyncio
+import json
+import time
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+EXPLANATION = (
+    "This wallet shows some warning signs common in payment scams. "
+    "Double-check the recipient through another channel before sending."
+)
+
+class StubChatModel(BaseChatModel):
+    """
+    Chat model that sleeps latency_seconds and returns a fixed answer.
+    Works for every agent mode: ReAct (a direct Final Answer),
+    structured output (an AgentVerdict-shaped object) and streaming
+    (EXPLANATION split into word chunks).
+    """
+
+    latency_seconds: float = 0.2
+    prompt_tokens: int = 350
+    completion_tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    def _react_answer(self) -> str:
+        answer = {"risk_score": 50, "scam_explanation": EXPLANATION}
+        return f"Thought: I now have enough information to make a final decision\nFinal Answer: {json.dumps(answer)}"
+
+    def _message(self) -> AIMessage:
+        return AIMessage(
+            content=self._react_answer(),
+            usage_metadata={
+                "input_tokens": self.prompt_tokens,
+                "output_tokens": self.completion_tokens,
+                "total_tokens": self.prompt_tokens + self.completion_tokens
+            }
+        )
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._message())])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        return ChatResult(generations=[ChatGeneration(message=self._message())])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        words = EXPLANATION.split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.latency_seconds / len(words))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        words = EXPLANATION.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency_seconds / len(words))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+
+    def bind_tools(self, tools: Any, **kwargs) -> "StubChatModel":
+        return self
+
+    def with_structured_output(self, schema: Any, **kwargs):
+        def answer(_):
+            return schema(score_adjustment=0, explanation=EXPLANATION)
+
+        def invoke(prompt):
+            time.sleep(self.latency_seconds)
+            return answer(prompt)
+
+        async def ainvoke(prompt):
+            await asyncio.sleep(self.latency_seconds)
+            return answer(prompt)
+
+        return RunnableLambda(invoke, afunc=ainvoke)
@@ -3,17 +3,189 @@ Blockchain Service - Real Ethereum Integration
 Handles all Web3 interactions for risk analysis
 """
 from web3 import Web3
-from typing import Dict, List, Optional
+from web3.exceptions import BadResponseFormat, Web3RPCError
+from web3.types import BlockIdentifier
+from typing import Dict, Optional, Sequence, Tuple, Union
+import asyncio
 import os
-from datetime import datetime, timedelta
+import time
+import threading
+from ttl_cache import TTLCache
+from cache_backends import create_cache
+from chain_indexer import get_transfer_indexer
+from rpc_provider import create_async_web3, create_web3, get_rpc_urls
+from metrics import record_fallback, register_cache
+from deadline import Deadline, DeadlineExceeded, within
+from chain_head import ChainHeadTracker, get_chain_head_tracker
 
-class BlockchainService:
-    def __init__(self, rpc_url: str):
-        self.w3 = Web3(Web3.HTTPProvider(rpc_url))
+# First-activity (block, timestamp) per checksummed address.
+# A wallet's first transaction never changes, so entries are kept forever
+# and shared by the sync and async services.
+_first_activity: Dict[str, Tuple[int, int]] = {}
+
+class _WalletProfileBase:
+    """
+    Profile logic shared by the sync and async services: derived signals
+    and the shared profile cache. Subclasses only differ in how they talk
+    to the node.
+    """
+    
+    # How long a fetched block number is reused as the snapshot block for
+    # profiles (when there is no fresh head from the chain head tracker)
+    SNAPSHOT_BLOCK_TTL_SECONDS = 2.0
+    # Beyond this many new blocks, block-aware invalidation clears the whole cache
+    MAX_INVALIDATION_SCAN_BLOCKS = 20
+    
+    profile_cache: Optional[TTLCache] = None
+    # Look up the real first-activity block (needs historical state, i.e. an archive node)
+    age_binary_search: bool = True
+    # Local index of small inbound transfers (chain_indexer.TransferIndexer)
+    transfer_index = None
+    # Shared head block (chain_head.ChainHeadTracker); without one, or while
+    # it is stale, the snapshot block is fetched from the node
+    chain_head: Optional[ChainHeadTracker] = None
+    
+    def _tracked_head(self) -> Optional[int]:
+        return self.chain_head.head() if self.chain_head is not None else None
+    
+    def invalidate_cached_profiles(self, addresses) -> int:
+        """Drop cached profiles for the given addresses. Returns how many were cached"""
+        if self.profile_cache is None:
+            return 0
+        return self.profile_cache.invalidate_many(Web3.to_checksum_address(a) for a in addresses)
+    
+    @staticmethod
+    def _touched_addresses(block) -> set:
+        """Senders and recipients of every transaction in a full block"""
+        touched = set()
+        for tx in block["transactions"]:
+            touched.add(tx["from"])
+            if tx.get("to"):
+                touched.add(tx["to"])
+        return touched
+    
+    @staticmethod
+    def _estimate_wallet_age(tx_count: int) -> int:
+        """Fallback when block history can't be searched"""
+        record_fallback("wallet_age_estimate")
+        if tx_count == 0:
+            return 0  # Brand new wallet
+        
+        # Estimate: If wallet has transactions, assume it's at least 1 day old
+        return max(1, tx_count // 10)  # Rough estimate
+    
+    def _age_days_since(self, timestamp: int) -> int:
+        """Days from a block timestamp to the chain head (wall clock without a head tracker)"""
+        now = self.chain_head.head_timestamp() if self.chain_head is not None else None
+        return max(0, int((now if now is not None else time.time()) - timestamp) // 86400)
+    
+    @staticmethod
+    def _looks_like_penny_drop(tx_count: int, balance_eth: float) -> bool:
+        # Heuristic used when no transfer index is running:
+        # If wallet is very new (< 5 tx) and has some balance, flag as potential penny drop
+        return tx_count < 5 and balance_eth > 0
+    
+    def _has_recent_small_tx(self, address: str, tx_count: int, balance_eth: float) -> Optional[bool]:
+        """
+        Penny-drop heuristic for the profile. None with a transfer index: the
+        risk engine then checks the sender/recipient pair itself (see
+        RiskEngine._is_penny_drop), which a per-recipient profile can't.
+        """
+        if self.transfer_index is not None:
+            return None
+        return self._looks_like_penny_drop(tx_count, balance_eth)
+    
+    @staticmethod
+    def _age_cut_short(deadline: Optional[Deadline]) -> bool:
+        """Wallet age is only an estimate - don't cache the profile"""
+        return deadline is not None and "wallet_age" in deadline.cut_short
+    
+    @staticmethod
+    def _timed_out_profile(address: str, deadline: Deadline) -> Dict:
+        deadline.cut("profile_fetch")
+        return {
+            "address": address,
+            "error": "Profile fetch exceeded its time budget"
+        }
+    
+    def _build_profile(
+        self,
+        address: str,
+        tx_count: int,
+        balance_eth: float,
+        is_contract: bool,
+        wallet_age_days: Optional[int] = None
+    ) -> Dict:
+        """
+        Assemble a wallet profile from already-fetched on-chain facts.
+        Without a wallet age (no first outgoing transaction found, e.g.
+        receive-only wallets) it is estimated, and age_source says so.
+        """
+        age_source = "first_activity"
+        if wallet_age_days is None:
+            wallet_age_days = self._estimate_wallet_age(tx_count)
+            age_source = "estimate"
+        checksum_address = Web3.to_checksum_address(address)
+        return {
+            "address": address,
+            "transaction_count": tx_count,
+            "balance_eth": balance_eth,
+            "wallet_age_days": wallet_age_days,
+            "age_source": age_source,
+            "is_contract": is_contract,
+            "has_recent_small_tx": self._has_recent_small_tx(checksum_address, tx_count, balance_eth)
+        }
+
+def _is_batch_rejection(error: Exception) -> bool:
+    """
+    Whether a failed batch means the node doesn't accept batches at all:
+    a non-list reply, or a single error saying batches aren't supported
+    """
+    if isinstance(error, BadResponseFormat):
+        return True
+    if isinstance(error, Web3RPCError):
+        message = str(error).lower()
+        return "batch" in message and any(word in message for word in ("not supported", "unsupported", "not allowed", "disabled"))
+    return False
+
+class BlockchainService(_WalletProfileBase):
+    def __init__(
+        self,
+        rpc_url: Union[str, Sequence[str], None] = None,
+        use_batch: bool = True,
+        profile_cache: Optional[TTLCache] = None,
+        invalidate_on_new_blocks: bool = False,
+        age_binary_search: bool = True,
+        transfer_index=None,
+        chain_head: Optional[ChainHeadTracker] = None
+    ):
+        # Pooled, multi-endpoint transport; rpc_url=None uses the shared
+        # endpoint pool from ETHEREUM_RPC_URLS / ETHEREUM_RPC_URL
+        self.w3 = create_web3(rpc_url)
         if not self.w3.is_connected():
-            raise Exception(f"Failed to connect to Ethereum node at {rpc_url}")
+            raise Exception(f"Failed to connect to Ethereum node at {rpc_url or get_rpc_urls()}")
+        
+        # Send per-address profile lookups as a single JSON-RPC batch.
+        # Switched off automatically if the node rejects batches outright.
+        self.use_batch = use_batch
+        self._snapshot_block: Optional[int] = None
+        self._snapshot_block_fetched_at = 0.0
         
-        print(f"✅ Connected to Ethereum - Chain ID: {self.w3.eth.chain_id}")
+        # Wallet profile cache keyed by checksummed address.
+        # With invalidate_on_new_blocks, entries for addresses that appear in
+        # new blocks (as sender or recipient) are dropped before reads.
+        self.profile_cache = profile_cache
+        self.invalidate_on_new_blocks = invalidate_on_new_blocks
+        self._last_scanned_block: Optional[int] = None
+        self._invalidation_lock = threading.Lock()
+        self.age_binary_search = age_binary_search
+        self.transfer_index = transfer_index
+        self.chain_head = chain_head
+        
+        chain_id = chain_head.chain_id if chain_head is not None else None
+        if chain_id is None:
+            chain_id = self.w3.eth.chain_id
+        print(f"✅ Connected to Ethereum - Chain ID: {chain_id}")
     
     def get_wallet_age_days(self, address: str) -> int:
         """
@@ -22,29 +194,67 @@ class BlockchainService:
         """
         try:
             address = Web3.to_checksum_address(address)
-            current_block = self.w3.eth.block_number
-            
-            # Binary search for first transaction (approximate)
-            # For demo, we'll check recent blocks only to save time
-            blocks_to_check = min(10000, current_block)
-            
-            tx_count = self.w3.eth.get_transaction_count(address)
-            if tx_count == 0:
-                return 0  # Brand new wallet
-            
-            # Estimate: If wallet has transactions, assume it's at least 1 day old
-            # In production, you'd do proper binary search through blocks
-            return max(1, tx_count // 10)  # Rough estimate
-            
+            tx_count = self._fetch_transaction_count(address)
+            age = self._wallet_age_days(address, tx_count)
+            return age if age is not None else self._estimate_wallet_age(tx_count)
         except Exception as e:
             print(f"Error getting wallet age: {e}")
             return 0
     
+    def find_first_activity(self, address: str, deadline: Optional[Deadline] = None) -> Optional[Tuple[int, int]]:
+        """
+        Find the block of the wallet's first outgoing transaction.
+        Binary-searches the nonce over block history (~log2(head) RPC calls)
+        and memoizes the (block, timestamp) result permanently.
+        Returns None if the wallet has never sent a transaction.
+        Raises DeadlineExceeded if the deadline passes mid-search.
+        """
+        address = Web3.to_checksum_address(address)
+        if address in _first_activity:
+            return _first_activity[address]
+        
+        high = self._get_snapshot_block()
+        if self.w3.eth.get_transaction_count(address, high) == 0:
+            return None
+        
+        # Invariant: nonce at `high` is > 0; first activity is in [low, high]
+        low = 0
+        while low < high:
+            if deadline is not None:
+                deadline.check()
+            mid = (low + high) // 2
+            if self.w3.eth.get_transaction_count(address, mid) > 0:
+                high = mid
+            else:
+                low = mid + 1
+        
+        first_activity = (high, self.w3.eth.get_block(high)["timestamp"])
+        _first_activity[address] = first_activity
+        return first_activity
+    
+    def _wallet_age_days(self, address: str, tx_count: int, deadline: Optional[Deadline] = None) -> Optional[int]:
+        """
+        Age from the first-activity block, or None when it can't be found
+        (no outgoing transaction, search disabled, failed or out of time)
+        """
+        if tx_count == 0 or not self.age_binary_search:
+            return None
+        try:
+            first_activity = self.find_first_activity(address, deadline)
+        except DeadlineExceeded:
+            deadline.cut("wallet_age")
+            return None
+        except Exception as e:
+            print(f"Error searching wallet history (archive node required): {e}")
+            return None
+        if first_activity is None:
+            return None
+        return self._age_days_since(first_activity[1])
+    
     def get_transaction_count(self, address: str) -> int:
         """Get total number of transactions for an address"""
         try:
-            address = Web3.to_checksum_address(address)
-            return self.w3.eth.get_transaction_count(address)
+            return self._fetch_transaction_count(Web3.to_checksum_address(address))
         except Exception as e:
             print(f"Error getting transaction count: {e}")
             return 0
@@ -52,9 +262,7 @@ class BlockchainService:
     def get_balance(self, address: str) -> float:
         """Get ETH balance in Ether (not Wei)"""
         try:
-            address = Web3.to_checksum_address(address)
-            balance_wei = self.w3.eth.get_balance(address)
-            return float(self.w3.from_wei(balance_wei, 'ether'))
+            return self._fetch_balance(Web3.to_checksum_address(address))
         except Exception as e:
             print(f"Error getting balance: {e}")
             return 0.0
@@ -62,18 +270,16 @@ class BlockchainService:
     def check_recent_small_transaction(self, address: str, threshold_eth: float = 0.01) -> bool:
         """
         Check if address received a small transaction recently (Penny Drop pattern)
-        This is simplified - in production you'd scan actual transaction history
+        Uses the transfer index when it is running, otherwise a nonce/balance heuristic
         """
         try:
-            # For demo purposes, we'll use a heuristic:
-            # If wallet is very new (< 5 tx) and has some balance, flag as potential penny drop
-            tx_count = self.get_transaction_count(address)
-            balance = self.get_balance(address)
-            
-            if tx_count < 5 and balance > 0:
-                return True
-            
-            return False
+            address = Web3.to_checksum_address(address)
+            if self.transfer_index is not None:
+                return self.transfer_index.has_recent_small_inbound(address)
+            return self._looks_like_penny_drop(
+                self._fetch_transaction_count(address),
+                self._fetch_balance(address)
+            )
         except Exception as e:
             print(f"Error checking recent transactions: {e}")
             return False
@@ -81,42 +287,392 @@ class BlockchainService:
     def is_contract_address(self, address: str) -> bool:
         """Check if address is a smart contract"""
         try:
-            address = Web3.to_checksum_address(address)
-            code = self.w3.eth.get_code(address)
-            return len(code) > 0
+            return self._fetch_is_contract(Web3.to_checksum_address(address))
         except Exception as e:
             print(f"Error checking contract: {e}")
             return False
     
-    def get_wallet_profile(self, address: str) -> Dict:
+    def get_wallet_profile(self, address: str, use_cache: bool = True, deadline: Optional[Deadline] = None) -> Dict:
         """
         Get comprehensive wallet profile for risk analysis
+        
+        Nonce, balance and code are read once, pinned to the same block, and
+        shared by every derived signal. With batching enabled the three reads
+        go out as one JSON-RPC batch (one round-trip per recipient).
+        Profiles are served from the profile cache when one is configured.
+        
+        With a deadline, the reads are skipped once it has passed (an error
+        profile is returned) and the wallet-age search stops early, falling
+        back to the tx-count estimate. RPC calls already in flight are
+        bounded by the transport timeouts.
         """
         try:
+            checksum_address = Web3.to_checksum_address(address)
+            cache = self.profile_cache if use_cache else None
+            
+            if cache is not None:
+                if self.invalidate_on_new_blocks:
+                    self._invalidate_touched_addresses(self._get_snapshot_block())
+                cached = cache.get(checksum_address)
+                if cached is not None:
+                    return {**cached, "address": address}
+            
+            if deadline is not None:
+                deadline.check()
+            block_number = self._get_snapshot_block()
+            tx_count, balance_eth, is_contract = self._fetch_profile_facts(checksum_address, block_number)
+            wallet_age_days = self._wallet_age_days(checksum_address, tx_count, deadline)
+            profile = self._build_profile(address, tx_count, balance_eth, is_contract, wallet_age_days)
+            profile["block_number"] = block_number
+            
+            if self.profile_cache is not None and not self._age_cut_short(deadline):
+                self.profile_cache.set(checksum_address, profile)
+            return dict(profile)
+        except DeadlineExceeded:
+            return self._timed_out_profile(address, deadline)
+        except Exception as e:
+            print(f"Error getting wallet profile: {e}")
             return {
                 "address": address,
-                "transaction_count": self.get_transaction_count(address),
-                "balance_eth": self.get_balance(address),
-                "wallet_age_days": self.get_wallet_age_days(address),
-                "is_contract": self.is_contract_address(address),
-                "has_recent_small_tx": self.check_recent_small_transaction(address)
+                "error": str(e)
             }
+    
+    def _invalidate_touched_addresses(self, head: int) -> None:
+        """Drop cached profiles of every address sending or receiving in blocks since the last scan"""
+        with self._invalidation_lock:
+            last = self._last_scanned_block
+            if last is not None and head > last:
+                if head - last > self.MAX_INVALIDATION_SCAN_BLOCKS:
+                    self.profile_cache.clear()
+                else:
+                    for number in range(last + 1, head + 1):
+                        block = self.w3.eth.get_block(number, full_transactions=True)
+                        self.invalidate_cached_profiles(self._touched_addresses(block))
+            if last is None or head > last:
+                self._last_scanned_block = head
+    
+    def _get_snapshot_block(self) -> int:
+        """Block number all profile reads are pinned to (briefly reused across requests)"""
+        head = self._tracked_head()
+        if head is not None:
+            return head
+        now = time.monotonic()
+        if self._snapshot_block is None or now - self._snapshot_block_fetched_at > self.SNAPSHOT_BLOCK_TTL_SECONDS:
+            self._snapshot_block = self.w3.eth.block_number
+            self._snapshot_block_fetched_at = now
+        return self._snapshot_block
+    
+    def _fetch_profile_facts(self, address: str, block_number: BlockIdentifier) -> Tuple[int, float, bool]:
+        """Fetch (tx_count, balance_eth, is_contract), batched when the node allows it"""
+        if self.use_batch:
+            try:
+                return self._fetch_profile_facts_batched(address, block_number)
+            except Exception as e:
+                record_fallback("rpc_batch_sequential")
+                if _is_batch_rejection(e):
+                    print(f"⚠️ Node rejected JSON-RPC batch, using sequential calls: {e}")
+                    self.use_batch = False
+                else:
+                    # Transport or per-call error - retry this lookup only, keep batching
+                    print(f"⚠️ Batch RPC failed, retrying sequentially: {e}")
+        
+        return (
+            self._fetch_transaction_count(address, block_number),
+            self._fetch_balance(address, block_number),
+            self._fetch_is_contract(address, block_number)
+        )
+    
+    def _fetch_profile_facts_batched(self, address: str, block_number: BlockIdentifier) -> Tuple[int, float, bool]:
+        with self.w3.batch_requests() as batch:
+            batch.add(self.w3.eth.get_transaction_count(address, block_number))
+            batch.add(self.w3.eth.get_balance(address, block_number))
+            batch.add(self.w3.eth.get_code(address, block_number))
+            tx_count, balance_wei, code = batch.execute()
+        
+        return tx_count, float(self.w3.from_wei(balance_wei, 'ether')), len(code) > 0
+    
+    # ============================================
+    # Raw RPC fetches (expect a checksummed address)
+    # Errors propagate: a defaulted 0 / False would be scored (and cached)
+    # as a fresh wallet
+    # ============================================
+    
+    def _fetch_transaction_count(self, address: str, block_number: BlockIdentifier = "latest") -> int:
+        return self.w3.eth.get_transaction_count(address, block_number)
+    
+    def _fetch_balance(self, address: str, block_number: BlockIdentifier = "latest") -> float:
+        balance_wei = self.w3.eth.get_balance(address, block_number)
+        return float(self.w3.from_wei(balance_wei, 'ether'))
+    
+    def _fetch_is_contract(self, address: str, block_number: BlockIdentifier = "latest") -> bool:
+        return len(self.w3.eth.get_code(address, block_number)) > 0
+    
+class AsyncBlockchainService(_WalletProfileBase):
+    """
+    Non-blocking counterpart of BlockchainService for the async API routes.
+    Profile reads go out as one JSON-RPC batch (concurrent calls if the node
+    rejects batches) and share the same profile cache as the sync service.
+    """
+    
+    def __init__(
+        self,
+        rpc_url: Union[str, Sequence[str], None] = None,
+        use_batch: bool = True,
+        profile_cache: Optional[TTLCache] = None,
+        invalidate_on_new_blocks: bool = False,
+        age_binary_search: bool = True,
+        transfer_index=None,
+        chain_head: Optional[ChainHeadTracker] = None
+    ):
+        self.rpc_url = rpc_url
+        self.w3 = create_async_web3(rpc_url)
+        # Same batching policy as BlockchainService
+        self.use_batch = use_batch
+        self._snapshot_block: Optional[int] = None
+        self._snapshot_block_fetched_at = 0.0
+        
+        self.profile_cache = profile_cache
+        self.invalidate_on_new_blocks = invalidate_on_new_blocks
+        self._last_scanned_block: Optional[int] = None
+        self._invalidation_lock = asyncio.Lock()
+        self.age_binary_search = age_binary_search
+        self.transfer_index = transfer_index
+        self.chain_head = chain_head
+    
+    async def connect(self) -> None:
+        """Verify the node is reachable (call once before use)"""
+        if not await self.w3.is_connected():
+            raise Exception(f"Failed to connect to Ethereum node at {self.rpc_url or get_rpc_urls()}")
+        chain_id = self.chain_head.chain_id if self.chain_head is not None else None
+        if chain_id is None:
+            chain_id = await self.w3.eth.chain_id
+        print(f"✅ Connected to Ethereum (async) - Chain ID: {chain_id}")
+    
+    async def get_wallet_profile(self, address: str, use_cache: bool = True, deadline: Optional[Deadline] = None) -> Dict:
+        """
+        Get comprehensive wallet profile for risk analysis
+        
+        Nonce, balance and code are requested in one JSON-RPC batch, pinned
+        to the same block, and served from the shared profile cache when possible.
+        
+        With a deadline, the reads are cancelled when it passes (an error
+        profile is returned) and so is the wallet-age search, which falls
+        back to the tx-count estimate.
+        """
+        try:
+            checksum_address = Web3.to_checksum_address(address)
+            cache = self.profile_cache if use_cache else None
+            
+            if cache is not None:
+                if self.invalidate_on_new_blocks:
+                    head = await within(deadline, self._get_snapshot_block())
+                    await within(deadline, self._invalidate_touched_addresses(head))
+                cached = cache.get(checksum_address)
+                if cached is not None:
+                    return {**cached, "address": address}
+            
+            block_number = await within(deadline, self._get_snapshot_block())
+            tx_count, balance_eth, is_contract = await within(
+                deadline, self._fetch_profile_facts(checksum_address, block_number)
+            )
+            wallet_age_days = await self._wallet_age_days(checksum_address, tx_count, deadline)
+            profile = self._build_profile(address, tx_count, balance_eth, is_contract, wallet_age_days)
+            profile["block_number"] = block_number
+            
+            if self.profile_cache is not None and not self._age_cut_short(deadline):
+                self.profile_cache.set(checksum_address, profile)
+            return dict(profile)
+        except DeadlineExceeded:
+            return self._timed_out_profile(address, deadline)
         except Exception as e:
             print(f"Error getting wallet profile: {e}")
             return {
                 "address": address,
                 "error": str(e)
             }
+    
+    async def find_first_activity(self, address: str) -> Optional[Tuple[int, int]]:
+        """Async version of BlockchainService.find_first_activity (shares its memo)"""
+        address = Web3.to_checksum_address(address)
+        if address in _first_activity:
+            return _first_activity[address]
+        
+        high = await self._get_snapshot_block()
+        if await self.w3.eth.get_transaction_count(address, high) == 0:
+            return None
+        
+        low = 0
+        while low < high:
+            mid = (low + high) // 2
+            if await self.w3.eth.get_transaction_count(address, mid) > 0:
+                high = mid
+            else:
+                low = mid + 1
+        
+        first_activity = (high, (await self.w3.eth.get_block(high))["timestamp"])
+        _first_activity[address] = first_activity
+        return first_activity
+    
+    async def _wallet_age_days(self, address: str, tx_count: int, deadline: Optional[Deadline] = None) -> Optional[int]:
+        if tx_count == 0 or not self.age_binary_search:
+            return None
+        try:
+            first_activity = await within(deadline, self.find_first_activity(address))
+        except DeadlineExceeded:
+            deadline.cut("wallet_age")
+            return None
+        except Exception as e:
+            print(f"Error searching wallet history (archive node required): {e}")
+            return None
+        if first_activity is None:
+            return None
+        return self._age_days_since(first_activity[1])
+    
+    async def _invalidate_touched_addresses(self, head: int) -> None:
+        await self.scan_new_blocks(head)
+    
+    async def scan_new_blocks(self, head: Optional[int] = None) -> Tuple[int, Optional[set]]:
+        """
+        Addresses touched in blocks since the last scan, as (blocks scanned,
+        addresses) - addresses is None when more than
+        MAX_INVALIDATION_SCAN_BLOCKS passed. With invalidate_on_new_blocks
+        their cached profiles are dropped (the whole cache for None).
+        Shared by request-time invalidation and the profile prewarmer, so
+        each block is scanned once.
+        """
+        if head is None:
+            head = await self._get_snapshot_block()
+        async with self._invalidation_lock:
+            last = self._last_scanned_block
+            if last is None or head <= last:
+                if last is None:
+                    self._last_scanned_block = head
+                return 0, set()
+            self._last_scanned_block = head
+            if head - last > self.MAX_INVALIDATION_SCAN_BLOCKS:
+                if self.invalidate_on_new_blocks and self.profile_cache is not None:
+                    self.profile_cache.clear()
+                return head - last, None
+            blocks = await asyncio.gather(*(
+                self.w3.eth.get_block(number, full_transactions=True)
+                for number in range(last + 1, head + 1)
+            ))
+            touched = set()
+            for block in blocks:
+                touched |= self._touched_addresses(block)
+            if self.invalidate_on_new_blocks:
+                self.invalidate_cached_profiles(touched)
+            return head - last, touched
+    
+    async def _get_snapshot_block(self) -> int:
+        head = self._tracked_head()
+        if head is not None:
+            return head
+        now = time.monotonic()
+        if self._snapshot_block is None or now - self._snapshot_block_fetched_at > self.SNAPSHOT_BLOCK_TTL_SECONDS:
+            self._snapshot_block = await self.w3.eth.block_number
+            self._snapshot_block_fetched_at = now
+        return self._snapshot_block
+    
+    async def _fetch_profile_facts(self, address: str, block_number: BlockIdentifier) -> Tuple[int, float, bool]:
+        """Fetch (tx_count, balance_eth, is_contract), batched when the node allows it"""
+        if self.use_batch:
+            try:
+                return await self._fetch_profile_facts_batched(address, block_number)
+            except Exception as e:
+                record_fallback("rpc_batch_sequential")
+                if _is_batch_rejection(e):
+                    print(f"⚠️ Node rejected JSON-RPC batch, using separate calls: {e}")
+                    self.use_batch = False
+                else:
+                    # Transport or per-call error - retry this lookup only, keep batching
+                    print(f"⚠️ Batch RPC failed, retrying with separate calls: {e}")
+        
+        return await asyncio.gather(
+            self._fetch_transaction_count(address, block_number),
+            self._fetch_balance(address, block_number),
+            self._fetch_is_contract(address, block_number)
+        )
+    
+    async def _fetch_profile_facts_batched(self, address: str, block_number: BlockIdentifier) -> Tuple[int, float, bool]:
+        async with self.w3.batch_requests() as batch:
+            batch.add(self.w3.eth.get_transaction_count(address, block_number))
+            batch.add(self.w3.eth.get_balance(address, block_number))
+            batch.add(self.w3.eth.get_code(address, block_number))
+            tx_count, balance_wei, code = await batch.async_execute()
+        
+        return tx_count, float(self.w3.from_wei(balance_wei, 'ether')), len(code) > 0
+    
+    # Errors propagate, as in BlockchainService
+    async def _fetch_transaction_count(self, address: str, block_number: BlockIdentifier = "latest") -> int:
+        return await self.w3.eth.get_transaction_count(address, block_number)
+    
+    async def _fetch_balance(self, address: str, block_number: BlockIdentifier = "latest") -> float:
+        balance_wei = await self.w3.eth.get_balance(address, block_number)
+        return float(self.w3.from_wei(balance_wei, 'ether'))
+    
+    async def _fetch_is_contract(self, address: str, block_number: BlockIdentifier = "latest") -> bool:
+        return len(await self.w3.eth.get_code(address, block_number)) > 0
 
-# Singleton instance
+# Singleton instances
+_profile_cache: Optional[TTLCache] = None
+_profile_cache_lock = threading.Lock()
 _blockchain_service: Optional[BlockchainService] = None
+_blockchain_service_lock = threading.Lock()
+_async_blockchain_service: Optional[AsyncBlockchainService] = None
+_async_blockchain_service_lock = asyncio.Lock()
+
+def _invalidate_on_new_blocks() -> bool:
+    return os.getenv("PROFILE_CACHE_BLOCK_INVALIDATION", "false").lower() == "true"
+
+def _age_binary_search() -> bool:
+    return os.getenv("WALLET_AGE_BINARY_SEARCH", "true").lower() != "false"
+
+def get_profile_cache():
+    """Get or create the wallet profile cache shared by every service instance"""
+    global _profile_cache
+    if _profile_cache is None:
+        with _profile_cache_lock:
+            if _profile_cache is None:
+                _profile_cache = create_cache(
+                    "profiles",
+                    max_size=int(os.getenv("PROFILE_CACHE_SIZE", 10000)),
+                    ttl_seconds=float(os.getenv("PROFILE_CACHE_TTL_SECONDS", 60))
+                )
+                register_cache("profiles", _profile_cache)
+    return _profile_cache
 
 def get_blockchain_service() -> BlockchainService:
     """Get or create blockchain service instance"""
     global _blockchain_service
     if _blockchain_service is None:
-        rpc_url = os.getenv("ETHEREUM_RPC_URL")
-        if not rpc_url:
-            raise Exception("ETHEREUM_RPC_URL not set in environment")
-        _blockchain_service = BlockchainService(rpc_url)
+        with _blockchain_service_lock:
+            if _blockchain_service is None:
+                use_batch = os.getenv("RPC_BATCH_REQUESTS", "true").lower() != "false"
+                _blockchain_service = BlockchainService(
+                    use_batch=use_batch,
+                    profile_cache=get_profile_cache(),
+                    invalidate_on_new_blocks=_invalidate_on_new_blocks(),
+                    age_binary_search=_age_binary_search(),
+                    transfer_index=get_transfer_indexer(),
+                    chain_head=get_chain_head_tracker()
+                )
     return _blockchain_service
+
+async def get_async_blockchain_service() -> AsyncBlockchainService:
+    """Get or create async blockchain service instance"""
+    global _async_blockchain_service
+    if _async_blockchain_service is None:
+        async with _async_blockchain_service_lock:
+            if _async_blockchain_service is None:
+                service = AsyncBlockchainService(
+                    use_batch=os.getenv("RPC_BATCH_REQUESTS", "true").lower() != "false",
+                    profile_cache=get_profile_cache(),
+                    invalidate_on_new_blocks=_invalidate_on_new_blocks(),
+                    age_binary_search=_age_binary_search(),
+                    transfer_index=get_transfer_indexer(),
+                    chain_head=get_chain_head_tracker()
+                )
+                await service.connect()
+                _async_blockchain_service = service
+    return _async_blockchain_service
@@ -0,0 +1,236 @@
+"""
+Cache Backends - Shared cache tier for profiles and agent verdicts
+In-process TTLCache, or a SQLite file every uvicorn worker can share
+"""
+from typing import Any, Dict, Hashable, Iterable, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+from ttl_cache import TTLCache
+
+class SQLiteCache:
+    """
+    TTL cache stored in a SQLite file (WAL mode), so all worker processes
+    on a host read and fill the same entries. Same interface as TTLCache;
+    keys and values must be JSON-serializable. When full, the oldest
+    entries are evicted first. Hit/miss counters are per process; size is
+    shared.
+
+    Callers run on the event loop, so a lock held by another worker is
+    waited on for at most busy_timeout seconds: a busy read is a miss, a
+    busy write or invalidation is skipped (the entry still expires by TTL).
+    """
+
+    # Size is enforced every this many writes rather than on each one
+    EVICTION_INTERVAL = 100
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str,
+        max_size: int = 10000,
+        ttl_seconds: float = 60.0,
+        busy_timeout: float = 0.05
+    ):
+        self.path = path
+        self.namespace = namespace
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.busy = 0
+
+        # Schema setup (startup, off the request path) may wait for other workers
+        with sqlite3.connect(path, timeout=5.0) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    stored_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+            db.execute("CREATE INDEX IF NOT EXISTS cache_entries_age ON cache_entries (namespace, stored_at)")
+        db.close()
+
+    def _db(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def _busy(self, error: sqlite3.OperationalError) -> None:
+        """Count a lock timeout; any other database error is re-raised"""
+        if "locked" not in str(error) and "busy" not in str(error):
+            raise error
+        with self._lock:
+            self.busy += 1
+
+    @staticmethod
+    def _key(key: Hashable) -> str:
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss, expired entry or busy database"""
+        try:
+            db = self._db()
+            row = db.execute(
+                "SELECT value, stored_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, self._key(key))
+            ).fetchone()
+        except sqlite3.OperationalError as e:
+            self._busy(e)
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            if time.time() - row[1] > self.ttl_seconds:
+                self.expirations += 1
+                self.misses += 1
+                expired = True
+            else:
+                self.hits += 1
+                expired = False
+        if expired:
+            try:
+                with db:
+                    db.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ? AND stored_at = ?",
+                        (self.namespace, self._key(key), row[1])
+                    )
+            except sqlite3.OperationalError as e:
+                self._busy(e)
+            return None
+        return json.loads(row[0])
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value (skipped if the database is busy); periodically evicts the oldest entries if over max_size"""
+        if self.max_size <= 0:
+            return
+        try:
+            db = self._db()
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO cache_entries (namespace, key, value, stored_at) VALUES (?, ?, ?, ?)",
+                    (self.namespace, self._key(key), json.dumps(value), time.time())
+                )
+            with self._lock:
+                self._writes += 1
+                evict = self._writes % self.EVICTION_INTERVAL == 0
+            if evict:
+                self._evict()
+        except sqlite3.OperationalError as e:
+            self._busy(e)
+
+    def _evict(self) -> None:
+        db = self._db()
+        with db:
+            db.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND stored_at < ?",
+                (self.namespace, time.time() - self.ttl_seconds)
+            )
+            excess = len(self) - self.max_size
+            if excess > 0:
+                db.execute(
+                    "DELETE FROM cache_entries WHERE rowid IN ("
+                    "SELECT rowid FROM cache_entries WHERE namespace = ? ORDER BY stored_at LIMIT ?)",
+                    (self.namespace, excess)
+                )
+                with self._lock:
+                    self.evictions += excess
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop a single entry. Returns True if it was cached"""
+        return self.invalidate_many([key]) > 0
+
+    def invalidate_many(self, keys: Iterable[Hashable]) -> int:
+        """Drop every cached entry among keys. Returns how many were dropped (0 if the database is busy)"""
+        try:
+            db = self._db()
+            with db:
+                dropped = sum(
+                    db.execute(
+                        "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                        (self.namespace, self._key(key))
+                    ).rowcount
+                    for key in keys
+                )
+        except sqlite3.OperationalError as e:
+            self._busy(e)
+            return 0
+        with self._lock:
+            self.invalidations += dropped
+        return dropped
+
+    def clear(self) -> None:
+        db = self._db()
+        with db:
+            dropped = db.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,)).rowcount
+        with self._lock:
+            self.invalidations += dropped
+
+    def __contains__(self, key: Hashable) -> bool:
+        row = self._db().execute(
+            "SELECT 1 FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.namespace, self._key(key))
+        ).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._db().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+
+    def stats(self) -> Dict:
+        """Counters for monitoring"""
+        size = len(self)
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "sqlite",
+                "size": size,
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "busy": self.busy
+            }
+
+def create_cache(namespace: str, max_size: int, ttl_seconds: float):
+    """
+    Cache for one namespace, backend chosen by CACHE_BACKEND:
+    memory (default, per process) or sqlite (shared by every worker via CACHE_SQLITE_PATH)
+    """
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteCache(
+            os.getenv("CACHE_SQLITE_PATH", "veto_cache.db"),
+            namespace,
+            max_size=max_size,
+            ttl_seconds=ttl_seconds,
+            busy_timeout=float(os.getenv("CACHE_SQLITE_BUSY_MS", 50)) / 1000
+        )
+    if backend != "memory":
+        print(f"⚠️ Unknown CACHE_BACKEND '{backend}', using in-memory cache")
+    return TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
@@ -0,0 +1,145 @@
+"""
+Chain Head Tracker - One shared view of the latest block
+Polls the node for the head block in the background so health checks,
+profile snapshots, wallet age, cache invalidation and indexers read a
+cached head instead of calling eth_blockNumber / eth_chainId themselves
+"""
+from typing import Dict, Optional
+import os
+import threading
+import time
+from web3 import Web3
+from rpc_provider import create_web3
+
+class ChainHeadTracker:
+    """
+    Latest block number and timestamp, refreshed every poll_interval
+    seconds with a single eth_getBlockByNumber("latest"), plus the chain
+    id (fetched once - it never changes for a connection). Readers never
+    make RPC calls. The head is considered stale when no poll has
+    succeeded for stale_after seconds; head() then returns None so callers
+    can fall back to asking the node. The first poll also runs in the
+    background thread, so until it lands the head is stale and chain_id
+    is None.
+    """
+
+    def __init__(self, w3: Web3, poll_interval: float = 2.0, stale_after: float = 30.0):
+        self.w3 = w3
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Replaced together on each successful poll (readers take one reference)
+        self._head: Optional[Dict] = None
+        self.chain_id: Optional[int] = None
+        self.last_error: Optional[str] = None
+
+        # Counters
+        self.polls = 0
+        self.poll_errors = 0
+
+    def refresh(self) -> Dict:
+        """Poll the node once (also called by the background thread)"""
+        if self.chain_id is None:
+            self.chain_id = self.w3.eth.chain_id
+        block = self.w3.eth.get_block("latest")
+        head = self._head
+        if head is None or block["number"] >= head["block_number"]:
+            self._head = {
+                "block_number": block["number"],
+                "timestamp": block["timestamp"],
+                "fetched_at": time.monotonic()
+            }
+        else:
+            # A lagging endpoint answered: keep the newer head, but it's still a live poll
+            self._head = {**head, "fetched_at": time.monotonic()}
+        self.polls += 1
+        self.last_error = None
+        return self._head
+
+    def staleness(self) -> Optional[float]:
+        """Seconds since the last successful poll (None before the first)"""
+        head = self._head
+        return time.monotonic() - head["fetched_at"] if head is not None else None
+
+    def is_stale(self) -> bool:
+        staleness = self.staleness()
+        return staleness is None or staleness > self.stale_after
+
+    def head(self) -> Optional[int]:
+        """Latest block number, or None when the head is stale"""
+        head = self._head
+        if head is None or time.monotonic() - head["fetched_at"] > self.stale_after:
+            return None
+        return head["block_number"]
+
+    def head_timestamp(self) -> Optional[int]:
+        """Timestamp of the latest polled block (kept while stale: it is still the chain's clock)"""
+        head = self._head
+        return head["timestamp"] if head is not None else None
+
+    def status(self) -> Dict:
+        """Everything the health check reports, without touching the node"""
+        head = self._head
+        staleness = self.staleness()
+        return {
+            "chain_id": self.chain_id,
+            "latest_block": head["block_number"] if head else None,
+            "block_timestamp": head["timestamp"] if head else None,
+            "block_age_seconds": round(max(0.0, time.time() - head["timestamp"]), 1) if head else None,
+            "staleness_seconds": round(staleness, 2) if staleness is not None else None,
+            "stale": self.is_stale(),
+            "last_error": self.last_error
+        }
+
+    def start(self) -> None:
+        """Poll in a background thread every poll_interval seconds"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="chain-head", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        # First poll right away, then every poll_interval
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.poll_errors += 1
+                self.last_error = str(e)
+                print(f"⚠️ Chain head poll failed: {e}")
+            if self._stop.wait(self.poll_interval):
+                return
+
+    def stats(self) -> Dict:
+        return {**self.status(), "polls": self.polls, "poll_errors": self.poll_errors}
+
+# Singleton instance
+_chain_head_tracker: Optional[ChainHeadTracker] = None
+_chain_head_tracker_lock = threading.Lock()
+
+def get_chain_head_tracker() -> ChainHeadTracker:
+    """
+    Get or create the chain head tracker, polling every
+    CHAIN_HEAD_POLL_SECONDS. Never blocks on the node: the first poll runs
+    in the tracker thread.
+    """
+    global _chain_head_tracker
+    if _chain_head_tracker is None:
+        with _chain_head_tracker_lock:
+            if _chain_head_tracker is None:
+                tracker = ChainHeadTracker(
+                    create_web3(),
+                    poll_interval=float(os.getenv("CHAIN_HEAD_POLL_SECONDS", 2)),
+                    stale_after=float(os.getenv("CHAIN_HEAD_STALE_SECONDS", 30))
+                )
+                tracker.start()
+                _chain_head_tracker = tracker
+    return _chain_head_tracker
@@ -0,0 +1,399 @@
+"""
+Chain Indexer - Background block and log indexing
+Keeps a local SQLite index of recent small inbound transfers so the
+Penny Drop check is a local lookup instead of a history scan, and
+optionally feeds every transfer into the wallet graph (transfer_graph.py)
+"""
+from web3 import Web3
+from typing import Dict, List, Optional, Tuple
+import os
+import sqlite3
+import threading
+import time
+from address_lists import get_screening_lists
+from chain_head import ChainHeadTracker, get_chain_head_tracker
+from rpc_provider import create_web3
+from transfer_graph import TransferGraph
+
+TRANSFER_TOPIC = Web3.keccak(text="Transfer(address,address,uint256)").to_0x_hex()
+
+class ChainIndexer:
+    """
+    Base class for resumable indexers that walk the chain in block-range
+    chunks. Progress is checkpointed in SQLite in the same transaction as
+    the indexed rows, so a restart resumes exactly where it stopped.
+    Subclasses implement _create_tables and _process_range.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        db_path: str,
+        name: str,
+        start_block: Optional[int] = None,
+        chunk_size: int = 2000,
+        poll_interval: float = 5.0,
+        confirmations: int = 0,
+        chain_head: Optional[ChainHeadTracker] = None
+    ):
+        self.w3 = w3
+        self.db_path = db_path
+        self.name = name
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.confirmations = confirmations
+        # Shared head block; the node is asked directly without one (or while it is stale)
+        self.chain_head = chain_head
+
+        self.db = sqlite3.connect(db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        with self._lock, self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints (name TEXT PRIMARY KEY, block INTEGER NOT NULL)"
+            )
+            self._create_tables()
+
+    # ============================================
+    # Checkpoints
+    # ============================================
+
+    def get_checkpoint(self) -> Optional[int]:
+        """Last fully indexed block, or None before the first sync"""
+        with self._lock:
+            row = self.db.execute("SELECT block FROM checkpoints WHERE name = ?", (self.name,)).fetchone()
+        return row[0] if row else None
+
+    def _save_checkpoint(self, block: int) -> None:
+        self.db.execute(
+            "INSERT INTO checkpoints (name, block) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET block = excluded.block",
+            (self.name, block)
+        )
+
+    # ============================================
+    # Sync loop
+    # ============================================
+
+    def sync_once(self) -> int:
+        """
+        Index every block between the checkpoint and the (confirmed) head.
+        Returns the number of blocks processed.
+        """
+        head = self.chain_head.head() if self.chain_head is not None else None
+        if head is None:
+            head = self.w3.eth.block_number
+        head -= self.confirmations
+        checkpoint = self.get_checkpoint()
+        if checkpoint is None:
+            from_block = self.start_block if self.start_block is not None else head
+        else:
+            from_block = checkpoint + 1
+
+        processed = 0
+        while from_block <= head and not self._stop.is_set():
+            to_block = min(from_block + self.chunk_size - 1, head)
+            rows = self._process_range(from_block, to_block)
+            with self._lock, self.db:
+                stored = self._store(rows)
+                self._save_checkpoint(to_block)
+            self._after_commit(stored)
+            processed += to_block - from_block + 1
+            from_block = to_block + 1
+        return processed
+
+    def start(self) -> None:
+        """Run sync_once in a background thread every poll_interval seconds"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-indexer", daemon=True)
+        self._thread.start()
+        print(f"✅ {self.name} indexer started (checkpoint: {self.get_checkpoint()})")
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sync_once()
+            except Exception as e:
+                print(f"⚠️ {self.name} indexer error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    # ============================================
+    # Subclass hooks
+    # ============================================
+
+    def _create_tables(self) -> None:
+        raise NotImplementedError
+
+    def _process_range(self, from_block: int, to_block: int):
+        """Fetch and decode blocks [from_block, to_block]. Runs without the DB lock"""
+        raise NotImplementedError
+
+    def _store(self, rows):
+        """Write _process_range output. Runs inside the checkpoint transaction"""
+        raise NotImplementedError
+
+    def _after_commit(self, stored) -> None:
+        """Apply what _store returned once it is committed. Runs without the DB lock"""
+
+
+class TransferIndexer(ChainIndexer):
+    """
+    Indexes small inbound transfers (MNEE Transfer logs and, optionally,
+    plain ETH transfers) per recipient, with block timestamps.
+    Only transfers at or below the penny-drop thresholds are stored.
+    
+    With a graph, every transfer also becomes a sender -> recipient edge:
+    distinct pairs are stored (so the graph is rebuilt on restart) and
+    only pairs seen for the first time are added to the graph.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        db_path: str,
+        token_address: Optional[str] = None,
+        token_decimals: int = 18,
+        max_token_amount: float = 1.0,
+        max_eth_amount: float = 0.01,
+        index_eth: bool = False,
+        retention_seconds: int = 7 * 86400,
+        graph: Optional[TransferGraph] = None,
+        **kwargs
+    ):
+        self.token_address = Web3.to_checksum_address(token_address) if token_address else None
+        self.max_token_units = int(max_token_amount * 10 ** token_decimals)
+        self.token_decimals = token_decimals
+        self.max_eth_wei = Web3.to_wei(max_eth_amount, "ether")
+        self.index_eth = index_eth
+        self.retention_seconds = retention_seconds
+        self.graph = graph
+        super().__init__(w3, db_path, name="transfers", **kwargs)
+        if graph is not None:
+            with self._lock:
+                graph.load(self.db.execute("SELECT sender, recipient FROM transfer_edges"))
+            print(f"✅ Transfer graph loaded: {graph.stats()}")
+
+    def _create_tables(self) -> None:
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS small_transfers (
+                recipient TEXT NOT NULL,
+                sender TEXT NOT NULL,
+                asset TEXT NOT NULL,
+                amount REAL NOT NULL,
+                block INTEGER NOT NULL,
+                timestamp INTEGER NOT NULL,
+                tx_hash TEXT NOT NULL,
+                log_index INTEGER NOT NULL,
+                PRIMARY KEY (tx_hash, log_index)
+            )
+        """)
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS small_transfers_recipient ON small_transfers (recipient, timestamp)"
+        )
+        # Distinct transfer pairs for the wallet graph, as 20-byte addresses
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS transfer_edges (
+                sender BLOB NOT NULL,
+                recipient BLOB NOT NULL,
+                PRIMARY KEY (sender, recipient)
+            ) WITHOUT ROWID
+        """)
+
+    def _process_range(self, from_block: int, to_block: int) -> Tuple[List[Tuple], List[Tuple[bytes, bytes]]]:
+        """Small transfer rows, and (sender, recipient) pairs of all transfers when a graph is attached"""
+        rows = []
+        edges = []
+        timestamps: Dict[int, int] = {}
+
+        def block_timestamp(number: int) -> int:
+            if number not in timestamps:
+                timestamps[number] = self.w3.eth.get_block(number)["timestamp"]
+            return timestamps[number]
+
+        if self.token_address:
+            logs = self.w3.eth.get_logs({
+                "fromBlock": from_block,
+                "toBlock": to_block,
+                "address": self.token_address,
+                "topics": [TRANSFER_TOPIC]
+            })
+            for log in logs:
+                if len(log["topics"]) < 3:
+                    continue
+                value = int.from_bytes(bytes(log["data"]), "big")
+                if value == 0:
+                    continue
+                sender, recipient = bytes(log["topics"][1])[-20:], bytes(log["topics"][2])[-20:]
+                if self.graph is not None:
+                    edges.append((sender, recipient))
+                if value > self.max_token_units:
+                    continue
+                rows.append((
+                    Web3.to_checksum_address(recipient),
+                    Web3.to_checksum_address(sender),
+                    "MNEE",
+                    value / 10 ** self.token_decimals,
+                    log["blockNumber"],
+                    block_timestamp(log["blockNumber"]),
+                    log["transactionHash"].to_0x_hex(),
+                    log["logIndex"]
+                ))
+
+        if self.index_eth:
+            for number in range(from_block, to_block + 1):
+                block = self.w3.eth.get_block(number, full_transactions=True)
+                timestamps[number] = block["timestamp"]
+                for tx in block["transactions"]:
+                    if self.graph is not None and tx.get("to") and tx["value"] > 0:
+                        edges.append((bytes.fromhex(tx["from"][2:]), bytes.fromhex(tx["to"][2:])))
+                    if tx.get("to") and 0 < tx["value"] <= self.max_eth_wei:
+                        rows.append((
+                            tx["to"],
+                            tx["from"],
+                            "ETH",
+                            float(Web3.from_wei(tx["value"], "ether")),
+                            number,
+                            block["timestamp"],
+                            tx["hash"].to_0x_hex(),
+                            -1
+                        ))
+        return rows, edges
+
+    def _store(self, output: Tuple[List[Tuple], List[Tuple[bytes, bytes]]]) -> List[Tuple[bytes, bytes]]:
+        """Returns the transfer pairs stored for the first time"""
+        rows, edges = output
+        self.db.executemany(
+            "INSERT OR IGNORE INTO small_transfers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        new_edges = [
+            edge for edge in dict.fromkeys(edges)
+            if self.db.execute("INSERT OR IGNORE INTO transfer_edges VALUES (?, ?)", edge).rowcount
+        ]
+        self.db.execute(
+            "DELETE FROM small_transfers WHERE timestamp < ?",
+            (int(time.time()) - self.retention_seconds,)
+        )
+        return new_edges
+
+    def _after_commit(self, new_edges: List[Tuple[bytes, bytes]]) -> None:
+        # Graph updates (a relabel can take a while) hold only the graph's own
+        # lock, so Penny Drop lookups on the event loop never wait for them.
+        # A failed commit adds nothing; the retry stores and adds the edges.
+        if new_edges:
+            self.graph.add_edges(new_edges)
+
+    # ============================================
+    # Lookups
+    # ============================================
+
+    def has_recent_small_inbound(self, address: str, window_seconds: Optional[int] = None) -> bool:
+        """Whether the address received a small transfer within the window (indexed lookup)"""
+        since = int(time.time()) - (window_seconds or self.retention_seconds)
+        with self._lock:
+            row = self.db.execute(
+                "SELECT 1 FROM small_transfers WHERE recipient = ? AND timestamp >= ? LIMIT 1",
+                (Web3.to_checksum_address(address), since)
+            ).fetchone()
+        return row is not None
+
+    def has_recent_small_transfer(self, sender: str, recipient: str, window_seconds: Optional[int] = None) -> bool:
+        """Whether sender paid recipient a small transfer within the window (indexed lookup)"""
+        since = int(time.time()) - (window_seconds or self.retention_seconds)
+        with self._lock:
+            row = self.db.execute(
+                "SELECT 1 FROM small_transfers WHERE recipient = ? AND sender = ? AND timestamp >= ? LIMIT 1",
+                (Web3.to_checksum_address(recipient), Web3.to_checksum_address(sender), since)
+            ).fetchone()
+        return row is not None
+
+    def recent_small_inbound(self, address: str, window_seconds: Optional[int] = None) -> List[Dict]:
+        """Small transfers received by the address within the window, newest first"""
+        since = int(time.time()) - (window_seconds or self.retention_seconds)
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT sender, asset, amount, block, timestamp, tx_hash FROM small_transfers "
+                "WHERE recipient = ? AND timestamp >= ? ORDER BY timestamp DESC",
+                (Web3.to_checksum_address(address), since)
+            ).fetchall()
+        return [
+            {"sender": r[0], "asset": r[1], "amount": r[2], "block": r[3], "timestamp": r[4], "tx_hash": r[5]}
+            for r in rows
+        ]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            count = self.db.execute("SELECT COUNT(*) FROM small_transfers").fetchone()[0]
+        stats = {"checkpoint": self.get_checkpoint(), "indexed_small_transfers": count}
+        if self.graph is not None:
+            stats["graph"] = self.graph.stats()
+        return stats
+
+# Singleton instance
+_transfer_indexer: Optional[TransferIndexer] = None
+_transfer_indexer_lock = threading.Lock()
+
+def get_transfer_indexer() -> Optional[TransferIndexer]:
+    """
+    Get or create the transfer indexer (None unless TRANSFER_INDEXER_ENABLED=true).
+    TRANSFER_GRAPH_ENABLED=true also builds the wallet graph, flagged by the scam list.
+    """
+    global _transfer_indexer
+    if _transfer_indexer is None and os.getenv("TRANSFER_INDEXER_ENABLED", "false").lower() == "true":
+        with _transfer_indexer_lock:
+            if _transfer_indexer is None:
+                w3 = create_web3()
+                chain_head = get_chain_head_tracker()
+                start_block = os.getenv("INDEXER_START_BLOCK")
+                if start_block is None:
+                    head = chain_head.head()
+                    if head is None:
+                        head = w3.eth.block_number
+                    start_block = max(0, head - int(os.getenv("INDEXER_LOOKBACK_BLOCKS", 50400)))
+                graph = None
+                if os.getenv("TRANSFER_GRAPH_ENABLED", "false").lower() == "true":
+                    lists = get_screening_lists()
+                    graph = TransferGraph(
+                        is_flagged=lambda key: lists.lookup_key(key) == "scam",
+                        flag_version=lambda: lists.reloads,
+                        max_hops=int(os.getenv("GRAPH_MAX_HOPS", 3)),
+                        hub_degree=int(os.getenv("GRAPH_HUB_DEGREE", 1000))
+                    )
+                _transfer_indexer = TransferIndexer(
+                    w3,
+                    db_path=os.getenv("INDEXER_DB_PATH", "veto_index.db"),
+                    token_address=os.getenv("MNEE_TOKEN_ADDRESS") or None,
+                    token_decimals=int(os.getenv("MNEE_DECIMALS", 18)),
+                    max_token_amount=float(os.getenv("PENNY_DROP_MAX_MNEE", 1.0)),
+                    max_eth_amount=float(os.getenv("PENNY_DROP_MAX_ETH", 0.01)),
+                    index_eth=os.getenv("INDEXER_INDEX_ETH", "false").lower() == "true",
+                    retention_seconds=int(os.getenv("PENNY_DROP_WINDOW_SECONDS", 7 * 86400)),
+                    start_block=int(start_block),
+                    chunk_size=int(os.getenv("INDEXER_CHUNK_SIZE", 2000)),
+                    poll_interval=float(os.getenv("INDEXER_POLL_SECONDS", 5)),
+                    chain_head=chain_head,
+                    graph=graph
+                )
+    return _transfer_indexer
+
+if __name__ == "__main__":
+    # Index against a local node: ETHEREUM_RPC_URL=http://127.0.0.1:8545 python chain_indexer.py
+    from dotenv import load_dotenv
+    load_dotenv()
+    os.environ.setdefault("TRANSFER_INDEXER_ENABLED", "true")
+    indexer = get_transfer_indexer()
+    while True:
+        processed = indexer.sync_once()
+        print(f"Indexed {processed} blocks - {indexer.stats()}")
+        time.sleep(indexer.poll_interval)
@@ -0,0 +1,85 @@
+"""
+Deadline - Per-request time budget for the analyze pipeline
+Each stage (profile fetch, AI agent) runs within a sub-budget of the
+request deadline; stages that run out are recorded and fall back
+(fail-closed profile, estimated wallet age, rule verdict)
+"""
+from typing import Awaitable, Dict, List, Optional, TypeVar
+import asyncio
+import os
+import time
+from metrics import record_fallback
+
+T = TypeVar("T")
+
+# Overall budget per analysis request
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", 8))
+
+# Longest each stage may take (always capped by what is left of the request)
+STAGE_BUDGETS: Dict[str, float] = {
+    "profile_fetch": float(os.getenv("PROFILE_FETCH_BUDGET_SECONDS", 3)),
+    "agent": float(os.getenv("AGENT_BUDGET_SECONDS", 6))
+}
+
+class DeadlineExceeded(Exception):
+    """A stage ran past its deadline"""
+
+class Deadline:
+    """
+    Absolute expiry on the monotonic clock. Stage deadlines made with
+    stage() share the request's list of stages that were cut short.
+    """
+
+    def __init__(self, seconds: float, cut_short: Optional[List[str]] = None):
+        self.expires_at = time.monotonic() + seconds
+        self.cut_short: List[str] = cut_short if cut_short is not None else []
+
+    @classmethod
+    def start(cls) -> "Deadline":
+        """Deadline for a new request (REQUEST_DEADLINE_SECONDS from now)"""
+        return cls(REQUEST_DEADLINE_SECONDS)
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def stage(self, name: str) -> "Deadline":
+        """Deadline for one stage: its sub-budget, or the rest of the request if sooner"""
+        budget = min(STAGE_BUDGETS.get(name, self.remaining()), self.remaining())
+        return Deadline(budget, self.cut_short)
+
+    def cut(self, stage: str) -> None:
+        """Record that a stage ran out of time and fell back"""
+        if stage not in self.cut_short:
+            self.cut_short.append(stage)
+            print(f"⚠️ Deadline: {stage} cut short")
+            record_fallback(f"deadline_{stage}")
+
+    def check(self) -> None:
+        if self.expired():
+            raise DeadlineExceeded()
+
+async def within(deadline: Optional[Deadline], awaitable: Awaitable[T]) -> T:
+    """
+    Await, cancelling the work when the deadline passes (raises DeadlineExceeded).
+    Unlike asyncio.wait_for, timeouts raised by the work itself (e.g. an
+    aiohttp read timeout) propagate unchanged.
+    """
+    if deadline is None:
+        return await awaitable
+    task = asyncio.ensure_future(awaitable)
+    try:
+        done, _ = await asyncio.wait({task}, timeout=deadline.remaining())
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    if not done:
+        task.cancel()
+        # Let the work unwind before the caller moves on (as asyncio.wait_for does)
+        await asyncio.wait({task})
+        if not task.cancelled():
+            task.exception()  # retrieved, so it isn't logged as unhandled
+        raise DeadlineExceeded()
+    return task.result()
@@ -1,59 +1,165 @@
 """
 AI Agent for Fraud Detection
-Uses LangChain ReAct pattern with custom tools
+Single structured-output LLM review by default; LangChain ReAct pattern
+with custom tools available via AGENT_MODE=react
 """
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain.tools import Tool
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_groq import ChatGroq
-from langchain.prompts import PromptTemplate
-from typing import Dict, List
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
+import math
 import os
-from blockchain_service import get_blockchain_service
+import threading
+import time
+from blockchain_service import get_async_blockchain_service, get_blockchain_service
+from risk_engine import RiskEngine, get_risk_engine
+from metrics import get_callback_handler, record_fallback, register_cache, span
+from single_flight import AsyncSingleFlight, SingleFlight
+from cache_backends import create_cache
+from llm_scheduler import LLMProvider, LLMScheduler
+from deadline import STAGE_BUDGETS, Deadline, DeadlineExceeded, within
+
+class AgentVerdict(BaseModel):
+    """Structured LLM review of a rule verdict"""
+    score_adjustment: int = Field(
+        description="Points to add to (or subtract from) the rule-based risk score, within the allowed range"
+    )
+    explanation: str = Field(
+        description="Plain-language explanation for the sender of why this payment is or is not risky"
+    )
+
+STRUCTURED_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a fraud analyst protecting users from Authorized Push Payment (APP) scams.
+A deterministic rule engine has already scored the payment below from on-chain data.
+Review its findings and return:
+- score_adjustment: an integer between -{max_adjustment} and {max_adjustment}. Use 0 unless the combination
+  of signals is clearly riskier or safer than the rule score suggests.
+- explanation: 2-3 sentences for the sender, in simple terms, explaining the risk."""),
+    ("human", """Payment:
+- Sender: {sender}
+- Recipient: {recipient}
+- Amount: {amount} MNEE
+
+Recipient wallet:
+- Transaction Count: {transaction_count}
+- Wallet Age: {wallet_age_days} days
+- ETH Balance: {balance_eth} ETH
+- Is Contract: {is_contract}
+- Recent Small TX: {has_recent_small_tx}
+
+Rule verdict: {risk_score}/100 ({risk_level})
+Detected patterns: {patterns}
+Reasons:
+{reasons}""")
+])
+
+EXPLANATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You are a fraud analyst protecting users from Authorized Push Payment (APP) scams.
+A deterministic rule engine has already decided how to handle the payment below.
+In 2-3 plain sentences addressed to the sender, explain the risk. Reply with the explanation text only."""),
+    STRUCTURED_PROMPT.messages[1]
+])
 
 class FraudDetectionAgent:
     """
     Autonomous AI Agent for detecting payment fraud
     Uses Gemini 2.5 Flash with Groq/Mistral fallback
+    
+    Tiered pipeline: the deterministic RiskEngine rules score every
+    transfer first. The LLM agent only runs when the score lands in the
+    ambiguous band (or an explanation is explicitly requested), and then
+    only contributes the natural-language explanation.
+    
+    In the default structured mode the agent is one LLM call on the
+    already-fetched profile, returning a bounded score adjustment and the
+    explanation (AGENT_MODE=react runs the multi-step tool-using agent).
+    
+    Agent verdicts are cached by normalized recipient features, and
+    concurrent identical requests share a single agent run, so a burst of
+    payments to the same wallet costs one LLM call.
+    
+    LLM calls go through an LLMScheduler: each provider has a
+    requests-per-minute budget, calls spill over to the next provider when
+    one is spent, and when no provider has budget within
+    LLM_QUEUE_TIMEOUT_SECONDS the request is answered by the rules alone.
     """
     
-    def __init__(self):
+    def __init__(self, llm=None, providers: Optional[List[LLMProvider]] = None):
         self.blockchain = get_blockchain_service()
-        self.llm = self._initialize_llm()
-        self.tools = self._create_tools()
-        self.agent = self._create_agent()
+        self.risk_engine = get_risk_engine()
+        # Inclusive score band where the rules alone are not conclusive
+        self.ambiguous_min_score = int(os.getenv("AGENT_AMBIGUOUS_MIN_SCORE", RiskEngine.MEDIUM_RISK_THRESHOLD))
+        self.ambiguous_max_score = int(os.getenv("AGENT_AMBIGUOUS_MAX_SCORE", RiskEngine.HIGH_RISK_THRESHOLD - 1))
+        self.mode = os.getenv("AGENT_MODE", "structured").lower()
+        self.max_score_adjustment = int(os.getenv("AGENT_MAX_SCORE_ADJUSTMENT", 15))
+        self.verdict_cache = get_verdict_cache()
+        self._single_flight = SingleFlight()
+        self._async_single_flight = AsyncSingleFlight()
+        # Longest a request waits for LLM budget before answering with rules only
+        self.llm_queue_timeout = float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", 5))
+        # Any LangChain chat model can be injected (e.g. the benchmark stub),
+        # or a list of rate-limited providers (e.g. fakes in tests)
+        if providers is None:
+            providers = [LLMProvider("injected", llm)] if llm is not None else self._initialize_providers()
+        self.scheduler = LLMScheduler(providers)
+        self.llm = providers[0].llm
+        if self.mode == "react":
+            self.tools = self._create_tools()
+            self.agents = {p.name: self._create_agent(p.llm) for p in providers}
+        else:
+            self.reviewers = {
+                p.name: STRUCTURED_PROMPT | p.llm.with_structured_output(AgentVerdict) for p in providers
+            }
         
-    def _initialize_llm(self):
-        """Initialize LLM with fallback"""
+    def _initialize_providers(self) -> List[LLMProvider]:
+        """Every configured LLM, in priority order, with its rate limit"""
         google_api_key = os.getenv("GOOGLE_API_KEY")
         groq_api_key = os.getenv("GROQ_API_KEY")
+        providers = []
         
+        # Provider SDKs are imported on first use: they are slow to load.
+        # SDK retries are kept to one so 429s reach the scheduler quickly
+        # instead of being retried with long backoffs.
         if google_api_key and google_api_key != "your-gemini-api-key-here":
+            from langchain_google_genai import ChatGoogleGenerativeAI
             # Primary: Gemini 2.5 Flash (FREE tier: 15 RPM)
-            return ChatGoogleGenerativeAI(
-                model="gemini-2.5-flash",
-                google_api_key=google_api_key,
-                temperature=0.1,  # Low temperature for consistent fraud detection
-                max_tokens=1000
-            )
-        elif groq_api_key and groq_api_key != "your-groq-api-key-here":
+            providers.append(LLMProvider(
+                "gemini",
+                ChatGoogleGenerativeAI(
+                    model="gemini-2.5-flash",
+                    google_api_key=google_api_key,
+                    temperature=0.1,  # Low temperature for consistent fraud detection
+                    max_tokens=1000,
+                    max_retries=1,
+                    timeout=STAGE_BUDGETS["agent"]
+                ),
+                requests_per_minute=float(os.getenv("GEMINI_RPM", 15))
+            ))
+        if groq_api_key and groq_api_key != "your-groq-api-key-here":
+            from langchain_groq import ChatGroq
             # Fallback: Mistral 7B via Groq (FREE, ultra-fast)
-            return ChatGroq(
-                model="mixtral-8x7b-32768",
-                groq_api_key=groq_api_key,
-                temperature=0.1
-            )
-        else:
+            providers.append(LLMProvider(
+                "groq",
+                ChatGroq(
+                    model="mixtral-8x7b-32768",
+                    groq_api_key=groq_api_key,
+                    temperature=0.1,
+                    max_retries=1,
+                    timeout=STAGE_BUDGETS["agent"]
+                ),
+                requests_per_minute=float(os.getenv("GROQ_RPM", 30))
+            ))
+        if not providers:
             raise Exception("No AI API keys configured. Please set GOOGLE_API_KEY or GROQ_API_KEY in .env")
+        return providers
     
-    def _create_tools(self) -> List[Tool]:
+    def _create_tools(self) -> List["Tool"]:
         """Create custom tools for the agent"""
+        from langchain.tools import Tool
         
-        def analyze_wallet(address: str) -> str:
-            """Analyze blockchain wallet data"""
-            try:
-                profile = self.blockchain.get_wallet_profile(address)
-                return f"""
+        def format_wallet_analysis(address: str, profile: Dict) -> str:
+            return f"""
 Wallet Analysis for {address}:
 - Transaction Count: {profile.get('transaction_count', 0)}
 - Wallet Age: {profile.get('wallet_age_days', 0)} days
@@ -61,12 +167,8 @@ Wallet Analysis for {address}:
 - Is Contract: {profile.get('is_contract', False)}
 - Recent Small TX: {profile.get('has_recent_small_tx', False)}
 """
-            except Exception as e:
-                return f"Error analyzing wallet: {str(e)}"
         
-        def detect_patterns(recipient_address: str, amount: float) -> str:
-            """Detect known fraud patterns"""
-            profile = self.blockchain.get_wallet_profile(recipient_address)
+        def format_patterns(profile: Dict) -> str:
             patterns = []
             
             # Pattern 1: Fresh Wallet
@@ -93,6 +195,34 @@ Wallet Analysis for {address}:
             
             return "Detected Patterns:\n" + "\n".join(f"- {p}" for p in patterns)
         
+        def recipient_from_input(tool_input: str) -> str:
+            # Input format: recipient_address,amount
+            return tool_input.split(",")[0].strip()
+        
+        def analyze_wallet(address: str) -> str:
+            """Analyze blockchain wallet data"""
+            try:
+                address = address.strip()
+                return format_wallet_analysis(address, self.blockchain.get_wallet_profile(address))
+            except Exception as e:
+                return f"Error analyzing wallet: {str(e)}"
+        
+        async def analyze_wallet_async(address: str) -> str:
+            try:
+                address = address.strip()
+                blockchain = await get_async_blockchain_service()
+                return format_wallet_analysis(address, await blockchain.get_wallet_profile(address))
+            except Exception as e:
+                return f"Error analyzing wallet: {str(e)}"
+        
+        def detect_patterns(tool_input: str) -> str:
+            """Detect known fraud patterns"""
+            return format_patterns(self.blockchain.get_wallet_profile(recipient_from_input(tool_input)))
+        
+        async def detect_patterns_async(tool_input: str) -> str:
+            blockchain = await get_async_blockchain_service()
+            return format_patterns(await blockchain.get_wallet_profile(recipient_from_input(tool_input)))
+        
         def calculate_risk_score(patterns_found: str) -> str:
             """Calculate numerical risk score based on patterns"""
             score = 0
@@ -133,11 +263,13 @@ Vault Delay: {delay} seconds
             Tool(
                 name="AnalyzeWallet",
                 func=analyze_wallet,
+                coroutine=analyze_wallet_async,
                 description="Analyze blockchain wallet data (transaction count, age, balance). Input: wallet address"
             ),
             Tool(
                 name="DetectPatterns",
                 func=detect_patterns,
+                coroutine=detect_patterns_async,
                 description="Detect fraud patterns (penny drop, fresh wallet, etc.). Input: recipient_address,amount (comma-separated)"
             ),
             Tool(
@@ -147,8 +279,10 @@ Vault Delay: {delay} seconds
             )
         ]
     
-    def _create_agent(self) -> AgentExecutor:
+    def _create_agent(self, llm) -> "AgentExecutor":
         """Create ReAct agent with custom prompt"""
+        from langchain.agents import AgentExecutor, create_react_agent
+        from langchain_core.prompts import PromptTemplate
         
         prompt = PromptTemplate.from_template("""
 You are a fraud detection AI agent protecting users from Authorized Push Payment (APP) scams.
@@ -185,7 +319,7 @@ Remember:
 """)
         
         agent = create_react_agent(
-            llm=self.llm,
+            llm=llm,
             tools=self.tools,
             prompt=prompt
         )
@@ -193,20 +327,15 @@ Remember:
         return AgentExecutor(
             agent=agent,
             tools=self.tools,
-            verbose=True,
+            verbose=os.getenv("AGENT_VERBOSE", "false").lower() == "true",
             max_iterations=5,
+            max_execution_time=STAGE_BUDGETS["agent"],
             handle_parsing_errors=True
         )
     
-    def analyze_transaction(self, sender: str, recipient: str, amount: float) -> Dict:
-        """
-        Main method: Analyze transaction for fraud
-        Returns structured risk assessment
-        """
-        try:
-            # Run agent
-            result = self.agent.invoke({
-                "input": f"""
+    def _build_agent_input(self, sender: str, recipient: str, amount: float) -> Dict:
+        return {
+            "input": f"""
 Analyze this payment transaction for fraud:
 - Sender: {sender}
 - Recipient: {recipient}
@@ -221,102 +350,389 @@ Determine:
 
 Return JSON with: risk_score, risk_level, recommended_action, vault_delay_seconds, patterns_detected, scam_explanation
 """
-            })
-            
-            # Parse agent output
-            output = result.get("output", "{}")
-            
-            # Extract structured data from agent response
-            # (In production, use better JSON parsing)
-            return self._parse_agent_output(output, recipient)
-            
-        except Exception as e:
-            print(f"Agent error: {e}")
-            # Fallback to rule-based
-            return self._fallback_analysis(recipient, amount)
+        }
     
-    def _parse_agent_output(self, output: str, recipient: str) -> Dict:
-        """Parse agent's natural language output into structured format"""
-        # Simple parsing (in production, use structured output)
-        profile = self.blockchain.get_wallet_profile(recipient)
-        
-        # Calculate score based on patterns
-        score = 0
-        patterns = []
-        reasons = []
-        
-        tx_count = profile.get('transaction_count', 0)
-        wallet_age = profile.get('wallet_age_days', 0)
-        has_small_tx = profile.get('has_recent_small_tx', False)
-        balance = profile.get('balance_eth', 0)
+    def needs_agent(self, assessment: Dict, explain: bool = False) -> bool:
+        """Whether the rule verdict is ambiguous enough (or an explanation was asked for) to run the LLM"""
+        if explain:
+            return True
+        return self.ambiguous_min_score <= assessment["risk_score"] <= self.ambiguous_max_score
+    
+    @staticmethod
+    def profile_failed(profile: Dict) -> bool:
+        """
+        The profile fetch failed or ran out of time (already in cut_short):
+        its facts are zeroed placeholders, so the fail-closed rule verdict
+        stands - no LLM call on them, nothing cached under their key
+        """
+        if "error" in profile:
+            record_fallback("agent_skipped_profile_error")
+            return True
+        return False
+    
+    def verdict_key(self, recipient: str, amount: float, profile: Dict, assessment: Dict) -> Tuple:
+        """
+        Cache key for an agent verdict: recipient, order-of-magnitude amount
+        bucket, the profile features the rules look at and the sender
+        behavior patterns detected. Counts beyond the rule thresholds are
+        capped so routine chain activity doesn't change the key.
+        """
+        balance = profile.get("balance_eth", 0)
+        return (
+            profile.get("address", recipient).lower(),
+            math.floor(math.log10(amount)) if 0 < amount < math.inf else None,
+            min(profile.get("transaction_count", 0), RiskEngine.LIMITED_HISTORY_TX),
+            min(profile.get("wallet_age_days", 0), RiskEngine.RECENT_WALLET_DAYS),
+            math.floor(math.log10(balance)) if balance > 0 else None,
+            bool(profile.get("is_contract", False)),
+            bool(profile.get("has_recent_small_tx", False)),
+            tuple(p for p in assessment["patterns_detected"] if p in RiskEngine.SENDER_PATTERNS)
+        )
+    
+    def analyze_transaction(
+        self, sender: str, recipient: str, amount: float, explain: bool = False, deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """
+        Main method: Analyze transaction for fraud
+        Returns structured risk assessment
         
-        if tx_count < 5:
-            score += 35
-            patterns.append("FRESH_WALLET")
-            reasons.append(f"Recipient is a fresh wallet ({tx_count} transactions)")
+        Runs within deadline (a new REQUEST_DEADLINE_SECONDS one by default);
+        stages that run out of time are listed in deadline.cut_short.
+        """
+        deadline = deadline or Deadline.start()
+        sender_features = self.risk_engine.observe_sender(sender, recipient, amount)
+        listed = self.risk_engine.screen_recipient(recipient)
+        if listed is not None:
+            return self._rule_result(listed)
+        with span("profile_fetch"):
+            profile = self.blockchain.get_wallet_profile(recipient, deadline=deadline.stage("profile_fetch"))
+        with span("rules"):
+            assessment = self.risk_engine.assess_profile(recipient, profile, sender_features, sender=sender)
+        if not self.needs_agent(assessment, explain) or self.profile_failed(profile):
+            return self._rule_result(assessment)
         
-        if has_small_tx:
-            score += 40
-            patterns.append("PENNY_DROP")
-            reasons.append("Penny Drop pattern: Recent small test transaction detected")
+        key = self.verdict_key(recipient, amount, profile, assessment)
+        verdict = self.verdict_cache.get(key)
+        if verdict is None:
+            agent_deadline = deadline.stage("agent")
+            verdict = self._single_flight.do(
+                key, lambda: self._run_agent(key, sender, recipient, amount, profile, assessment, agent_deadline)
+            )
+        if verdict is None:
+            return self._fallback_analysis(assessment)
+        return self._agent_result(assessment, verdict)
+    
+    async def analyze_transaction_async(
+        self, sender: str, recipient: str, amount: float, explain: bool = False, deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """
+        Async version of analyze_transaction for the API routes.
+        The agent's own tool calls hit the profile cache warmed by the rule pass.
         
-        if wallet_age < 7:
-            score += 25
-            patterns.append("NEW_WALLET")
-            reasons.append(f"Very new wallet (created ~{wallet_age} days ago)")
+        A request whose agent stage runs out of time gets the rule verdict;
+        the shared agent run itself keeps going and caches its verdict for
+        the next request.
+        """
+        deadline = deadline or Deadline.start()
+        sender_features = self.risk_engine.observe_sender(sender, recipient, amount)
+        listed = self.risk_engine.screen_recipient(recipient)
+        if listed is not None:
+            return self._rule_result(listed)
+        blockchain = await get_async_blockchain_service()
+        with span("profile_fetch"):
+            profile = await blockchain.get_wallet_profile(recipient, deadline=deadline.stage("profile_fetch"))
+        with span("rules"):
+            assessment = self.risk_engine.assess_profile(recipient, profile, sender_features, sender=sender)
+        if not self.needs_agent(assessment, explain) or self.profile_failed(profile):
+            return self._rule_result(assessment)
         
-        if balance == 0 and tx_count > 0:
-            score += 20
-            patterns.append("ZERO_BALANCE")
-            reasons.append("Wallet has zero balance despite transaction history")
+        key = self.verdict_key(recipient, amount, profile, assessment)
+        verdict = self.verdict_cache.get(key)
+        if verdict is None:
+            agent_deadline = deadline.stage("agent")
+            try:
+                verdict = await within(agent_deadline, self._async_single_flight.do(
+                    key, lambda: self._run_agent_async(key, sender, recipient, amount, profile, assessment, agent_deadline)
+                ))
+            except DeadlineExceeded:
+                agent_deadline.cut("agent")
+        if verdict is None:
+            return self._fallback_analysis(assessment)
+        return self._agent_result(assessment, verdict)
+    
+    def _run_agent(
+        self, key: Tuple, sender: str, recipient: str, amount: float, profile: Dict, assessment: Dict,
+        deadline: Deadline
+    ) -> Optional[Dict]:
+        """
+        One agent run; caches and returns its verdict (None if the agent
+        failed, had no LLM budget or ran out of time). LLM calls can't be
+        interrupted from here: they are bounded by the client timeouts and
+        the ReAct executor's max_execution_time (AGENT_BUDGET_SECONDS).
+        """
+        exclude: Tuple[str, ...] = ()
+        while True:
+            if deadline.expired():
+                deadline.cut("agent")
+                return None
+            slot = self.scheduler.acquire(min(self.llm_queue_timeout, deadline.remaining()), exclude)
+            if slot is None:
+                record_fallback("llm_budget")
+                return None
+            provider, wait = slot
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                verdict = self._invoke_provider(provider, sender, recipient, amount, profile, assessment)
+                break
+            except Exception as e:
+                if not self._spill_over(provider, e):
+                    return None
+                exclude += (provider.name,)
+        if verdict is not None:
+            self.verdict_cache.set(key, verdict)
+        return verdict
+    
+    async def _run_agent_async(
+        self, key: Tuple, sender: str, recipient: str, amount: float, profile: Dict, assessment: Dict,
+        deadline: Deadline
+    ) -> Optional[Dict]:
+        exclude: Tuple[str, ...] = ()
+        while True:
+            slot = self.scheduler.acquire(min(self.llm_queue_timeout, deadline.remaining()), exclude)
+            if slot is None:
+                record_fallback("llm_budget")
+                return None
+            provider, wait = slot
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                verdict = await self._invoke_provider_async(provider, sender, recipient, amount, profile, assessment)
+                break
+            except Exception as e:
+                if not self._spill_over(provider, e):
+                    return None
+                exclude += (provider.name,)
+        if verdict is not None:
+            self.verdict_cache.set(key, verdict)
+        return verdict
+    
+    def _invoke_provider(
+        self, provider: LLMProvider, sender: str, recipient: str, amount: float, profile: Dict, assessment: Dict
+    ) -> Optional[Dict]:
+        with span("agent"):
+            if self.mode == "react":
+                result = self.agents[provider.name].invoke(
+                    self._build_agent_input(sender, recipient, amount), config=self._run_config()
+                )
+                return self._parse_agent_output(result.get("output", "{}"))
+            review = self.reviewers[provider.name].invoke(
+                self._build_review_input(sender, recipient, amount, profile, assessment), config=self._run_config()
+            )
+        return self._parse_review(review)
+    
+    async def _invoke_provider_async(
+        self, provider: LLMProvider, sender: str, recipient: str, amount: float, profile: Dict, assessment: Dict
+    ) -> Optional[Dict]:
+        with span("agent"):
+            if self.mode == "react":
+                result = await self.agents[provider.name].ainvoke(
+                    self._build_agent_input(sender, recipient, amount), config=self._run_config()
+                )
+                return self._parse_agent_output(result.get("output", "{}"))
+            review = await self.reviewers[provider.name].ainvoke(
+                self._build_review_input(sender, recipient, amount, profile, assessment), config=self._run_config()
+            )
+        return self._parse_review(review)
+    
+    def _spill_over(self, provider: LLMProvider, error: Exception) -> bool:
+        """Handle a failed LLM call: True to retry on another provider (it was rate limited)"""
+        print(f"Agent error ({provider.name}): {error}")
+        if LLMScheduler.is_rate_limit_error(error):
+            self.scheduler.report_rate_limited(provider)
+            return True
+        record_fallback("agent_error")
+        return False
+    
+    @staticmethod
+    def _run_config() -> Dict:
+        """LangChain run config: metrics callbacks for LLM calls, tools and agent steps"""
+        return {"callbacks": [get_callback_handler()]}
+    
+    def _build_review_input(self, sender: str, recipient: str, amount: float, profile: Dict, assessment: Dict) -> Dict:
+        """Prompt variables for the structured review: profile, patterns and rule verdict, no tool calls"""
+        return {
+            "max_adjustment": self.max_score_adjustment,
+            "sender": sender,
+            "recipient": recipient,
+            "amount": amount,
+            "transaction_count": profile.get("transaction_count", 0),
+            "wallet_age_days": profile.get("wallet_age_days", 0),
+            "balance_eth": profile.get("balance_eth", 0),
+            "is_contract": profile.get("is_contract", False),
+            "has_recent_small_tx": profile.get("has_recent_small_tx", False),
+            "risk_score": assessment["risk_score"],
+            "risk_level": assessment["risk_level"],
+            "patterns": ", ".join(assessment["patterns_detected"]) or "none",
+            "reasons": "\n".join(f"- {r}" for r in assessment["reasons"]) or "- none"
+        }
+    
+    def _parse_review(self, review: Optional[AgentVerdict]) -> Optional[Dict]:
+        """Validate a structured review; the adjustment is clamped to the allowed range"""
+        if review is None or not review.explanation.strip():
+            return None
+        limit = self.max_score_adjustment
+        return {
+            "score_adjustment": max(-limit, min(limit, review.score_adjustment)),
+            "scam_explanation": review.explanation.strip()
+        }
+    
+    async def stream_transaction(
+        self, sender: str, recipient: str, amount: float, explain: bool = False, deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Tuple[str, Dict]]:
+        """
+        Streaming analysis as (event, data) pairs:
+        - "verdict": the rule verdict, as soon as the profile is in
+        - "explanation": {"delta": text} chunks of the LLM explanation
+        - "done": the final assessment
+        The decision (score, level, delay) is always the rule verdict;
+        streamed explanations never adjust it. An explanation still
+        streaming when the agent budget runs out is dropped in favour of
+        the canned one.
+        """
+        deadline = deadline or Deadline.start()
+        sender_features = self.risk_engine.observe_sender(sender, recipient, amount)
+        listed = self.risk_engine.screen_recipient(recipient)
+        if listed is not None:
+            rule_result = self._rule_result(listed)
+            yield "verdict", rule_result
+            yield "done", rule_result
+            return
+        blockchain = await get_async_blockchain_service()
+        with span("profile_fetch"):
+            profile = await blockchain.get_wallet_profile(recipient, deadline=deadline.stage("profile_fetch"))
+        with span("rules"):
+            assessment = self.risk_engine.assess_profile(recipient, profile, sender_features, sender=sender)
+        rule_result = self._rule_result(assessment)
+        yield "verdict", rule_result
+        if not self.needs_agent(assessment, explain) or self.profile_failed(profile):
+            yield "done", rule_result
+            return
         
-        # Determine risk level
-        if score >= 70:
-            risk_level = "HIGH"
-            action = "VAULT_LOCK"
-            delay = 3600
-        elif score >= 40:
-            risk_level = "MEDIUM"
-            action = "VAULT_LOCK"
-            delay = 1800
-        else:
-            risk_level = "LOW"
-            action = "INSTANT_SEND"
-            delay = 0
+        # Own key space: cached streamed explanations carry no score adjustment
+        key = ("stream",) + self.verdict_key(recipient, amount, profile, assessment)
+        verdict = self.verdict_cache.get(key)
+        if verdict is not None:
+            yield "explanation", {"delta": verdict["scam_explanation"]}
+            yield "done", self._agent_result(assessment, verdict)
+            return
         
-        # Generate explanation
-        if patterns:
-            explanation = f"This transaction shows signs of a scam. {' '.join(reasons)}"
+        chunks = []
+        agent_deadline = deadline.stage("agent")
+        slot = self.scheduler.acquire(min(self.llm_queue_timeout, agent_deadline.remaining()))
+        if slot is None:
+            record_fallback("llm_budget")
         else:
-            explanation = "No significant fraud patterns detected. Transaction appears safe."
+            provider, wait = slot
+            if wait > 0:
+                await asyncio.sleep(wait)
+            review_input = self._build_review_input(sender, recipient, amount, profile, assessment)
+            stream = (EXPLANATION_PROMPT | provider.llm).astream(review_input, config=self._run_config())
+            try:
+                while True:
+                    try:
+                        chunk = await within(agent_deadline, stream.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    if chunk.content:
+                        chunks.append(chunk.content)
+                        yield "explanation", {"delta": chunk.content}
+            except DeadlineExceeded:
+                agent_deadline.cut("agent")
+                chunks = []
+            except Exception as e:
+                # A stream can't move providers once text has been sent
+                self._spill_over(provider, e)
+            finally:
+                await stream.aclose()
         
+        explanation = "".join(chunks).strip()
+        if not explanation:
+            yield "done", self._fallback_analysis(assessment)
+            return
+        verdict = {"score_adjustment": 0, "scam_explanation": explanation}
+        self.verdict_cache.set(key, verdict)
+        yield "done", self._agent_result(assessment, verdict)
+    
+    def _rule_result(self, assessment: Dict) -> Dict:
+        """Rule verdict with the canned explanation for its patterns"""
         return {
-            "risk_score": score,
-            "risk_level": risk_level,
-            "vault_delay_seconds": delay,
-            "recommended_action": action,
-            "reasons": reasons,
-            "patterns_detected": patterns,
-            "scam_explanation": explanation,
-            "recipient_profile": {
-                "address": recipient,
-                "transaction_count": tx_count,
-                "wallet_age_days": wallet_age,
-                "balance_eth": balance
-            }
+            **assessment,
+            "scam_explanation": self.risk_engine.get_scam_explanation(assessment["patterns_detected"]),
+            "analysis_tier": "rules"
         }
     
-    def _fallback_analysis(self, recipient: str, amount: float) -> Dict:
+    def _agent_result(self, assessment: Dict, verdict: Dict) -> Dict:
+        """
+        Merge the agent's verdict into the rule verdict.
+        The score comes from the rules, moved at most max_score_adjustment
+        points by the agent; level, delay and action follow the final score.
+        """
+        adjustment = verdict.get("score_adjustment", 0)
+        assessment = self.risk_engine.adjust_score(
+            assessment, adjustment, f"AI review adjusted risk score by {adjustment:+d}"
+        )
+        return {
+            **assessment,
+            "scam_explanation": verdict["scam_explanation"],
+            "analysis_tier": "agent"
+        }
+    
+    def _parse_agent_output(self, output: str) -> Optional[Dict]:
+        """Extract scam_explanation from the ReAct agent's final JSON answer (None if unusable)"""
+        explanation = None
+        start, end = output.find("{"), output.rfind("}")
+        if start != -1 and end > start:
+            try:
+                answer = json.loads(output[start:end + 1])
+                explanation = answer.get("scam_explanation") or None
+            except (ValueError, AttributeError):
+                pass
+        
+        if not isinstance(explanation, str):
+            return None
+        return {"score_adjustment": 0, "scam_explanation": explanation}
+    
+    def _fallback_analysis(self, assessment: Dict) -> Dict:
         """Fallback rule-based analysis if agent fails"""
-        profile = self.blockchain.get_wallet_profile(recipient)
-        return self._parse_agent_output("", recipient)
+        record_fallback("agent_rules")
+        return self._rule_result(assessment)
 
-# Singleton instance
+# Singleton instances
 _fraud_agent = None
+_fraud_agent_lock = threading.Lock()
+_verdict_cache = None
+_verdict_cache_lock = threading.Lock()
+
+def get_verdict_cache():
+    """Get or create the cache of agent explanations"""
+    global _verdict_cache
+    if _verdict_cache is None:
+        with _verdict_cache_lock:
+            if _verdict_cache is None:
+                _verdict_cache = create_cache(
+                    "agent_verdicts",
+                    max_size=int(os.getenv("AGENT_CACHE_SIZE", 5000)),
+                    ttl_seconds=float(os.getenv("AGENT_CACHE_TTL_SECONDS", 600))
+                )
+                register_cache("agent_verdicts", _verdict_cache)
+    return _verdict_cache
 
 def get_fraud_agent() -> FraudDetectionAgent:
     """Get or create fraud detection agent"""
     global _fraud_agent
     if _fraud_agent is None:
-        _fraud_agent = FraudDetectionAgent()
+        with _fraud_agent_lock:
+            if _fraud_agent is None:
+                _fraud_agent = FraudDetectionAgent()
     return _fraud_agent
@@ -0,0 +1,136 @@
+"""
+LLM Scheduler - Rate-limit-aware provider selection
+Token buckets per provider (e.g. Gemini free tier: 15 RPM), deadline-bound
+queueing, spill-over to the next provider and rule-only degradation
+"""
+from typing import Any, List, Optional, Tuple
+import threading
+import time
+
+class TokenBucket:
+    """
+    Requests-per-minute budget. Tokens may be reserved ahead of time: a
+    reservation that can't be served now is given the time at which its
+    token will be available, so waiters are served in FIFO order without
+    an explicit queue.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: Optional[float] = None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, requests_per_minute / 4)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def wait_time(self) -> float:
+        """Seconds until the next reservation would be served"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            return max(wait, self.blocked_until - now)
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        """Take a token if it is available within max_wait seconds; returns the wait, or None"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            wait = max(wait, self.blocked_until - now)
+            if wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def block_for(self, seconds: float) -> None:
+        """Provider reported rate limiting (HTTP 429): no reservations for a while"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class LLMProvider:
+    """A chat model with its request budget (requests_per_minute=None: unlimited)"""
+
+    def __init__(self, name: str, llm: Any, requests_per_minute: Optional[float] = None, burst: Optional[float] = None):
+        self.name = name
+        self.llm = llm
+        self.bucket = TokenBucket(requests_per_minute, burst) if requests_per_minute else None
+        self.requests = 0
+        self.rate_limited = 0
+
+    def reserve(self, max_wait: float) -> Optional[float]:
+        if self.bucket is None:
+            return 0.0
+        return self.bucket.reserve(max_wait)
+
+    def wait_time(self) -> float:
+        return self.bucket.wait_time() if self.bucket is not None else 0.0
+
+
+class LLMScheduler:
+    """
+    Picks the provider for each LLM call, in priority order:
+    1. the first provider with budget available right now
+    2. otherwise the provider whose next token comes soonest, if that is
+       before the caller's deadline (the caller waits for it)
+    3. otherwise None - the caller should answer with rules only
+    """
+
+    RATE_LIMIT_COOLDOWN_SECONDS = 30.0
+
+    def __init__(self, providers: List[LLMProvider]):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        self.providers = providers
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def acquire(self, max_wait: float, exclude: Tuple[str, ...] = ()) -> Optional[Tuple[LLMProvider, float]]:
+        """Reserve a call slot: (provider, seconds to wait before calling), or None if no budget in time"""
+        candidates = [p for p in self.providers if p.name not in exclude]
+        with self._lock:
+            for provider in candidates:
+                if provider.reserve(0.0) is not None:
+                    provider.requests += 1
+                    return provider, 0.0
+
+            waits = sorted(((p.wait_time(), i, p) for i, p in enumerate(candidates)), key=lambda w: w[:2])
+            for wait, _, provider in waits:
+                if wait > max_wait:
+                    break
+                reserved = provider.reserve(max_wait)
+                if reserved is not None:
+                    provider.requests += 1
+                    return provider, reserved
+            self.rejected += 1
+            return None
+
+    def report_rate_limited(self, provider: LLMProvider) -> None:
+        provider.rate_limited += 1
+        if provider.bucket is not None:
+            provider.bucket.block_for(self.RATE_LIMIT_COOLDOWN_SECONDS)
+
+    @staticmethod
+    def is_rate_limit_error(error: Exception) -> bool:
+        text = f"{type(error).__name__} {error}".lower()
+        return any(marker in text for marker in ("ratelimit", "rate limit", "429", "resourceexhausted", "resource_exhausted"))
+
+    def stats(self) -> dict:
+        return {
+            "providers": [
+                {
+                    "name": p.name,
+                    "requests": p.requests,
+                    "rate_limited": p.rate_limited,
+                    "wait_seconds": round(p.wait_time(), 3)
+                }
+                for p in self.providers
+            ],
+            "rejected": self.rejected
+        }
@@ -4,23 +4,50 @@ Real blockchain integration for APP fraud prevention
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional, List
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Import our services
+# Import our services (the LLM provider SDKs load lazily, when the agent is built)
 try:
-    from fraud_agent import get_fraud_agent
-    from blockchain_service import get_blockchain_service
+    from fraud_agent import get_fraud_agent, get_verdict_cache
+    from blockchain_service import get_async_blockchain_service, get_blockchain_service, get_profile_cache
+    from risk_engine import RiskEngine, get_risk_engine
+    from chain_indexer import get_transfer_indexer
+    from vault_indexer import get_vault_indexer
+    from rpc_provider import get_endpoint_pool
+    from deadline import Deadline
+    from sender_features import get_sender_feature_store
+    from profile_prewarmer import get_profile_prewarmer
+    from chain_head import get_chain_head_tracker
     BLOCKCHAIN_AVAILABLE = True
 except Exception as e:
     print(f"⚠️ Blockchain services not available: {e}")
     BLOCKCHAIN_AVAILABLE = False
 
+# Metrics are served in every mode, including without the blockchain stack
+try:
+    from metrics import record_fallback, register_service_mode, render_metrics
+    METRICS_AVAILABLE = True
+except Exception as e:
+    print(f"⚠️ Metrics not available: {e}")
+    METRICS_AVAILABLE = False
+
+# Startup retries while the chain is unreachable (exponential backoff, capped)
+WARM_UP_RETRY_SECONDS = float(os.getenv("WARM_UP_RETRY_SECONDS", 1))
+WARM_UP_RETRY_MAX_SECONDS = float(os.getenv("WARM_UP_RETRY_MAX_SECONDS", 30))
+
+# Batch analysis limits
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 1000))
+BATCH_PROFILE_CONCURRENCY = int(os.getenv("BATCH_PROFILE_CONCURRENCY", 16))
+
 app = FastAPI(
     title="VETO Risk Engine API",
     description="AI-powered fraud detection for MNEE payments",
@@ -43,7 +70,8 @@ app.add_middleware(
 class TransferRequest(BaseModel):
     sender: str
     recipient: str
-    amount: float
+    amount: float = Field(gt=0, allow_inf_nan=False)
+    explain: bool = False  # Always run the AI agent for a natural-language explanation
 
 class RiskAssessment(BaseModel):
     risk_score: int
@@ -54,6 +82,18 @@ class RiskAssessment(BaseModel):
     patterns_detected: List[str]
     scam_explanation: str
     recipient_profile: dict
+    analysis_tier: str = "rules"  # "rules" or "agent"
+    stages_cut_short: List[str] = []  # Stages that ran out of time and fell back, e.g. "agent"
+
+class BatchItemResult(BaseModel):
+    index: int
+    assessment: Optional[RiskAssessment] = None
+    error: Optional[str] = None
+
+class BatchRiskAssessment(BaseModel):
+    results: List[BatchItemResult]
+    unique_recipients: int
+    stages_cut_short: List[str] = []  # "profile_fetch" if any recipient's fetch ran out of time
 
 class VaultStatusResponse(BaseModel):
     address: str
@@ -65,21 +105,114 @@ class VaultStatusResponse(BaseModel):
 # Startup Event
 # ============================================
 
+# Filled in by the background warm-up: rule-based verdicts are served as
+# soon as the chain connection is up, AI review once the agent is built
+_readiness = {"rules": False, "agent": False}
+_warm_up_task: Optional[asyncio.Task] = None
+
+async def _warm_up():
+    """
+    Connect to the chain and start indexers (retried with backoff until it
+    succeeds - verdicts are refused with 503 meanwhile), then build the AI agent
+    """
+    retry_in = WARM_UP_RETRY_SECONDS
+    while not await _start_rules():
+        print(f"⚠️ Retrying startup in {retry_in:.0f}s")
+        await asyncio.sleep(retry_in)
+        retry_in = min(retry_in * 2, WARM_UP_RETRY_MAX_SECONDS)
+    
+    try:
+        await asyncio.to_thread(get_fraud_agent)
+        _readiness["agent"] = True
+        print(f"✅ AI agent ready")
+    except Exception as e:
+        print(f"⚠️ AI agent unavailable, serving rule-based verdicts: {e}")
+
+async def _start_rules() -> bool:
+    """Everything rule-based verdicts need; False if the chain isn't reachable yet"""
+    try:
+        # Test blockchain connection
+        await asyncio.to_thread(get_blockchain_service)
+        blockchain = await get_async_blockchain_service()
+        await asyncio.to_thread(get_risk_engine)
+        
+        # Keep frequently analyzed recipients' profiles cached (opt-in)
+        prewarmer = get_profile_prewarmer()
+        if prewarmer is not None:
+            prewarmer.start(blockchain)
+        
+        # Background indexer for real Penny Drop detection (opt-in)
+        transfer_indexer = await asyncio.to_thread(get_transfer_indexer)
+        if transfer_indexer is not None:
+            transfer_indexer.start()
+        
+        # VetoVault event store behind /api/vault-status (opt-in)
+        vault_indexer = await asyncio.to_thread(get_vault_indexer)
+        if vault_indexer is not None:
+            vault_indexer.start()
+        _readiness["rules"] = True
+        print(f"✅ Backend started successfully")
+        print(f"✅ Connected to Ethereum network")
+        return True
+    except Exception as e:
+        print(f"⚠️ Warning: Could not connect to blockchain: {e}")
+        return False
+
 @app.on_event("startup")
 async def startup_event():
-    """Initialize services on startup"""
+    """Start services in the background so the API accepts traffic immediately"""
+    global _warm_up_task
     if BLOCKCHAIN_AVAILABLE:
-        try:
-            # Test blockchain connection
-            blockchain = get_blockchain_service()
-            print(f"✅ Backend started successfully")
-            print(f"✅ Connected to Ethereum network")
-        except Exception as e:
-            print(f"⚠️ Warning: Could not connect to blockchain: {e}")
-            print(f"⚠️ API will run in degraded mode")
+        _warm_up_task = asyncio.create_task(_warm_up())
     else:
         print(f"⚠️ Running without blockchain integration")
 
+@app.on_event("shutdown")
+def shutdown_event():
+    """Persist sender behavioral features (when a snapshot path is configured)"""
+    if BLOCKCHAIN_AVAILABLE:
+        get_sender_feature_store().stop()
+        prewarmer = get_profile_prewarmer()
+        if prewarmer is not None:
+            prewarmer.stop()
+
+async def wait_for_warm_up():
+    """Block until the background warm-up has finished (benchmarks, scripts)"""
+    if _warm_up_task is not None:
+        await _warm_up_task
+
+def _service_mode() -> str:
+    """
+    agent | rules | starting | degraded
+    Mock verdicts ("degraded") only without the blockchain stack at all; with
+    it, the service stays "starting" until the rules engine is up, so a
+    failed connection never turns into an INSTANT_SEND
+    """
+    if _readiness["agent"]:
+        return "agent"
+    if _readiness["rules"]:
+        return "rules"
+    if BLOCKCHAIN_AVAILABLE:
+        return "starting"
+    return "degraded"
+
+if METRICS_AVAILABLE:
+    register_service_mode(_service_mode)
+
+def _require_started():
+    if _service_mode() == "starting":
+        raise HTTPException(
+            status_code=503,
+            detail="Service is starting up",
+            headers={"Retry-After": "1"}
+        )
+
+def _require_valid_recipient(request: "TransferRequest"):
+    """Reject a recipient that isn't an address (400), with the error a batch item gets"""
+    error = RiskEngine.invalid_recipient_error(request.recipient)
+    if error is not None:
+        raise HTTPException(status_code=400, detail=error)
+
 # ============================================
 # API Routes
 # ============================================
@@ -94,9 +227,29 @@ def read_root():
         "blockchain_enabled": BLOCKCHAIN_AVAILABLE
     }
 
+@app.get("/health/live")
+def liveness():
+    """Liveness probe: the process is up and serving HTTP"""
+    return {"status": "alive"}
+
+@app.get("/health/ready")
+def readiness():
+    """
+    Readiness probe: 200 once verdicts can be served
+    (mode "rules" while the AI agent is still initializing, then "agent")
+    """
+    mode = _service_mode()
+    if mode in ("agent", "rules"):
+        return {"status": "ready", "mode": mode}
+    return JSONResponse(status_code=503, content={"status": "not_ready", "mode": mode})
+
 @app.get("/health")
-def health_check():
-    """Detailed health check"""
+async def health_check():
+    """
+    Detailed health check
+    Reads the chain head tracker (no RPC calls); degraded once the head
+    hasn't been refreshed for CHAIN_HEAD_STALE_SECONDS
+    """
     if not BLOCKCHAIN_AVAILABLE:
         return {
             "status": "degraded",
@@ -105,15 +258,12 @@ def health_check():
         }
     
     try:
-        blockchain = get_blockchain_service()
-        chain_id = blockchain.w3.eth.chain_id
-        block_number = blockchain.w3.eth.block_number
+        head = (await asyncio.to_thread(get_chain_head_tracker)).status()
         
         return {
-            "status": "healthy",
-            "blockchain_connected": True,
-            "chain_id": chain_id,
-            "latest_block": block_number
+            "status": "degraded" if head["stale"] else "healthy",
+            "blockchain_connected": not head["stale"],
+            **head
         }
     except Exception as e:
         return {
@@ -123,34 +273,170 @@ def health_check():
         }
 
 @app.post("/api/analyze-transfer", response_model=RiskAssessment)
-def analyze_transfer(request: TransferRequest):
+async def analyze_transfer(request: TransferRequest):
     """
-    Analyze a proposed transfer for fraud risk using AI Agent
+    Analyze a proposed transfer for fraud risk
+    Rules decide clear-cut cases instantly; the AI agent handles ambiguous ones
+    Bounded by REQUEST_DEADLINE_SECONDS; stages that ran out of time are
+    listed in stages_cut_short. A recipient that isn't an address is a 400
     """
-    if not BLOCKCHAIN_AVAILABLE:
+    _require_started()
+    mode = _service_mode()
+    if mode == "degraded":
         # Fallback to mock analysis
         return _mock_analysis(request)
+    _require_valid_recipient(request)
     
+    deadline = Deadline.start()
     try:
-        # Get AI fraud detection agent
-        agent = get_fraud_agent()
+        if mode == "rules":
+            # AI agent still initializing - rules alone
+            return await _rule_only_analysis(request, deadline)
         
         # Perform AI-powered analysis
-        assessment = agent.analyze_transaction(
+        assessment = await get_fraud_agent().analyze_transaction_async(
             sender=request.sender,
             recipient=request.recipient,
-            amount=request.amount
+            amount=request.amount,
+            explain=request.explain,
+            deadline=deadline
         )
         
-        return assessment
+        return {**assessment, "stages_cut_short": deadline.cut_short}
         
     except Exception as e:
         print(f"Error in AI agent analysis: {e}")
         # Fallback to mock
         return _mock_analysis(request)
 
+async def _rule_only_analysis(request: TransferRequest, deadline: "Deadline") -> dict:
+    """Rule verdict with the canned explanation (no AI agent needed)"""
+    engine = get_risk_engine()
+    assessment = await engine.analyze_transfer_async(request.sender, request.recipient, request.amount, deadline)
+    return {
+        **assessment,
+        "scam_explanation": engine.get_scam_explanation(assessment["patterns_detected"]),
+        "analysis_tier": "rules",
+        "stages_cut_short": deadline.cut_short
+    }
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/api/analyze-transfer/stream")
+async def analyze_transfer_stream(request: TransferRequest):
+    """
+    Server-Sent Events variant of /api/analyze-transfer
+    Emits the rule verdict first, then the AI explanation as it is generated:
+    event: verdict      (score, level, vault delay - enough to decide)
+    event: explanation  ({"delta": "..."} text chunks, ambiguous cases only)
+    event: done         (final assessment)
+    """
+    _require_started()
+    mode = _service_mode()
+    if mode != "degraded":
+        _require_valid_recipient(request)
+    
+    async def events():
+        if mode == "degraded":
+            mock = _mock_analysis(request).model_dump()
+            yield _sse("verdict", mock)
+            yield _sse("done", mock)
+            return
+        
+        verdict_sent = False
+        deadline = Deadline.start()
+        try:
+            if mode == "rules":
+                result = await _rule_only_analysis(request, deadline)
+                verdict_sent = True
+                yield _sse("verdict", result)
+                yield _sse("done", result)
+                return
+            
+            async for event, data in get_fraud_agent().stream_transaction(
+                sender=request.sender,
+                recipient=request.recipient,
+                amount=request.amount,
+                explain=request.explain,
+                deadline=deadline
+            ):
+                verdict_sent = verdict_sent or event == "verdict"
+                if event == "done":
+                    data = {**data, "stages_cut_short": deadline.cut_short}
+                yield _sse(event, data)
+        except Exception as e:
+            print(f"Error in streaming analysis: {e}")
+            if not verdict_sent:
+                mock = _mock_analysis(request).model_dump()
+                yield _sse("verdict", mock)
+                yield _sse("done", mock)
+            else:
+                yield _sse("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/api/analyze-transfers", response_model=BatchRiskAssessment)
+async def analyze_transfers(requests: List[TransferRequest]):
+    """
+    Analyze many transfers at once (payroll, airdrops)
+    Uses the same rules as /api/analyze-transfer; the AI agent is not run per item
+    Profile fetches share one REQUEST_DEADLINE_SECONDS budget; recipients
+    that ran out of time, or aren't addresses, get a per-item error
+    """
+    if len(requests) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(requests)} transfers (max {MAX_BATCH_SIZE})"
+        )
+    
+    _require_started()
+    unique_recipients = len({r.recipient.lower() for r in requests})
+    
+    if _service_mode() == "degraded":
+        return BatchRiskAssessment(
+            results=[BatchItemResult(index=i, assessment=_mock_analysis(r)) for i, r in enumerate(requests)],
+            unique_recipients=unique_recipients
+        )
+    
+    deadline = Deadline.start()
+    try:
+        engine = get_risk_engine()
+        outcomes = await engine.analyze_transfers_async(
+            [(r.sender, r.recipient, r.amount) for r in requests],
+            max_concurrency=BATCH_PROFILE_CONCURRENCY,
+            deadline=deadline
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to analyze transfers: {str(e)}"
+        )
+    
+    results = []
+    for i, outcome in enumerate(outcomes):
+        assessment = outcome["assessment"]
+        if assessment is not None:
+            assessment = RiskAssessment(
+                **assessment,
+                scam_explanation=engine.get_scam_explanation(assessment["patterns_detected"])
+            )
+        results.append(BatchItemResult(index=i, assessment=assessment, error=outcome["error"]))
+    
+    return BatchRiskAssessment(
+        results=results,
+        unique_recipients=unique_recipients,
+        stages_cut_short=deadline.cut_short
+    )
+
 def _mock_analysis(request: TransferRequest) -> RiskAssessment:
     """Fallback mock analysis when blockchain not available"""
+    if METRICS_AVAILABLE:
+        record_fallback("mock_analysis")
     score = 0
     reasons = []
     patterns = []
@@ -183,16 +469,24 @@ def _mock_analysis(request: TransferRequest) -> RiskAssessment:
 def get_vault_status(address: str):
     """
     Get vault protection status for an address
-    This would query the VetoVault contract in production
+    Served from the VetoVault event index (zeros when the indexer is disabled)
     """
     try:
-        # For now, return mock data
-        # In production, query VetoVault contract for active deposits
+        vault_indexer = get_vault_indexer() if BLOCKCHAIN_AVAILABLE else None
+        if vault_indexer is None:
+            return VaultStatusResponse(
+                address=address,
+                total_protected_usd=0.0,
+                scams_prevented=0,
+                active_locks=0
+            )
+        
+        stats = vault_indexer.get_user_stats(address)
         return VaultStatusResponse(
             address=address,
-            total_protected_usd=0.0,
-            scams_prevented=0,
-            active_locks=0
+            total_protected_usd=stats["total_protected"],  # MNEE is USD-pegged
+            scams_prevented=stats["scams_prevented"],
+            active_locks=stats["active_locks"]
         )
     except Exception as e:
         raise HTTPException(
@@ -200,8 +494,92 @@ def get_vault_status(address: str):
             detail=f"Failed to get vault status: {str(e)}"
         )
 
+@app.get("/metrics")
+def metrics():
+    """
+    Prometheus metrics: RPC, stage, LLM and tool latency histograms,
+    token counts, cache hit rates, fallback counts and the service mode
+    (served in degraded mode too)
+    """
+    if not METRICS_AVAILABLE:
+        raise HTTPException(
+            status_code=503,
+            detail="Metrics not available"
+        )
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/api/cache-stats")
+def get_cache_stats():
+    """
+    Wallet profile and agent verdict cache counters (hits, misses, evictions)
+    """
+    if not BLOCKCHAIN_AVAILABLE:
+        raise HTTPException(
+            status_code=503,
+            detail="Blockchain services not available"
+        )
+    
+    try:
+        graph = get_risk_engine().transfer_graph
+        prewarmer = get_profile_prewarmer()
+        return {
+            "profiles": get_profile_cache().stats(),
+            "agent_verdicts": get_verdict_cache().stats(),
+            "sender_features": get_sender_feature_store().stats(),
+            "address_lists": get_risk_engine().screening_lists.stats(),
+            "transfer_graph": graph.stats() if graph is not None else None,
+            "prewarmer": prewarmer.stats() if prewarmer is not None else None
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get cache stats: {str(e)}"
+        )
+
+@app.get("/api/rpc-stats")
+def get_rpc_stats():
+    """
+    Per-endpoint RPC latency, error counts and circuit-breaker state
+    """
+    if not BLOCKCHAIN_AVAILABLE:
+        raise HTTPException(
+            status_code=503,
+            detail="Blockchain services not available"
+        )
+    
+    try:
+        return {
+            "endpoints": get_endpoint_pool().stats(),
+            "chain_head": get_chain_head_tracker().stats()
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get RPC stats: {str(e)}"
+        )
+
+@app.get("/api/llm-stats")
+def get_llm_stats():
+    """
+    Per-provider LLM request counts, rate limiting and queue wait
+    """
+    if not _readiness["agent"]:
+        raise HTTPException(
+            status_code=503,
+            detail="AI agent not available"
+        )
+    
+    try:
+        return get_fraud_agent().scheduler.stats()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get LLM stats: {str(e)}"
+        )
+
 @app.get("/api/wallet-profile/{address}")
-def get_wallet_profile(address: str):
+async def get_wallet_profile(address: str):
     """
     Get detailed wallet profile for risk analysis
     """
@@ -212,8 +590,8 @@ def get_wallet_profile(address: str):
         )
     
     try:
-        blockchain = get_blockchain_service()
-        profile = blockchain.get_wallet_profile(address)
+        blockchain = await get_async_blockchain_service()
+        profile = await blockchain.get_wallet_profile(address)
         return profile
     except Exception as e:
         raise HTTPException(
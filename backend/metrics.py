@@ -0,0 +1,204 @@
+"""
+Metrics - Latency spans and Prometheus instrumentation
+Histograms for RPC calls, pipeline stages, LLM calls and agent tools,
+plus cache and fallback counters, served at /metrics
+"""
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from uuid import UUID
+import time
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+RPC_LATENCY = Histogram(
+    "veto_rpc_request_seconds", "JSON-RPC request latency", ["method", "outcome"], buckets=LATENCY_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "veto_stage_seconds", "Latency of analysis pipeline stages", ["stage"], buckets=LATENCY_BUCKETS
+)
+LLM_LATENCY = Histogram(
+    "veto_llm_request_seconds", "LLM call latency", ["model", "outcome"], buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Counter("veto_llm_tokens_total", "LLM tokens used", ["model", "kind"])
+TOOL_LATENCY = Histogram(
+    "veto_agent_tool_seconds", "Agent tool invocation latency", ["tool", "outcome"], buckets=LATENCY_BUCKETS
+)
+AGENT_ITERATIONS = Counter("veto_agent_iterations_total", "ReAct agent Thought/Action iterations")
+FALLBACKS = Counter("veto_fallbacks_total", "Degraded-path executions", ["path"])
+LIST_HITS = Counter("veto_address_list_hits_total", "Recipients decided by the scam or allow list", ["list"])
+
+# ============================================
+# Spans
+# ============================================
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a pipeline stage (works in sync and async code)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+def observe_rpc(method: str, seconds: float, ok: bool) -> None:
+    RPC_LATENCY.labels(method, "ok" if ok else "error").observe(seconds)
+
+def record_fallback(path: str) -> None:
+    """Count one use of a degraded path (agent error, mock analysis, sequential RPC...)"""
+    FALLBACKS.labels(path).inc()
+
+def record_list_hit(name: str) -> None:
+    LIST_HITS.labels(name).inc()
+
+# ============================================
+# LangChain callbacks
+# ============================================
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records LLM latency and token usage, tool latency and agent iterations"""
+
+    def __init__(self):
+        self._started: Dict[UUID, tuple] = {}
+
+    def _start(self, run_id: UUID, label: str) -> None:
+        self._started[run_id] = (time.perf_counter(), label)
+
+    def _finish(self, run_id: UUID):
+        start, label = self._started.pop(run_id, (None, "unknown"))
+        return (time.perf_counter() - start if start is not None else None), label
+
+    @staticmethod
+    def _model_name(serialized: Optional[Dict], kwargs: Dict) -> str:
+        params = kwargs.get("invocation_params") or {}
+        name = params.get("model") or params.get("model_name")
+        if not name and serialized:
+            name = (serialized.get("kwargs") or {}).get("model") or serialized.get("name")
+        return str(name or "unknown")
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id, self._model_name(serialized, kwargs))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id, self._model_name(serialized, kwargs))
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        seconds, model = self._finish(run_id)
+        if seconds is not None:
+            LLM_LATENCY.labels(model, "ok").observe(seconds)
+        for kind, count in self._token_usage(response).items():
+            LLM_TOKENS.labels(model, kind).inc(count)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        seconds, model = self._finish(run_id)
+        if seconds is not None:
+            LLM_LATENCY.labels(model, "error").observe(seconds)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs) -> None:
+        self._start(run_id, (serialized or {}).get("name", "unknown"))
+
+    def on_tool_end(self, output, *, run_id, **kwargs) -> None:
+        seconds, tool = self._finish(run_id)
+        if seconds is not None:
+            TOOL_LATENCY.labels(tool, "ok").observe(seconds)
+
+    def on_tool_error(self, error, *, run_id, **kwargs) -> None:
+        seconds, tool = self._finish(run_id)
+        if seconds is not None:
+            TOOL_LATENCY.labels(tool, "error").observe(seconds)
+
+    def on_agent_action(self, action, *, run_id, **kwargs) -> None:
+        AGENT_ITERATIONS.inc()
+
+    @staticmethod
+    def _token_usage(response) -> Dict[str, int]:
+        """Prompt/completion tokens from usage_metadata or provider llm_output"""
+        usage: Dict[str, int] = {}
+        for generations in response.generations:
+            for generation in generations:
+                metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if metadata:
+                    usage["prompt"] = usage.get("prompt", 0) + metadata.get("input_tokens", 0)
+                    usage["completion"] = usage.get("completion", 0) + metadata.get("output_tokens", 0)
+        if not usage and response.llm_output:
+            token_usage = response.llm_output.get("token_usage") or {}
+            if token_usage:
+                usage["prompt"] = token_usage.get("prompt_tokens", 0)
+                usage["completion"] = token_usage.get("completion_tokens", 0)
+        return usage
+
+# ============================================
+# Cache collector
+# ============================================
+
+class CacheStatsCollector:
+    """Exports TTLCache.stats() of the registered caches at scrape time"""
+
+    def __init__(self):
+        self.caches: Dict[str, Any] = {}
+
+    def collect(self):
+        hits = CounterMetricFamily("veto_cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("veto_cache_misses", "Cache misses", labels=["cache"])
+        evictions = CounterMetricFamily("veto_cache_evictions", "Cache LRU evictions", labels=["cache"])
+        size = GaugeMetricFamily("veto_cache_size", "Cache entries", labels=["cache"])
+        hit_rate = GaugeMetricFamily("veto_cache_hit_rate", "Cache hit rate since start", labels=["cache"])
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            evictions.add_metric([name], stats["evictions"])
+            size.add_metric([name], stats["size"])
+            hit_rate.add_metric([name], stats["hit_rate"])
+        return [hits, misses, evictions, size, hit_rate]
+
+_cache_collector = CacheStatsCollector()
+REGISTRY.register(_cache_collector)
+
+def register_cache(name: str, cache) -> None:
+    """Expose a cache's counters on /metrics"""
+    _cache_collector.caches[name] = cache
+
+# ============================================
+# Service mode
+# ============================================
+
+SERVICE_MODES = ("agent", "rules", "starting", "degraded")
+
+class ServiceModeCollector:
+    """Exports the API's service mode at scrape time: 1 for the current mode, 0 for the others"""
+
+    def __init__(self):
+        self.mode: Optional[Callable[[], str]] = None
+
+    def collect(self):
+        if self.mode is None:
+            return []
+        current = self.mode()
+        gauge = GaugeMetricFamily("veto_service_mode", "Current service mode", labels=["mode"])
+        for mode in SERVICE_MODES:
+            gauge.add_metric([mode], 1 if mode == current else 0)
+        return [gauge]
+
+_service_mode_collector = ServiceModeCollector()
+REGISTRY.register(_service_mode_collector)
+
+def register_service_mode(mode: Callable[[], str]) -> None:
+    """Expose the service mode (agent | rules | starting | degraded) on /metrics"""
+    _service_mode_collector.mode = mode
+
+# Singleton instance
+_callback_handler: Optional[MetricsCallbackHandler] = None
+
+def get_callback_handler() -> MetricsCallbackHandler:
+    global _callback_handler
+    if _callback_handler is None:
+        _callback_handler = MetricsCallbackHandler()
+    return _callback_handler
+
+def render_metrics() -> tuple:
+    """(body, content_type) for the /metrics endpoint"""
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,223 @@
+"""
+Profile Prewarmer - Keeps hot recipients' profiles cached
+Counts analyzed recipients in a count-min sketch, follows new blocks and
+refreshes the cached profiles of hot recipients they touch, so repeat
+recipients (merchants, exchanges) are served from the cache
+"""
+from typing import Dict, List, Optional, Set, Tuple
+import asyncio
+import heapq
+import os
+import threading
+
+import numpy as np
+
+from address_lists import address_bytes
+
+class CountMinSketch:
+    """
+    Approximate per-address counts in fixed memory (depth x width
+    counters; estimates never undercount). decay() halves every counter so
+    the counts favour recent activity.
+    """
+
+    def __init__(self, width: int = 8192, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self._table = np.zeros((depth, width), dtype=np.uint32)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: bytes) -> np.ndarray:
+        # Addresses are uniformly distributed: double hashing on their bytes
+        h1 = int.from_bytes(key[0:8], "big")
+        h2 = int.from_bytes(key[8:16], "big") | 1
+        return np.array([(h1 + i * h2) % self.width for i in range(self.depth)])
+
+    def add(self, key: bytes) -> int:
+        """Count one occurrence and return the new estimate"""
+        columns = self._columns(key)
+        self._table[self._rows, columns] += 1
+        return int(self._table[self._rows, columns].min())
+
+    def estimate(self, key: bytes) -> int:
+        return int(self._table[self._rows, self._columns(key)].min())
+
+    def decay(self) -> None:
+        self._table >>= 1
+
+
+class ProfilePrewarmer:
+    """
+    Tracks the most frequently analyzed recipients (up to max_hot with at
+    least min_count recent analyses) and, every poll_interval seconds,
+    refetches the profiles of hot recipients that appeared in new blocks.
+    At most `concurrency` refreshes run at once. Counts are halved every
+    decay_every recorded analyses.
+    """
+
+    def __init__(
+        self,
+        max_hot: int = 1000,
+        min_count: int = 3,
+        concurrency: int = 8,
+        poll_interval: float = 4.0,
+        decay_every: int = 10000,
+        sketch_width: int = 8192
+    ):
+        self.max_hot = max_hot
+        self.min_count = min_count
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.decay_every = decay_every
+        self.sketch = CountMinSketch(width=sketch_width)
+        # Hot recipients (lowercased) -> estimated recent count, and a
+        # min-heap of (count, address) to find the coldest one. Entries go
+        # stale when a count changes; they are skipped when popped.
+        self._hot: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+        self._recorded_since_decay = 0
+        self._task: Optional[asyncio.Task] = None
+        self.blockchain = None
+
+        # Counters
+        self.recorded = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.blocks_followed = 0
+
+    def record(self, recipient: str) -> None:
+        """Count an analyzed recipient (called on every analysis)"""
+        key = address_bytes(recipient)
+        if key is None:
+            return
+        with self._lock:
+            self.recorded += 1
+            self._recorded_since_decay += 1
+            if self._recorded_since_decay >= self.decay_every:
+                self._decay()
+
+            count = self.sketch.add(key)
+            address = recipient.lower()
+            if address not in self._hot:
+                if count < self.min_count:
+                    return
+                if len(self._hot) >= self.max_hot:
+                    # Replace the coldest hot recipient, if this one is hotter
+                    coldest_count, coldest = self._coldest()
+                    if coldest_count >= count:
+                        return
+                    heapq.heappop(self._heap)
+                    del self._hot[coldest]
+            self._hot[address] = count
+            heapq.heappush(self._heap, (count, address))
+            if len(self._heap) > 4 * max(self.max_hot, 1):
+                self._rebuild_heap()
+
+    def _coldest(self) -> Tuple[int, str]:
+        """Heap top after dropping stale entries"""
+        while True:
+            count, address = self._heap[0]
+            if self._hot.get(address) == count:
+                return count, address
+            heapq.heappop(self._heap)
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(count, address) for address, count in self._hot.items()]
+        heapq.heapify(self._heap)
+
+    def _decay(self) -> None:
+        self.sketch.decay()
+        self._hot = {
+            address: count // 2 for address, count in self._hot.items()
+            if count // 2 >= self.min_count
+        }
+        self._rebuild_heap()
+        self._recorded_since_decay = 0
+
+    def hot_addresses(self) -> Set[str]:
+        with self._lock:
+            return set(self._hot)
+
+    # ============================================
+    # Block follower
+    # ============================================
+
+    def start(self, blockchain) -> None:
+        """Follow new blocks with an AsyncBlockchainService (call from the event loop)"""
+        if self._task is not None and not self._task.done():
+            return
+        self.blockchain = blockchain
+        self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        while True:
+            try:
+                await self.follow_once(semaphore)
+            except Exception as e:
+                print(f"⚠️ Profile prewarm failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def follow_once(self, semaphore: Optional[asyncio.Semaphore] = None) -> int:
+        """
+        Scan blocks since the last call and refresh hot recipients they
+        touched. Returns the refresh count. With no hot recipients nothing
+        is downloaded; the next scan picks up from there (or refreshes every
+        hot recipient if too many blocks passed).
+        """
+        hot = self.hot_addresses()
+        if not hot:
+            return 0
+        scanned, touched = await self.blockchain.scan_new_blocks()
+        self.blocks_followed += scanned
+        if scanned == 0:
+            return 0
+        # touched is None when too many blocks passed to scan them all
+        if touched is not None:
+            hot &= {address.lower() for address in touched}
+        semaphore = semaphore or asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._refresh(address, semaphore) for address in hot))
+        return len(hot)
+
+    async def _refresh(self, address: str, semaphore: asyncio.Semaphore) -> None:
+        async with semaphore:
+            profile = await self.blockchain.get_wallet_profile(address, use_cache=False)
+        if "error" in profile:
+            self.refresh_errors += 1
+        else:
+            self.refreshes += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hot = len(self._hot)
+        return {
+            "hot_recipients": hot,
+            "max_hot": self.max_hot,
+            "recorded": self.recorded,
+            "blocks_followed": self.blocks_followed,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors
+        }
+
+# Singleton instance
+_profile_prewarmer: Optional[ProfilePrewarmer] = None
+_profile_prewarmer_lock = threading.Lock()
+
+def get_profile_prewarmer() -> Optional[ProfilePrewarmer]:
+    """Get or create the profile prewarmer (None unless PROFILE_PREWARM_ENABLED=true)"""
+    global _profile_prewarmer
+    if _profile_prewarmer is None and os.getenv("PROFILE_PREWARM_ENABLED", "false").lower() == "true":
+        with _profile_prewarmer_lock:
+            if _profile_prewarmer is None:
+                _profile_prewarmer = ProfilePrewarmer(
+                    max_hot=int(os.getenv("PREWARM_MAX_HOT", 1000)),
+                    min_count=int(os.getenv("PREWARM_MIN_COUNT", 3)),
+                    concurrency=int(os.getenv("PREWARM_CONCURRENCY", 8)),
+                    poll_interval=float(os.getenv("PREWARM_POLL_SECONDS", 4))
+                )
+    return _profile_prewarmer
@@ -2,8 +2,17 @@
 AI Risk Engine - Scam Pattern Detection
 Analyzes transactions and assigns risk scores
 """
-from typing import Dict, List
-from blockchain_service import get_blockchain_service
+from typing import Dict, List, Optional, Sequence, Tuple
+import asyncio
+import threading
+from web3 import Web3
+from blockchain_service import get_async_blockchain_service, get_blockchain_service
+from deadline import Deadline
+from sender_features import get_sender_feature_store
+from address_lists import get_screening_lists
+from chain_indexer import get_transfer_indexer
+from profile_prewarmer import get_profile_prewarmer
+from metrics import record_list_hit
 
 class RiskEngine:
     """
@@ -18,73 +27,260 @@ class RiskEngine:
     HIGH_RISK_DELAY = 14400  # 4 hours (Strict "Veto" Window)
     MEDIUM_RISK_DELAY = 3600  # 1 hour
     
+    # Pattern rules: thresholds (exclusive upper bounds) and score weights.
+    # Shared with the columnar scorer in batch_scoring.py.
+    FRESH_WALLET_TX = 5
+    LIMITED_HISTORY_TX = 20
+    NEW_WALLET_DAYS = 7
+    RECENT_WALLET_DAYS = 30
+    
+    FRESH_WALLET_SCORE = 35
+    LIMITED_HISTORY_SCORE = 20
+    PENNY_DROP_SCORE = 75  # Critical Red Flag
+    NEW_WALLET_SCORE = 25
+    RECENT_WALLET_SCORE = 10
+    CONTRACT_SCORE = 15
+    ZERO_BALANCE_SCORE = 20
+    
+    # Sender behavior rules (sender_features.SenderFeatureStore), applied
+    # when the sender's features are passed to assess_profile
+    HIGH_VELOCITY_SENDS = 10  # decayed sends in the rate window
+    AMOUNT_ANOMALY_ZSCORE = 3.0
+    AMOUNT_ANOMALY_MIN_HISTORY = 5  # prior transfers before amounts are judged
+    RECIPIENT_BURST_COUNT = 5  # distinct new recipients in the window
+    
+    HIGH_VELOCITY_SCORE = 15
+    AMOUNT_ANOMALY_SCORE = 25
+    RECIPIENT_BURST_SCORE = 20
+    SENDER_PATTERNS = ("HIGH_VELOCITY", "AMOUNT_ANOMALY", "RECIPIENT_BURST")
+    
+    # Recipients on the scam list (address_lists.ScreeningLists)
+    KNOWN_SCAM_SCORE = 100
+    
+    # Proximity to scam-list wallets in the local transfer graph
+    # (transfer_graph.TransferGraph), applied when the graph is enabled
+    SCAM_NEIGHBOR_SCORE = 40  # transacted directly with a listed scam wallet
+    SCAM_PROXIMITY_SCORE = 20  # two hops away
+    
     def __init__(self):
         self.blockchain = get_blockchain_service()
+        self.sender_features = get_sender_feature_store()
+        self.screening_lists = get_screening_lists()
+        indexer = get_transfer_indexer()
+        self.transfer_index = indexer
+        self.transfer_graph = indexer.graph if indexer is not None else None
+        self.prewarmer = get_profile_prewarmer()
     
-    def analyze_transfer(self, sender: str, recipient: str, amount: float) -> Dict:
+    def analyze_transfer(self, sender: str, recipient: str, amount: float, deadline: Optional[Deadline] = None) -> Dict:
         """
         Main analysis function
         Returns risk assessment with score, level, and reasons
+        Recipients on the scam or allow list are decided without fetching a profile.
+        """
+        sender_features = self.observe_sender(sender, recipient, amount)
+        listed = self.screen_recipient(recipient)
+        if listed is not None:
+            return listed
+        # Get recipient wallet profile
+        recipient_profile = self.blockchain.get_wallet_profile(
+            recipient, deadline=deadline.stage("profile_fetch") if deadline else None
+        )
+        return self.assess_profile(recipient, recipient_profile, sender_features, sender=sender)
+    
+    async def analyze_transfer_async(
+        self, sender: str, recipient: str, amount: float, deadline: Optional[Deadline] = None
+    ) -> Dict:
+        """Same as analyze_transfer, without blocking the event loop on RPC"""
+        sender_features = self.observe_sender(sender, recipient, amount)
+        listed = self.screen_recipient(recipient)
+        if listed is not None:
+            return listed
+        blockchain = await get_async_blockchain_service()
+        recipient_profile = await blockchain.get_wallet_profile(
+            recipient, deadline=deadline.stage("profile_fetch") if deadline else None
+        )
+        return self.assess_profile(recipient, recipient_profile, sender_features, sender=sender)
+    
+    @staticmethod
+    def invalid_recipient_error(recipient: str) -> Optional[str]:
+        """Why a recipient can't be analyzed (not an address), or None - same message for single and batch requests"""
+        try:
+            Web3.to_checksum_address(recipient)
+            return None
+        except Exception as e:
+            return f"Invalid recipient address: {e}"
+    
+    async def analyze_transfers_async(
+        self,
+        transfers: Sequence[Tuple[str, str, float]],
+        max_concurrency: int = 16,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict]:
+        """
+        Score many (sender, recipient, amount) transfers at once.
+        
+        Recipients are deduplicated, their profiles fetched concurrently
+        (at most max_concurrency in flight), and every transfer is scored
+        with assess_profile on the recipient profile alone. Batches are not
+        recorded as sender behavior (a payroll run would look like a drain).
+        With a deadline, each fetch gets the profile_fetch stage budget
+        (capped by what is left of the batch); fetches that run out come
+        back as per-transfer errors.
+        Returns one {"assessment": ..., "error": ...} dict per transfer, in order.
+        """
+        blockchain = await get_async_blockchain_service()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def fetch(address: str) -> Dict:
+            async with semaphore:
+                return await blockchain.get_wallet_profile(
+                    address, deadline=deadline.stage("profile_fetch") if deadline else None
+                )
+        
+        keys: List = []
+        unique: Dict[str, None] = {}
+        for _, recipient, _ in transfers:
+            error = self.invalid_recipient_error(recipient)
+            if error is not None:
+                keys.append(ValueError(error))
+                continue
+            key = Web3.to_checksum_address(recipient)
+            unique.setdefault(key, None)
+            keys.append(key)
+        
+        # Listed recipients are decided without a profile fetch
+        listed = {address: self.screening_lists.lookup(address) for address in unique}
+        to_fetch = [address for address in unique if listed[address] is None]
+        profiles = dict(zip(to_fetch, await asyncio.gather(*(fetch(address) for address in to_fetch))))
+        
+        results = []
+        for (sender, recipient, _), key in zip(transfers, keys):
+            if isinstance(key, Exception):
+                results.append({"assessment": None, "error": str(key)})
+                continue
+            if listed[key] is not None:
+                results.append({"assessment": self._listed_assessment(recipient, listed[key]), "error": None})
+                continue
+            profile = profiles[key]
+            if "error" in profile:
+                results.append({"assessment": None, "error": f"Failed to get wallet profile: {profile['error']}"})
+                continue
+            results.append({"assessment": self.assess_profile(recipient, profile, sender=sender), "error": None})
+        return results
+    
+    def screen_recipient(self, recipient: str) -> Optional[Dict]:
+        """
+        Verdict for a recipient on the scam list (HIGH) or allow list (LOW),
+        decided before any RPC. None if the recipient is on neither list.
+        """
+        name = self.screening_lists.lookup(recipient)
+        return self._listed_assessment(recipient, name) if name is not None else None
+    
+    def _listed_assessment(self, recipient: str, list_name: str) -> Dict:
+        record_list_hit(list_name)
+        if list_name == "scam":
+            score, reasons, patterns = self.KNOWN_SCAM_SCORE, ["CRITICAL: Recipient is a known scam address"], ["KNOWN_SCAM"]
+        else:
+            score, reasons, patterns = 0, ["Recipient is on the allow list"], []
+        risk_level, vault_delay, recommended_action = self.classify_score(score)
+        return {
+            "risk_score": score,
+            "risk_level": risk_level,
+            "vault_delay_seconds": vault_delay,
+            "recommended_action": recommended_action,
+            "reasons": reasons,
+            "patterns_detected": patterns,
+            "recipient_profile": {"address": recipient, "list": list_name}
+        }
+    
+    def observe_sender(self, sender: str, recipient: str, amount: float) -> Optional[Dict]:
+        """
+        Record the transfer in the sender's behavioral features and return
+        them (None for invalid addresses). The recipient also counts towards
+        profile prewarming.
+        """
+        if not (Web3.is_address(sender) and Web3.is_address(recipient)):
+            return None
+        if self.prewarmer is not None:
+            self.prewarmer.record(recipient)
+        return self.sender_features.observe(sender, recipient, amount)
+    
+    def assess_profile(
+        self,
+        recipient: str,
+        recipient_profile: Dict,
+        sender_features: Optional[Dict] = None,
+        sender: Optional[str] = None
+    ) -> Dict:
+        """
+        Score an already-fetched recipient profile (no RPC calls),
+        plus the sender's behavioral features when given (see observe_sender)
+        and the recipient's transfer-graph proximity when the graph is enabled.
+        The sender is needed for the indexed Penny Drop check.
         """
         score = 0
         reasons = []
         patterns_detected = []
         
-        # Get recipient wallet profile
-        recipient_profile = self.blockchain.get_wallet_profile(recipient)
-        
         # Pattern 1: Fresh Wallet Detection
         tx_count = recipient_profile.get("transaction_count", 0)
-        if tx_count < 5:
-            score += 35
+        if tx_count < self.FRESH_WALLET_TX:
+            score += self.FRESH_WALLET_SCORE
             reasons.append(f"Recipient is a fresh wallet ({tx_count} transactions)")
             patterns_detected.append("FRESH_WALLET")
-        elif tx_count < 20:
-            score += 20
+        elif tx_count < self.LIMITED_HISTORY_TX:
+            score += self.LIMITED_HISTORY_SCORE
             reasons.append(f"Recipient has limited history ({tx_count} transactions)")
         
         # Pattern 2: Penny Drop Detection
-        if recipient_profile.get("has_recent_small_tx", False):
-            score += 75  # Critical Red Flag
+        if self._is_penny_drop(sender, recipient, recipient_profile, tx_count):
+            score += self.PENNY_DROP_SCORE
             reasons.append("CRITICAL: Penny Drop pattern (small test tx) detected")
             patterns_detected.append("PENNY_DROP")
         
         # Pattern 3: Wallet Age Check
         wallet_age = recipient_profile.get("wallet_age_days", 0)
-        if wallet_age < 7:
-            score += 25
-            reasons.append(f"Very new wallet (created ~{wallet_age} days ago)")
+        age_note = ", estimated from activity" if recipient_profile.get("age_source") == "estimate" else ""
+        if wallet_age < self.NEW_WALLET_DAYS:
+            score += self.NEW_WALLET_SCORE
+            reasons.append(f"Very new wallet (created ~{wallet_age} days ago{age_note})")
             patterns_detected.append("NEW_WALLET")
-        elif wallet_age < 30:
-            score += 10
-            reasons.append(f"Recently created wallet (~{wallet_age} days ago)")
+        elif wallet_age < self.RECENT_WALLET_DAYS:
+            score += self.RECENT_WALLET_SCORE
+            reasons.append(f"Recently created wallet (~{wallet_age} days ago{age_note})")
         
         # Pattern 4: Contract Address Check
         if recipient_profile.get("is_contract", False):
-            score += 15
+            score += self.CONTRACT_SCORE
             reasons.append("Recipient is a smart contract (verify legitimacy)")
             patterns_detected.append("CONTRACT_RECIPIENT")
         
         # Pattern 5: Zero Balance Wallet
         balance = recipient_profile.get("balance_eth", 0)
         if balance == 0 and tx_count > 0:
-            score += 20
+            score += self.ZERO_BALANCE_SCORE
             reasons.append("Wallet has zero balance despite transaction history")
             patterns_detected.append("ZERO_BALANCE")
         
+        if sender_features is not None:
+            score += self._assess_sender(sender_features, reasons, patterns_detected)
+        
+        profile_summary = {
+            "address": recipient,
+            "transaction_count": tx_count,
+            "wallet_age_days": wallet_age,
+            "age_source": recipient_profile.get("age_source"),
+            "balance_eth": balance
+        }
+        
+        if self.transfer_graph is not None:
+            proximity = self.transfer_graph.proximity(recipient)
+            if proximity is not None:
+                score += self._assess_proximity(proximity, reasons, patterns_detected)
+                profile_summary.update(proximity)
+        
         # Determine risk level
-        if score >= self.HIGH_RISK_THRESHOLD:
-            risk_level = "HIGH"
-            vault_delay = self.HIGH_RISK_DELAY
-            recommended_action = "VAULT_LOCK"
-        elif score >= self.MEDIUM_RISK_THRESHOLD:
-            risk_level = "MEDIUM"
-            vault_delay = self.MEDIUM_RISK_DELAY
-            recommended_action = "VAULT_LOCK"
-        else:
-            risk_level = "LOW"
-            vault_delay = 0
-            recommended_action = "INSTANT_SEND"
+        risk_level, vault_delay, recommended_action = self.classify_score(score)
         
         return {
             "risk_score": score,
@@ -93,12 +289,93 @@ class RiskEngine:
             "recommended_action": recommended_action,
             "reasons": reasons,
             "patterns_detected": patterns_detected,
-            "recipient_profile": {
-                "address": recipient,
-                "transaction_count": tx_count,
-                "wallet_age_days": wallet_age,
-                "balance_eth": balance
-            }
+            "recipient_profile": profile_summary
+        }
+    
+    def _is_penny_drop(self, sender: Optional[str], recipient: str, recipient_profile: Dict, tx_count: int) -> bool:
+        """
+        Penny Drop: the recipient recently sent this sender a small "test"
+        payment, and is itself a low-activity wallet. Small inbound transfers
+        alone prove nothing (merchants, exchanges and dust-spammed wallets
+        all receive them), so with the transfer index only this pair counts.
+        Without the index, the profile's nonce/balance heuristic is used.
+        """
+        if tx_count >= self.LIMITED_HISTORY_TX:
+            return False
+        if self.transfer_index is not None:
+            if sender is None:
+                return False
+            try:
+                return self.transfer_index.has_recent_small_transfer(recipient, sender)
+            except Exception as e:
+                print(f"Error reading transfer index: {e}")
+        return recipient_profile.get("has_recent_small_tx", False)
+    
+    def _assess_sender(self, features: Dict, reasons: List[str], patterns_detected: List[str]) -> int:
+        """Sender behavior rules; appends reasons and patterns, returns the score to add"""
+        score = 0
+        
+        # Pattern 6: Sudden burst of payments
+        sends = features["sends_in_window"]
+        if sends >= self.HIGH_VELOCITY_SENDS:
+            score += self.HIGH_VELOCITY_SCORE
+            reasons.append(f"Sender is paying unusually often (~{sends:.0f} payments recently)")
+            patterns_detected.append("HIGH_VELOCITY")
+        
+        # Pattern 7: Amount far above the sender's usual payments
+        zscore = features["amount_zscore"]
+        if features["prior_transfers"] >= self.AMOUNT_ANOMALY_MIN_HISTORY and zscore >= self.AMOUNT_ANOMALY_ZSCORE:
+            score += self.AMOUNT_ANOMALY_SCORE
+            reasons.append(
+                f"Amount is far above the sender's usual payments "
+                f"(average {features['amount_mean']:.2f}, {zscore:.1f} standard deviations higher)"
+            )
+            patterns_detected.append("AMOUNT_ANOMALY")
+        
+        # Pattern 8: Funds spread to many new recipients (account drain)
+        new_recipients = features["new_recipients_in_window"]
+        if features["is_new_recipient"] and new_recipients >= self.RECIPIENT_BURST_COUNT:
+            score += self.RECIPIENT_BURST_SCORE
+            reasons.append(f"Sender has paid {new_recipients} new recipients recently")
+            patterns_detected.append("RECIPIENT_BURST")
+        
+        return score
+    
+    def _assess_proximity(self, proximity: Dict, reasons: List[str], patterns_detected: List[str]) -> int:
+        """Transfer-graph rules; appends reasons and patterns, returns the score to add"""
+        # Pattern 9: Funds moved to or from a known scam wallet
+        hops = proximity["hops_to_flagged"]
+        if hops == 1:
+            reasons.append("Recipient has transacted directly with a known scam wallet")
+            patterns_detected.append("SCAM_NEIGHBOR")
+            return self.SCAM_NEIGHBOR_SCORE
+        if hops == 2:
+            reasons.append("Recipient is two transfers away from a known scam wallet")
+            patterns_detected.append("SCAM_PROXIMITY")
+            return self.SCAM_PROXIMITY_SCORE
+        return 0
+    
+    def classify_score(self, score: int) -> Tuple[str, int, str]:
+        """Map a risk score to (risk_level, vault_delay_seconds, recommended_action)"""
+        if score >= self.HIGH_RISK_THRESHOLD:
+            return "HIGH", self.HIGH_RISK_DELAY, "VAULT_LOCK"
+        elif score >= self.MEDIUM_RISK_THRESHOLD:
+            return "MEDIUM", self.MEDIUM_RISK_DELAY, "VAULT_LOCK"
+        return "LOW", 0, "INSTANT_SEND"
+    
+    def adjust_score(self, assessment: Dict, adjustment: int, reason: str) -> Dict:
+        """Apply a score adjustment to an assessment and re-derive level, delay and action"""
+        if adjustment == 0:
+            return assessment
+        score = max(0, assessment["risk_score"] + adjustment)
+        risk_level, vault_delay, recommended_action = self.classify_score(score)
+        return {
+            **assessment,
+            "risk_score": score,
+            "risk_level": risk_level,
+            "vault_delay_seconds": vault_delay,
+            "recommended_action": recommended_action,
+            "reasons": assessment["reasons"] + [reason]
         }
     
     def get_scam_explanation(self, patterns: List[str]) -> str:
@@ -110,7 +387,13 @@ class RiskEngine:
             "FRESH_WALLET": "The recipient wallet is brand new with very few transactions, which is common in scam operations that create disposable wallets.",
             "NEW_WALLET": "This wallet was created very recently, which increases risk as scammers often use new wallets.",
             "CONTRACT_RECIPIENT": "You're sending to a smart contract. Make sure you trust this contract's code.",
-            "ZERO_BALANCE": "This wallet has transaction history but zero balance, suggesting funds are immediately moved elsewhere."
+            "ZERO_BALANCE": "This wallet has transaction history but zero balance, suggesting funds are immediately moved elsewhere.",
+            "HIGH_VELOCITY": "You are sending many payments in a short time. Scammers often pressure victims into rapid repeated transfers.",
+            "AMOUNT_ANOMALY": "This amount is much larger than your usual payments. Large one-off transfers are the goal of most payment scams.",
+            "RECIPIENT_BURST": "You have paid many new recipients recently, which can mean an account is being drained.",
+            "KNOWN_SCAM": "This address has been reported and confirmed as a scam wallet. Do not send funds to it.",
+            "SCAM_NEIGHBOR": "This wallet has sent funds to or received funds from a known scam wallet, which often means it belongs to the same operation.",
+            "SCAM_PROXIMITY": "This wallet is closely connected to a known scam wallet through a shared counterparty."
         }
         
         if not patterns:
@@ -120,10 +403,13 @@ class RiskEngine:
 
 # Singleton instance
 _risk_engine = None
+_risk_engine_lock = threading.Lock()
 
 def get_risk_engine() -> RiskEngine:
     """Get or create risk engine instance"""
     global _risk_engine
     if _risk_engine is None:
-        _risk_engine = RiskEngine()
+        with _risk_engine_lock:
+            if _risk_engine is None:
+                _risk_engine = RiskEngine()
     return _risk_engine
@@ -0,0 +1,460 @@
+"""
+RPC Provider Layer - Pooled, multi-endpoint JSON-RPC transport
+Keep-alive connection pools, latency-aware endpoint selection,
+hedged reads and per-endpoint circuit breakers
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+import asyncio
+import os
+import threading
+import time
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import AsyncWeb3, Web3
+from web3.providers import JSONBaseProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+from metrics import observe_rpc
+
+# Methods that must never be duplicated by hedging or failover
+NON_IDEMPOTENT_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+
+REQUEST_HEADERS = {"Content-Type": "application/json"}
+
+class EndpointUnavailable(Exception):
+    """The endpoint's breaker is open, or half-open with its trial request already in flight"""
+
+class EndpointState:
+    """Latency, error and circuit-breaker state for one RPC endpoint"""
+
+    def __init__(self, url: str, failure_threshold: int = 3, cooldown_seconds: float = 30.0, ewma_alpha: float = 0.2):
+        self.url = url
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.ewma_alpha = ewma_alpha
+
+        self.latency_ewma: Optional[float] = None
+        self.latency_deviation = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.hedges_won = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def is_available(self, now: float) -> bool:
+        """Closed, or half-open (past its cooldown) with no trial request in flight"""
+        return self.open_until <= now and not self.trial_in_flight
+
+    def claim_trial(self, now: float) -> bool:
+        """If half-open and free, make the caller the single trial request; True if it did"""
+        with self._lock:
+            if 0 < self.open_until <= now and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def end_trial(self) -> None:
+        """Release the trial slot (also when the trial was cancelled before recording a result)"""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def expected_tail_latency(self) -> float:
+        """Rough p95 estimate: EWMA plus two smoothed deviations"""
+        if self.latency_ewma is None:
+            return 0.0
+        return self.latency_ewma + 2 * self.latency_deviation
+
+    def record_success(self, latency: float) -> None:
+        with self._lock:
+            self.requests += 1
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_deviation += self.ewma_alpha * (abs(latency - self.latency_ewma) - self.latency_deviation)
+                self.latency_ewma += self.ewma_alpha * (latency - self.latency_ewma)
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.failure_threshold or self.trial_in_flight:
+                # A failed trial reopens the breaker for another cooldown
+                self.open_until = time.monotonic() + self.cooldown_seconds
+            self.trial_in_flight = False
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        if self.open_until <= 0:
+            circuit = "closed"
+        elif self.open_until > now:
+            circuit = "open"
+        else:
+            circuit = "half_open"
+        return {
+            "url": self.url,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 2) if self.latency_ewma is not None else None,
+            "latency_p95_estimate_ms": round(self.expected_tail_latency() * 1000, 2),
+            "requests": self.requests,
+            "errors": self.errors,
+            "hedges_won": self.hedges_won,
+            "circuit": circuit
+        }
+
+
+class EndpointPool:
+    """
+    The set of RPC endpoints, shared by the sync and async providers so
+    latency, error stats and breakers reflect all traffic
+    """
+
+    def __init__(self, urls: Sequence[str], failure_threshold: int = 3, cooldown_seconds: float = 30.0):
+        if not urls:
+            raise ValueError("At least one RPC URL is required")
+        self.endpoints = [EndpointState(url, failure_threshold, cooldown_seconds) for url in urls]
+
+    def ranked(self) -> List[EndpointState]:
+        """
+        Available endpoints, fastest first (unmeasured endpoints go first so
+        they get measured). If no endpoint is available, all endpoints are
+        returned, soonest-to-recover first, rather than failing outright.
+        """
+        now = time.monotonic()
+        available = [e for e in self.endpoints if e.is_available(now)]
+        if not available:
+            return sorted(self.endpoints, key=lambda e: e.open_until)
+        return sorted(available, key=lambda e: e.latency_ewma if e.latency_ewma is not None else 0.0)
+
+    def stats(self) -> List[Dict]:
+        return [e.stats() for e in self.endpoints]
+
+
+class _PooledProviderMixin:
+    """Endpoint ordering and hedge timing shared by both providers"""
+
+    pool: EndpointPool
+    hedge_min_delay: Optional[float]
+
+    def _plan(self, method: str) -> Tuple[List[EndpointState], bool]:
+        """Endpoints to try in order, and whether they're a last resort (none available)"""
+        ranked = self.pool.ranked()
+        last_resort = not ranked[0].is_available(time.monotonic())
+        if method in NON_IDEMPOTENT_METHODS:
+            return ranked[:1], last_resort
+        return ranked, last_resort
+
+    @staticmethod
+    def _admit(endpoint: EndpointState, last_resort: bool) -> bool:
+        """
+        Claim the endpoint for one request. A half-open endpoint takes a
+        single trial; everyone else is turned away (EndpointUnavailable) to
+        the next endpoint until the trial succeeds. Returns whether this
+        request is the trial.
+        """
+        now = time.monotonic()
+        trial = endpoint.claim_trial(now)
+        if not trial and not last_resort and not endpoint.is_available(now):
+            raise EndpointUnavailable(f"{endpoint.url} circuit is open")
+        return trial
+
+    def _hedge_delay(self, method: str, endpoints: List[EndpointState]) -> Optional[float]:
+        """Seconds to wait on the primary before hedging to the next endpoint (None: don't hedge)"""
+        if self.hedge_min_delay is None or len(endpoints) < 2 or method in NON_IDEMPOTENT_METHODS:
+            return None
+        return max(self.hedge_min_delay, endpoints[0].expected_tail_latency())
+
+    @staticmethod
+    def _sort_batch(response):
+        if not isinstance(response, list):
+            # RPC errors return only one response with the error object
+            return response
+        return sorted(response, key=lambda r: r.get("id") if isinstance(r.get("id"), int) else -1)
+
+
+class PooledHTTPProvider(_PooledProviderMixin, JSONBaseProvider):
+    """
+    Sync web3 provider over several endpoints. Each endpoint has its own
+    keep-alive requests.Session sized to pool_size. Reads go to the
+    fastest healthy endpoint, are hedged to the runner-up if the primary
+    is slower than its expected tail latency, and fail over on errors.
+    """
+
+    def __init__(
+        self,
+        pool: EndpointPool,
+        pool_size: int = 20,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        hedge_min_delay: Optional[float] = 0.3,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.timeout = (connect_timeout, read_timeout)
+        self.hedge_min_delay = hedge_min_delay
+        self._sessions: Dict[str, requests.Session] = {}
+        for endpoint in pool.endpoints:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sessions[endpoint.url] = session
+        self._hedge_executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="rpc-hedge")
+
+    def __str__(self) -> str:
+        return f"Pooled RPC connection {[e.url for e in self.pool.endpoints]}"
+
+    def _post(self, endpoint: EndpointState, data: bytes, last_resort: bool = False) -> bytes:
+        trial = self._admit(endpoint, last_resort)
+        start = time.perf_counter()
+        try:
+            response = self._sessions[endpoint.url].post(
+                endpoint.url, data=data, headers=REQUEST_HEADERS, timeout=self.timeout
+            )
+            response.raise_for_status()
+        except Exception:
+            endpoint.record_failure()
+            raise
+        else:
+            endpoint.record_success(time.perf_counter() - start)
+            return response.content
+        finally:
+            if trial:
+                endpoint.end_trial()
+
+    def _post_hedged(
+        self, primary: EndpointState, secondary: EndpointState, data: bytes, delay: float, last_resort: bool = False
+    ) -> bytes:
+        first = self._hedge_executor.submit(self._post, primary, data, last_resort)
+        done, _ = wait([first], timeout=delay)
+        if done and first.exception() is None:
+            return first.result()
+
+        pending = [] if done else [first]
+        second = self._hedge_executor.submit(self._post, secondary, data, last_resort)
+        pending.append(second)
+        error = first.exception() if done else None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    if future is second:
+                        secondary.hedges_won += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def _send(self, method: str, data: bytes) -> bytes:
+        endpoints, last_resort = self._plan(method)
+        delay = self._hedge_delay(method, endpoints)
+        error: Optional[BaseException] = None
+
+        if delay is not None:
+            try:
+                return self._post_hedged(endpoints[0], endpoints[1], data, delay, last_resort)
+            except Exception as e:
+                error = e
+                endpoints = endpoints[2:]
+
+        for endpoint in endpoints:
+            try:
+                return self._post(endpoint, data, last_resort)
+            except Exception as e:
+                error = e
+        raise error
+
+    def _timed_send(self, method: str, data: bytes) -> bytes:
+        start = time.perf_counter()
+        try:
+            raw = self._send(method, data)
+        except Exception:
+            observe_rpc(method, time.perf_counter() - start, ok=False)
+            raise
+        observe_rpc(method, time.perf_counter() - start, ok=True)
+        return raw
+
+    def make_request(self, method, params: Any):
+        data = self.encode_rpc_request(method, params)
+        return self.decode_rpc_response(self._timed_send(method, data))
+
+    def make_batch_request(self, batch_requests):
+        data = self.encode_batch_rpc_request(batch_requests)
+        return self._sort_batch(self.decode_rpc_response(self._timed_send("batch", data)))
+
+
+class AsyncPooledHTTPProvider(_PooledProviderMixin, AsyncJSONBaseProvider):
+    """
+    Async counterpart of PooledHTTPProvider: one aiohttp session (keep-alive
+    connector limited to pool_size) per endpoint, same selection, hedging
+    and breakers.
+    """
+
+    def __init__(
+        self,
+        pool: EndpointPool,
+        pool_size: int = 100,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        hedge_min_delay: Optional[float] = 0.3,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.pool = pool
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=connect_timeout + read_timeout, connect=connect_timeout)
+        self.hedge_min_delay = hedge_min_delay
+        # Sessions are bound to the event loop that created them
+        self._sessions: Dict[str, Tuple[asyncio.AbstractEventLoop, aiohttp.ClientSession]] = {}
+
+    def __str__(self) -> str:
+        return f"Async pooled RPC connection {[e.url for e in self.pool.endpoints]}"
+
+    def _session(self, url: str) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        cached = self._sessions.get(url)
+        if cached is not None and cached[0] is loop and not cached[1].closed:
+            return cached[1]
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=30),
+            timeout=self.timeout,
+            headers=REQUEST_HEADERS
+        )
+        self._sessions[url] = (loop, session)
+        return session
+
+    async def _post(self, endpoint: EndpointState, data: bytes, last_resort: bool = False) -> bytes:
+        trial = self._admit(endpoint, last_resort)
+        start = time.perf_counter()
+        try:
+            async with self._session(endpoint.url).post(endpoint.url, data=data) as response:
+                response.raise_for_status()
+                body = await response.read()
+        except Exception:
+            endpoint.record_failure()
+            raise
+        else:
+            endpoint.record_success(time.perf_counter() - start)
+            return body
+        finally:
+            if trial:
+                endpoint.end_trial()
+
+    async def _post_hedged(
+        self, primary: EndpointState, secondary: EndpointState, data: bytes, delay: float, last_resort: bool = False
+    ) -> bytes:
+        first = asyncio.ensure_future(self._post(primary, data, last_resort))
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        if done and first.exception() is None:
+            return first.result()
+
+        pending = set() if done else {first}
+        second = asyncio.ensure_future(self._post(secondary, data, last_resort))
+        pending.add(second)
+        error = first.exception() if done else None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            secondary.hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        raise error
+
+    async def _send(self, method: str, data: bytes) -> bytes:
+        endpoints, last_resort = self._plan(method)
+        delay = self._hedge_delay(method, endpoints)
+        error: Optional[BaseException] = None
+
+        if delay is not None:
+            try:
+                return await self._post_hedged(endpoints[0], endpoints[1], data, delay, last_resort)
+            except Exception as e:
+                error = e
+                endpoints = endpoints[2:]
+
+        for endpoint in endpoints:
+            try:
+                return await self._post(endpoint, data, last_resort)
+            except Exception as e:
+                error = e
+        raise error
+
+    async def _timed_send(self, method: str, data: bytes) -> bytes:
+        start = time.perf_counter()
+        try:
+            raw = await self._send(method, data)
+        except Exception:
+            observe_rpc(method, time.perf_counter() - start, ok=False)
+            raise
+        observe_rpc(method, time.perf_counter() - start, ok=True)
+        return raw
+
+    async def make_request(self, method, params: Any):
+        data = self.encode_rpc_request(method, params)
+        return self.decode_rpc_response(await self._timed_send(method, data))
+
+    async def make_batch_request(self, batch_requests):
+        data = self.encode_batch_rpc_request(batch_requests)
+        return self._sort_batch(self.decode_rpc_response(await self._timed_send("batch", data)))
+
+    async def disconnect(self) -> None:
+        loop = asyncio.get_running_loop()
+        for session_loop, session in self._sessions.values():
+            if session_loop is loop:
+                await session.close()
+        self._sessions.clear()
+
+# Singleton instance
+_endpoint_pool: Optional[EndpointPool] = None
+_endpoint_pool_lock = threading.Lock()
+
+def get_rpc_urls() -> List[str]:
+    """RPC endpoints from ETHEREUM_RPC_URLS (comma-separated) or ETHEREUM_RPC_URL"""
+    urls = os.getenv("ETHEREUM_RPC_URLS") or os.getenv("ETHEREUM_RPC_URL")
+    if not urls:
+        raise Exception("ETHEREUM_RPC_URL not set in environment")
+    return [url.strip() for url in urls.split(",") if url.strip()]
+
+def get_endpoint_pool() -> EndpointPool:
+    """Get or create the endpoint pool shared by every provider"""
+    global _endpoint_pool
+    if _endpoint_pool is None:
+        with _endpoint_pool_lock:
+            if _endpoint_pool is None:
+                _endpoint_pool = EndpointPool(
+                    get_rpc_urls(),
+                    failure_threshold=int(os.getenv("RPC_BREAKER_FAILURES", 3)),
+                    cooldown_seconds=float(os.getenv("RPC_BREAKER_COOLDOWN_SECONDS", 30))
+                )
+    return _endpoint_pool
+
+def _provider_kwargs() -> Dict:
+    hedge_delay_ms = float(os.getenv("RPC_HEDGE_DELAY_MS", 300))
+    return {
+        "connect_timeout": float(os.getenv("RPC_CONNECT_TIMEOUT", 3)),
+        "read_timeout": float(os.getenv("RPC_READ_TIMEOUT", 10)),
+        "hedge_min_delay": hedge_delay_ms / 1000 if hedge_delay_ms > 0 else None
+    }
+
+def create_web3(rpc_urls: Union[str, Sequence[str], None] = None) -> Web3:
+    """Sync Web3 over the pooled provider (shared endpoint pool unless URLs are given)"""
+    pool = get_endpoint_pool() if rpc_urls is None else EndpointPool([rpc_urls] if isinstance(rpc_urls, str) else rpc_urls)
+    return Web3(PooledHTTPProvider(pool, pool_size=int(os.getenv("RPC_POOL_SIZE", 20)), **_provider_kwargs()))
+
+def create_async_web3(rpc_urls: Union[str, Sequence[str], None] = None) -> AsyncWeb3:
+    """AsyncWeb3 over the pooled provider (shared endpoint pool unless URLs are given)"""
+    pool = get_endpoint_pool() if rpc_urls is None else EndpointPool([rpc_urls] if isinstance(rpc_urls, str) else rpc_urls)
+    return AsyncWeb3(AsyncPooledHTTPProvider(pool, pool_size=int(os.getenv("RPC_ASYNC_POOL_SIZE", 100)), **_provider_kwargs()))
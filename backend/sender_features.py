@@ -0,0 +1,278 @@
+"""
+Sender Features - Streaming per-sender behavioral signals
+Decayed send rate, running amount mean/variance (Welford) and distinct
+new recipients in a sliding window, updated on every analysis in O(1)
+with constant memory per sender
+"""
+from collections import OrderedDict, deque
+from typing import Deque, Dict, Optional
+import json
+import math
+import os
+import threading
+import time
+
+class SenderState:
+    """Fixed-size behavioral state for one sender"""
+
+    __slots__ = ("rate", "updated_at", "count", "mean", "m2", "recipients", "new_recipient_times")
+
+    def __init__(self, max_recipients: int):
+        # Exponentially decayed number of sends, as of updated_at
+        self.rate = 0.0
+        self.updated_at = 0.0
+        # Welford running statistics of amounts
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        # Most recently paid recipients (bounded; older ones count as new again)
+        self.recipients: "OrderedDict[str, None]" = OrderedDict()
+        # When each new recipient was first paid (bounded sliding window)
+        self.new_recipient_times: Deque[float] = deque(maxlen=max_recipients)
+
+    def std(self) -> float:
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "rate": self.rate,
+            "updated_at": self.updated_at,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+            "recipients": list(self.recipients),
+            "new_recipient_times": list(self.new_recipient_times)
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, max_recipients: int) -> "SenderState":
+        state = cls(max_recipients)
+        state.rate = data["rate"]
+        state.updated_at = data["updated_at"]
+        state.count = data["count"]
+        state.mean = data["mean"]
+        state.m2 = data["m2"]
+        if not (math.isfinite(state.mean) and math.isfinite(state.m2)):
+            # Written before non-finite amounts were rejected: start the amount stats over
+            state.count, state.mean, state.m2 = 0, 0.0, 0.0
+        state.recipients = OrderedDict.fromkeys(data["recipients"][-max_recipients:])
+        state.new_recipient_times.extend(data["new_recipient_times"])
+        return state
+
+
+class SenderFeatureStore:
+    """
+    Thread-safe store of SenderState keyed by lowercased sender address.
+    Least recently active senders are evicted beyond max_senders.
+    Timestamps are wall-clock so decay continues across restarts when the
+    store is snapshotted to disk and loaded again.
+    """
+
+    MIN_RELATIVE_SPREAD = 0.1
+
+    def __init__(
+        self,
+        max_senders: int = 100000,
+        rate_window_seconds: float = 3600.0,
+        new_recipient_window_seconds: float = 3600.0,
+        max_recipients: int = 32,
+        snapshot_path: Optional[str] = None
+    ):
+        self.max_senders = max_senders
+        # Decay time constant: the rate approximates sends in the last window
+        self.rate_window_seconds = rate_window_seconds
+        self.new_recipient_window_seconds = new_recipient_window_seconds
+        self.max_recipients = max_recipients
+        self.snapshot_path = snapshot_path
+        self._senders: "OrderedDict[str, SenderState]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        # Counters
+        self.observations = 0
+        self.evictions = 0
+
+    def observe(self, sender: str, recipient: str, amount: float, now: Optional[float] = None) -> Dict:
+        """
+        Record a transfer and return the sender's features for scoring it.
+        The amount is compared with the sender's history before this
+        transfer; rate and new-recipient counts include it. A non-finite
+        amount is not scored and never enters the running mean/variance.
+        """
+        now = time.time() if now is None else now
+        sender, recipient = sender.lower(), recipient.lower()
+        with self._lock:
+            state = self._senders.get(sender)
+            if state is None:
+                state = SenderState(self.max_recipients)
+                self._senders[sender] = state
+                while len(self._senders) > self.max_senders:
+                    self._senders.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._senders.move_to_end(sender)
+            self.observations += 1
+
+            # Amount z-score against prior transfers. The spread is floored at
+            # a fraction of the mean so a sender who always pays the same
+            # amount still gets a meaningful score.
+            prior_count, prior_mean, prior_std = state.count, state.mean, state.std()
+            spread = max(prior_std, abs(prior_mean) * self.MIN_RELATIVE_SPREAD)
+            amount_is_finite = math.isfinite(amount)
+            zscore = (amount - prior_mean) / spread if spread > 0 and amount_is_finite else 0.0
+
+            # Decayed send rate
+            state.rate = self._decayed_rate(state, now) + 1.0
+            state.updated_at = now
+
+            # Welford update
+            if amount_is_finite:
+                state.count += 1
+                delta = amount - state.mean
+                state.mean += delta / state.count
+                state.m2 += delta * (amount - state.mean)
+
+            # Distinct new recipients in the sliding window
+            is_new_recipient = recipient not in state.recipients
+            if is_new_recipient:
+                state.recipients[recipient] = None
+                if len(state.recipients) > self.max_recipients:
+                    state.recipients.popitem(last=False)
+                state.new_recipient_times.append(now)
+            else:
+                state.recipients.move_to_end(recipient)
+
+            return {
+                "sends_in_window": round(state.rate, 2),
+                "prior_transfers": prior_count,
+                "amount_mean": prior_mean,
+                "amount_std": prior_std,
+                "amount_zscore": round(zscore, 2),
+                "is_new_recipient": is_new_recipient,
+                "new_recipients_in_window": self._new_recipients_since(state, now)
+            }
+
+    def features(self, sender: str, now: Optional[float] = None) -> Optional[Dict]:
+        """Current features of a sender, for inspection, without recording anything (None if unknown)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._senders.get(sender.lower())
+            if state is None:
+                return None
+            return {
+                "sends_in_window": round(self._decayed_rate(state, now), 2),
+                "prior_transfers": state.count,
+                "amount_mean": state.mean,
+                "amount_std": state.std(),
+                "new_recipients_in_window": self._new_recipients_since(state, now)
+            }
+
+    def _decayed_rate(self, state: SenderState, now: float) -> float:
+        elapsed = max(0.0, now - state.updated_at)
+        return state.rate * math.exp(-elapsed / self.rate_window_seconds)
+
+    def _new_recipients_since(self, state: SenderState, now: float) -> int:
+        times = state.new_recipient_times
+        cutoff = now - self.new_recipient_window_seconds
+        while times and times[0] < cutoff:
+            times.popleft()
+        return len(times)
+
+    # ============================================
+    # Snapshots
+    # ============================================
+
+    def snapshot(self, path: Optional[str] = None) -> int:
+        """Write every sender's state to a JSON file (atomically). Returns the sender count"""
+        path = path or self.snapshot_path
+        with self._lock:
+            senders = {sender: state.to_dict() for sender, state in self._senders.items()}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"senders": senders}, f)
+        os.replace(tmp_path, path)
+        return len(senders)
+
+    def load(self, path: Optional[str] = None) -> int:
+        """Restore state from a snapshot (missing file: nothing to load). Returns the sender count"""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            senders = json.load(f)["senders"]
+        with self._lock:
+            # Snapshot order is least to most recently active
+            for sender, data in senders.items():
+                self._senders[sender] = SenderState.from_dict(data, self.max_recipients)
+                self._senders.move_to_end(sender)
+            while len(self._senders) > self.max_senders:
+                self._senders.popitem(last=False)
+        return len(senders)
+
+    def start(self, interval: float) -> None:
+        """Snapshot to snapshot_path every interval seconds in a background thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="sender-features-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop periodic snapshots and write a final one"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.snapshot_path:
+            self.snapshot()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.snapshot()
+            except Exception as e:
+                print(f"⚠️ Sender feature snapshot failed: {e}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._senders)
+
+    def stats(self) -> Dict:
+        """Counters for monitoring"""
+        with self._lock:
+            return {
+                "senders": len(self._senders),
+                "max_senders": self.max_senders,
+                "observations": self.observations,
+                "evictions": self.evictions
+            }
+
+# Singleton instance
+_sender_feature_store: Optional[SenderFeatureStore] = None
+_sender_feature_store_lock = threading.Lock()
+
+def get_sender_feature_store() -> SenderFeatureStore:
+    """
+    Get or create the sender feature store.
+    With SENDER_FEATURES_SNAPSHOT_PATH set, state is loaded from it and
+    written back every SENDER_FEATURES_SNAPSHOT_SECONDS and on shutdown.
+    """
+    global _sender_feature_store
+    if _sender_feature_store is None:
+        with _sender_feature_store_lock:
+            if _sender_feature_store is None:
+                store = SenderFeatureStore(
+                    max_senders=int(os.getenv("SENDER_FEATURES_MAX_SENDERS", 100000)),
+                    rate_window_seconds=float(os.getenv("SENDER_RATE_WINDOW_SECONDS", 3600)),
+                    new_recipient_window_seconds=float(os.getenv("SENDER_NEW_RECIPIENT_WINDOW_SECONDS", 3600)),
+                    snapshot_path=os.getenv("SENDER_FEATURES_SNAPSHOT_PATH") or None
+                )
+                if store.snapshot_path:
+                    try:
+                        loaded = store.load()
+                        print(f"✅ Loaded behavioral features for {loaded} senders")
+                    except Exception as e:
+                        print(f"⚠️ Could not load sender feature snapshot: {e}")
+                    store.start(float(os.getenv("SENDER_FEATURES_SNAPSHOT_SECONDS", 300)))
+                _sender_feature_store = store
+    return _sender_feature_store
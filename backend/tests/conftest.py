@@ -0,0 +1,103 @@
+"""
+Shared test fixtures
+Tests import the backend modules the same way the app does (flat, from backend/)
+"""
+from typing import Any, Callable, Dict, List
+import os
+import sys
+
+import pytest
+import requests
+from web3 import AsyncWeb3, Web3
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.providers.base import JSONBaseProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeNode(JSONBaseProvider):
+    """
+    In-process JSON-RPC node: each method answers from `handlers`
+    (a value, or a callable taking the params). With `down` set, every
+    request fails like an unreachable endpoint. Requests are recorded in
+    `calls` and batches in `batches`.
+    """
+
+    def __init__(self, handlers: Dict[str, Any]):
+        super().__init__()
+        self.handlers = handlers
+        self.down = False
+        self.reject_batches = False
+        self.calls: List[str] = []
+        self.batches = 0
+
+    def _answer(self, method: str, params: Any) -> Dict:
+        self.calls.append(method)
+        if self.down:
+            raise requests.exceptions.ConnectionError("node is down")
+        handler = self.handlers[method]
+        result = handler(params) if callable(handler) else handler
+        if isinstance(result, dict) and "error" in result:
+            return {"jsonrpc": "2.0", "id": 1, "error": result["error"]}
+        return {"jsonrpc": "2.0", "id": 1, "result": result}
+
+    def make_request(self, method, params):
+        return self._answer(method, params)
+
+    def make_batch_request(self, batch_requests):
+        self.batches += 1
+        if self.reject_batches:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch requests are not supported"}}
+        return [self._answer(method, params) for method, params in batch_requests]
+
+
+class AsyncFakeNode(AsyncJSONBaseProvider):
+    """FakeNode behind the async provider interface (shares its handlers and counters)"""
+
+    def __init__(self, node: FakeNode):
+        super().__init__()
+        self.node = node
+
+    async def make_request(self, method, params):
+        return self.node.make_request(method, params)
+
+    async def make_batch_request(self, batch_requests):
+        return self.node.make_batch_request(batch_requests)
+
+
+def wallet_node(tx_count: int = 601, balance_wei: int = 2 * 10**18, code: str = "0x", head: int = 1000) -> FakeNode:
+    """A node serving one active externally-owned wallet"""
+    return FakeNode({
+        "eth_chainId": "0x1",
+        "eth_blockNumber": hex(head),
+        "eth_getTransactionCount": hex(tx_count),
+        "eth_getBalance": hex(balance_wei),
+        "eth_getCode": code,
+        "web3_clientVersion": "fake/1.0"
+    })
+
+
+@pytest.fixture
+def make_service(monkeypatch) -> Callable:
+    """Build a BlockchainService on top of a FakeNode"""
+    import blockchain_service
+
+    def make(node: FakeNode, **kwargs):
+        monkeypatch.setattr(blockchain_service, "create_web3", lambda rpc_url=None: Web3(node))
+        kwargs.setdefault("age_binary_search", False)
+        return blockchain_service.BlockchainService("fake", **kwargs)
+
+    return make
+
+
+@pytest.fixture
+def make_async_service(monkeypatch) -> Callable:
+    """Build an AsyncBlockchainService on top of a FakeNode"""
+    import blockchain_service
+
+    def make(node: FakeNode, **kwargs):
+        monkeypatch.setattr(blockchain_service, "create_async_web3", lambda rpc_url=None: AsyncWeb3(AsyncFakeNode(node)))
+        kwargs.setdefault("age_binary_search", False)
+        return blockchain_service.AsyncBlockchainService("fake", **kwargs)
+
+    return make
@@ -0,0 +1,90 @@
+"""Scam/allow list files: Bloom filter in front of a binary search over the mmap'd sorted addresses"""
+import os
+import random
+import threading
+
+from address_lists import AddressList, ScreeningLists, _bloom_positions, address_bytes, build_list
+
+def random_addresses(count, seed):
+    rng = random.Random(seed)
+    return ["0x" + rng.randbytes(20).hex() for _ in range(count)]
+
+def bloom_hit(address_list, key):
+    mm = address_list._mm
+    return all(
+        mm[address_list._bloom_offset + (bit >> 3)] & (1 << (bit & 7))
+        for bit in _bloom_positions(key, address_list.num_bits, address_list.num_hashes)
+    )
+
+def test_no_false_negatives(tmp_path):
+    path = str(tmp_path / "scams.bin")
+    addresses = random_addresses(5000, seed=1)
+    assert build_list(addresses, path) == 5000
+    address_list = AddressList(path)
+    for address in addresses:
+        # The NumPy build and the lookup hash the same bits
+        assert bloom_hit(address_list, address_bytes(address))
+        assert address in address_list
+        assert address.upper().replace("0X", "0x") in address_list
+
+def test_bloom_false_positive_rejected_by_binary_search(tmp_path):
+    path = str(tmp_path / "scams.bin")
+    addresses = random_addresses(50, seed=2)
+    build_list(addresses, path)
+    address_list = AddressList(path)
+    listed = {address_bytes(address) for address in addresses}
+    false_positive = next(
+        key for key in (address_bytes(a) for a in random_addresses(100000, seed=3))
+        if key not in listed and bloom_hit(address_list, key)
+    )
+    assert not address_list.contains_bytes(false_positive)
+
+def test_empty_list(tmp_path):
+    path = str(tmp_path / "empty.bin")
+    assert build_list(["not an address", ""], path) == 0
+    address_list = AddressList(path)
+    assert len(address_list) == 0
+    assert random_addresses(1, seed=4)[0] not in address_list
+    lists = ScreeningLists(scam_list_path=path)
+    assert lists.lookup(random_addresses(1, seed=4)[0]) is None
+    assert lists.stats()["scam"]["addresses"] == 0
+
+def test_lookup_during_reload(tmp_path):
+    path = str(tmp_path / "scams.bin")
+    kept, added = random_addresses(2, seed=5)
+    build_list([kept], path)
+    lists = ScreeningLists(scam_list_path=path)
+    old = lists.lists["scam"]
+
+    stop = threading.Event()
+    failures = []
+
+    def lookups():
+        while not stop.is_set():
+            try:
+                if lists.lookup(kept) != "scam":
+                    failures.append("kept address missed")
+            except Exception as e:
+                failures.append(repr(e))
+
+    readers = [threading.Thread(target=lookups) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for generation in range(20):
+            build_list([kept, added] + random_addresses(generation + 1, seed=100 + generation), path)
+            assert lists.reload()
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert failures == []
+    assert lists.reloads == 21
+    assert lists.lookup(added) == "scam"
+    # A lookup still holding the replaced version finishes on it
+    assert old.contains_bytes(address_bytes(kept))
+    assert not old.contains_bytes(address_bytes(added))
+    # Unchanged file: no swap
+    assert not lists.reload()
+    assert os.path.exists(path) and not os.path.exists(f"{path}.tmp")
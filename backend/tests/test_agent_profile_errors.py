@@ -0,0 +1,95 @@
+"""A failed or timed-out profile fetch keeps the rule verdict: no LLM call, no cached agent verdict"""
+import asyncio
+
+import pytest
+
+import fraud_agent
+from deadline import Deadline
+from fraud_agent import FraudDetectionAgent
+
+RECIPIENT = "0x" + "bb" * 20
+SENDER = "0x" + "aa" * 20
+
+
+class TimedOutProfiles:
+    """Profile reads that always run past their stage budget"""
+
+    def get_wallet_profile(self, address, use_cache=True, deadline=None):
+        deadline.cut("profile_fetch")
+        return {"address": address, "error": "Profile fetch exceeded its time budget"}
+
+
+class AsyncTimedOutProfiles(TimedOutProfiles):
+    async def get_wallet_profile(self, address, use_cache=True, deadline=None):
+        return TimedOutProfiles.get_wallet_profile(self, address, use_cache, deadline)
+
+
+class Rules:
+    """Scores the zeroed facts of an error profile into the ambiguous band, like the real rules"""
+
+    def observe_sender(self, sender, recipient, amount):
+        return None
+
+    def screen_recipient(self, recipient):
+        return None
+
+    def assess_profile(self, recipient, profile, sender_features=None, sender=None):
+        return {"risk_score": 60, "risk_level": "MEDIUM", "patterns_detected": ["FRESH_WALLET", "NEW_WALLET"]}
+
+    def get_scam_explanation(self, patterns):
+        return "canned"
+
+
+class Cache(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    async def service():
+        return AsyncTimedOutProfiles()
+
+    monkeypatch.setattr(fraud_agent, "get_async_blockchain_service", service)
+    agent = FraudDetectionAgent.__new__(FraudDetectionAgent)
+    agent.blockchain = TimedOutProfiles()
+    agent.risk_engine = Rules()
+    agent.verdict_cache = Cache()
+    agent.ambiguous_min_score, agent.ambiguous_max_score = 40, 69
+
+    def no_llm(*args, **kwargs):
+        raise AssertionError("the agent must not run on an error profile")
+
+    agent._run_agent = agent._run_agent_async = no_llm
+    agent.scheduler = None  # any scheduler use would fail
+    return agent
+
+
+def test_sync_analysis_keeps_rule_verdict(agent):
+    deadline = Deadline(5)
+    result = agent.analyze_transaction(SENDER, RECIPIENT, 100.0, deadline=deadline)
+
+    assert result["analysis_tier"] == "rules"
+    assert result["risk_score"] == 60
+    assert deadline.cut_short == ["profile_fetch"]
+    assert not agent.verdict_cache
+
+
+def test_async_analysis_keeps_rule_verdict(agent):
+    deadline = Deadline(5)
+    result = asyncio.run(agent.analyze_transaction_async(SENDER, RECIPIENT, 100.0, explain=True, deadline=deadline))
+
+    assert result["analysis_tier"] == "rules"
+    assert deadline.cut_short == ["profile_fetch"]
+    assert not agent.verdict_cache
+
+
+def test_stream_ends_with_rule_verdict(agent):
+    async def collect():
+        return [event async for event in agent.stream_transaction(SENDER, RECIPIENT, 100.0, deadline=Deadline(5))]
+
+    events = asyncio.run(collect())
+
+    assert [name for name, _ in events] == ["verdict", "done"]
+    assert events[1][1]["analysis_tier"] == "rules"
+    assert not agent.verdict_cache
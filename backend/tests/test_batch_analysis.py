@@ -0,0 +1,63 @@
+"""Batch analysis: bounded by the request deadline, and invalid recipients rejected like the single endpoint"""
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import risk_engine
+from deadline import Deadline, DeadlineExceeded, within
+from risk_engine import RiskEngine
+
+RECIPIENTS = ["0x" + f"{i:02x}" * 20 for i in range(1, 4)]
+
+
+class SlowProfiles:
+    """Async blockchain service whose profile reads never finish in time"""
+
+    async def get_wallet_profile(self, address, use_cache=True, deadline=None):
+        try:
+            await within(deadline, asyncio.sleep(10))
+        except DeadlineExceeded:
+            deadline.cut("profile_fetch")
+            return {"address": address, "error": "Profile fetch exceeded its time budget"}
+
+
+class NoLists:
+    def lookup(self, address):
+        return None
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    async def service():
+        return SlowProfiles()
+
+    monkeypatch.setattr(risk_engine, "get_async_blockchain_service", service)
+    engine = RiskEngine.__new__(RiskEngine)
+    engine.screening_lists = NoLists()
+    return engine
+
+
+def test_batch_fetch_stops_at_the_deadline(engine):
+    deadline = Deadline(0.1)
+    transfers = [("0x" + "aa" * 20, recipient, 10.0) for recipient in RECIPIENTS]
+
+    start = time.monotonic()
+    outcomes = asyncio.run(engine.analyze_transfers_async(transfers, max_concurrency=1, deadline=deadline))
+
+    assert time.monotonic() - start < 2
+    assert all(o["assessment"] is None and "time budget" in o["error"] for o in outcomes)
+    assert deadline.cut_short == ["profile_fetch"]
+
+
+def test_invalid_recipient_same_error_single_and_batch(engine):
+    import main
+
+    outcome, = asyncio.run(engine.analyze_transfers_async([("0x" + "aa" * 20, "not-an-address", 10.0)]))
+    request = main.TransferRequest(sender="0x" + "aa" * 20, recipient="not-an-address", amount=10.0)
+    with pytest.raises(HTTPException) as raised:
+        main._require_valid_recipient(request)
+
+    assert raised.value.status_code == 400
+    assert outcome == {"assessment": None, "error": raised.value.detail}
@@ -0,0 +1,71 @@
+"""Columnar scoring must agree with RiskEngine.assess_profile, profile for profile"""
+import itertools
+
+import pytest
+
+from batch_scoring import patterns_from_mask, score_profiles
+from risk_engine import RiskEngine
+
+# Either side of every threshold: FRESH_WALLET_TX, LIMITED_HISTORY_TX,
+# NEW_WALLET_DAYS and RECENT_WALLET_DAYS
+TX_COUNTS = [0, 1, 4, 5, 6, 19, 20, 21]
+AGES = [0, 6, 7, 8, 29, 30, 31]
+
+GRID = [
+    {
+        "transaction_count": tx_count,
+        "wallet_age_days": age,
+        "balance_eth": balance,
+        "is_contract": is_contract,
+        "has_recent_small_tx": small_tx
+    }
+    for tx_count, age, balance, is_contract, small_tx in itertools.product(
+        TX_COUNTS, AGES, [0, 0.5], [False, True], [False, True, None]
+    )
+]
+
+# Failed fetches and partial profiles: missing fields count as their defaults
+PARTIAL = [
+    {"address": "0xabc", "error": "Profile fetch exceeded its time budget"},
+    {"address": "0xabc", "error": "connection refused"},
+    {},
+    {"transaction_count": 3},
+    {"wallet_age_days": 100, "transaction_count": 50},
+    {"transaction_count": 0, "balance_eth": 0, "has_recent_small_tx": None}
+]
+
+class StricterRules(RiskEngine):
+    FRESH_WALLET_TX = 10
+    NEW_WALLET_DAYS = 30
+    MEDIUM_RISK_THRESHOLD = 30
+
+def make_engine(rules=RiskEngine):
+    engine = rules.__new__(rules)
+    engine.transfer_index = None
+    engine.transfer_graph = None
+    return engine
+
+def assert_matches_scalar(profiles, rules=RiskEngine):
+    engine = make_engine(rules)
+    columns = score_profiles(profiles, rules=rules)
+    for i, profile in enumerate(profiles):
+        expected = engine.assess_profile("0xabc", profile)
+        assert int(columns["risk_score"][i]) == expected["risk_score"], profile
+        assert columns["risk_level"][i] == expected["risk_level"], profile
+        assert int(columns["vault_delay_seconds"][i]) == expected["vault_delay_seconds"], profile
+        assert patterns_from_mask(columns["patterns_mask"][i]) == expected["patterns_detected"], profile
+
+@pytest.mark.parametrize("profile", PARTIAL)
+def test_single_profile_matches_assess_profile(profile):
+    assert_matches_scalar([profile])
+
+@pytest.mark.parametrize("profiles", [GRID, PARTIAL, GRID + PARTIAL])
+def test_batch_matches_assess_profile(profiles):
+    assert_matches_scalar(profiles)
+
+def test_overridden_rules_match_assess_profile():
+    assert_matches_scalar(GRID + PARTIAL, rules=StricterRules)
+
+def test_empty_batch():
+    columns = score_profiles([])
+    assert all(len(column) == 0 for column in columns.values())
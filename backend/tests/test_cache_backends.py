@@ -0,0 +1,70 @@
+"""SQLite cache tier: shared across instances (workers), TTL, eviction, and never stalling on a busy database"""
+import sqlite3
+import time
+
+import pytest
+
+import cache_backends
+from cache_backends import SQLiteCache
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "cache.db")
+
+
+def test_entries_are_shared_between_instances(path):
+    writer = SQLiteCache(path, "profiles")
+    reader = SQLiteCache(path, "profiles")
+    other_namespace = SQLiteCache(path, "verdicts")
+
+    writer.set("0xabc", {"transaction_count": 3})
+
+    assert reader.get("0xabc") == {"transaction_count": 3}
+    assert other_namespace.get("0xabc") is None
+    assert reader.invalidate("0xabc")
+    assert writer.get("0xabc") is None
+
+
+def test_expired_entries_are_misses(path, monkeypatch):
+    cache = SQLiteCache(path, "profiles", ttl_seconds=60)
+    cache.set(["0xabc", 1], "value")
+    assert cache.get(["0xabc", 1]) == "value"
+
+    now = time.time()
+    monkeypatch.setattr(cache_backends.time, "time", lambda: now + 61)
+
+    assert cache.get(["0xabc", 1]) is None
+    assert cache.expirations == 1
+    assert len(cache) == 0
+
+
+def test_oldest_entries_are_evicted_over_max_size(path, monkeypatch):
+    monkeypatch.setattr(SQLiteCache, "EVICTION_INTERVAL", 5)
+    cache = SQLiteCache(path, "profiles", max_size=3)
+
+    for i in range(5):
+        cache.set(f"key{i}", i)
+
+    assert len(cache) == 3
+    assert cache.evictions == 2
+    assert cache.get("key0") is None and cache.get("key4") == 4
+
+
+def test_busy_database_does_not_block(path):
+    cache = SQLiteCache(path, "profiles", busy_timeout=0.05)
+    cache.set("cached", 1)
+    other_worker = sqlite3.connect(path)
+    other_worker.execute("BEGIN IMMEDIATE")  # holds the write lock
+    try:
+        start = time.monotonic()
+        cache.set("new", 2)
+        cache.invalidate("cached")
+        assert time.monotonic() - start < 1
+        assert cache.busy == 2
+        # WAL readers aren't blocked by the writer
+        assert cache.get("cached") == 1
+    finally:
+        other_worker.rollback()
+        other_worker.close()
+    assert cache.get("new") is None
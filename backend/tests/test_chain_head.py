@@ -0,0 +1,88 @@
+"""Shared head block: advances with the chain, goes stale when polls stop, never blocks its first caller"""
+import threading
+import time
+
+from web3 import Web3
+
+import chain_head
+from chain_head import ChainHeadTracker
+from conftest import FakeNode
+
+class Chain:
+    def __init__(self, number=100):
+        self.number = number
+        self.released = threading.Event()
+        self.released.set()
+
+    def latest(self, params):
+        self.released.wait()
+        return {"number": hex(self.number), "timestamp": hex(1700000000 + 12 * self.number)}
+
+def chain_node(chain):
+    return FakeNode({"eth_chainId": "0x1", "eth_getBlockByNumber": chain.latest})
+
+def test_head_advances_and_ignores_a_lagging_endpoint():
+    chain = Chain()
+    tracker = ChainHeadTracker(Web3(chain_node(chain)))
+    assert tracker.head() is None and tracker.is_stale()
+    tracker.refresh()
+    assert tracker.head() == 100 and tracker.chain_id == 1
+    chain.number = 103
+    tracker.refresh()
+    assert tracker.head() == 103
+    assert tracker.head_timestamp() == 1700000000 + 12 * 103
+    # An endpoint behind the others answers: keep the newer head
+    chain.number = 101
+    tracker.refresh()
+    assert tracker.head() == 103
+    assert tracker.polls == 3
+
+def test_head_goes_stale_when_polls_stop(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(chain_head.time, "monotonic", lambda: now[0])
+    node = chain_node(Chain())
+    tracker = ChainHeadTracker(Web3(node), stale_after=30)
+    tracker.refresh()
+    now[0] += 29
+    assert tracker.head() == 100 and not tracker.is_stale()
+    now[0] += 2
+    assert tracker.head() is None and tracker.is_stale()
+    # The chain's clock survives staleness
+    assert tracker.head_timestamp() is not None
+    assert tracker.status()["staleness_seconds"] == 31
+
+    # Failed polls don't count as fresh
+    node.down = True
+    tracker.poll_interval = 0.01
+    tracker.start()
+    deadline = time.time() + 5
+    while tracker.poll_errors == 0 and time.time() < deadline:
+        time.sleep(0.01)
+    tracker.stop()
+    assert tracker.poll_errors > 0 and tracker.last_error
+    assert tracker.is_stale()
+
+    node.down = False
+    tracker.refresh()
+    assert tracker.head() == 100 and tracker.last_error is None
+
+def test_first_poll_runs_in_the_tracker_thread(monkeypatch):
+    chain = Chain()
+    chain.released.clear()
+    monkeypatch.setattr(chain_head, "create_web3", lambda: Web3(chain_node(chain)))
+    monkeypatch.setattr(chain_head, "_chain_head_tracker", None)
+
+    started = time.monotonic()
+    tracker = chain_head.get_chain_head_tracker()
+    try:
+        # The node hasn't answered, yet the caller got its tracker
+        assert time.monotonic() - started < 1
+        assert tracker.head() is None and tracker.is_stale()
+        chain.released.set()
+        deadline = time.time() + 5
+        while tracker.head() is None and time.time() < deadline:
+            time.sleep(0.01)
+        assert tracker.head() == 100 and tracker.chain_id == 1
+    finally:
+        chain.released.set()
+        tracker.stop()
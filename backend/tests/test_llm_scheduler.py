@@ -0,0 +1,105 @@
+"""LLM scheduling: budget-aware provider choice and spill-over to the next provider on rate limits"""
+import asyncio
+
+import pytest
+
+from deadline import Deadline
+from fraud_agent import FraudDetectionAgent
+from llm_scheduler import LLMProvider, LLMScheduler
+
+VERDICT = {"risk_score": 40, "reasoning": "ok"}
+
+
+def providers():
+    # One request of burst each, refilling once a minute
+    return [
+        LLMProvider("primary", llm=None, requests_per_minute=1, burst=1),
+        LLMProvider("backup", llm=None, requests_per_minute=1, burst=1)
+    ]
+
+
+def test_acquire_spills_to_the_next_provider_with_budget():
+    scheduler = LLMScheduler(providers())
+
+    assert scheduler.acquire(0.0)[0].name == "primary"
+    assert scheduler.acquire(0.0)[0].name == "backup"
+    assert scheduler.acquire(0.0) is None
+    assert scheduler.rejected == 1
+
+
+def test_acquire_waits_for_a_token_within_max_wait():
+    scheduler = LLMScheduler([LLMProvider("only", llm=None, requests_per_minute=600, burst=1)])
+    scheduler.acquire(0.0)
+
+    provider, wait = scheduler.acquire(1.0)
+    assert provider.name == "only"
+    assert 0 < wait <= 0.1
+
+
+def test_rate_limited_provider_is_skipped_until_cooldown():
+    scheduler = LLMScheduler([
+        LLMProvider("primary", llm=None, requests_per_minute=600, burst=10),
+        LLMProvider("backup", llm=None, requests_per_minute=600, burst=10)
+    ])
+    primary = scheduler.providers[0]
+    scheduler.report_rate_limited(primary)
+
+    assert scheduler.acquire(1.0)[0].name == "backup"
+    assert scheduler.acquire(1.0, exclude=("backup",)) is None
+    assert primary.rate_limited == 1
+
+
+class Cache(dict):
+    def set(self, key, value):
+        self[key] = value
+
+
+def make_agent(errors):
+    """Agent whose provider calls raise errors[name] (if any) and otherwise return VERDICT"""
+    agent = FraudDetectionAgent.__new__(FraudDetectionAgent)
+    agent.scheduler = LLMScheduler(providers())
+    agent.verdict_cache = Cache()
+    agent.llm_queue_timeout = 0.0
+    calls = []
+
+    def invoke(provider, *args):
+        calls.append(provider.name)
+        if provider.name in errors:
+            raise errors[provider.name]
+        return VERDICT
+
+    async def invoke_async(provider, *args):
+        return invoke(provider, *args)
+
+    agent._invoke_provider = invoke
+    agent._invoke_provider_async = invoke_async
+    return agent, calls
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+def test_rate_limit_spills_over_to_the_backup(run_async):
+    agent, calls = make_agent({"primary": Exception("429 Resource has been exhausted")})
+    args = ("key", "0xsender", "0xrecipient", 10.0, {}, {}, Deadline(5))
+
+    if run_async:
+        verdict = asyncio.run(agent._run_agent_async(*args))
+    else:
+        verdict = agent._run_agent(*args)
+
+    assert verdict == VERDICT
+    assert calls == ["primary", "backup"]
+    assert agent.verdict_cache["key"] == VERDICT
+    primary = agent.scheduler.providers[0]
+    assert primary.rate_limited == 1
+    assert primary.wait_time() > LLMScheduler.RATE_LIMIT_COOLDOWN_SECONDS - 1
+
+
+def test_other_errors_do_not_spill_over():
+    agent, calls = make_agent({"primary": ValueError("malformed output")})
+
+    verdict = agent._run_agent("key", "0xsender", "0xrecipient", 10.0, {}, {}, Deadline(5))
+
+    assert verdict is None
+    assert calls == ["primary"]
+    assert agent.scheduler.providers[0].rate_limited == 0
+    assert "key" not in agent.verdict_cache
@@ -0,0 +1,34 @@
+"""/metrics is served in every service mode and reports which one is active"""
+from fastapi.testclient import TestClient
+
+import main
+
+
+def scrape():
+    with TestClient(main.app) as client:
+        response = client.get("/metrics")
+    assert response.status_code == 200
+    return response.text
+
+
+def test_served_without_blockchain_stack(monkeypatch):
+    monkeypatch.setattr(main, "BLOCKCHAIN_AVAILABLE", False)
+    monkeypatch.setattr(main, "_readiness", {"rules": False, "agent": False})
+    body = scrape()
+    assert 'veto_service_mode{mode="degraded"} 1.0' in body
+    assert 'veto_service_mode{mode="agent"} 0.0' in body
+    assert "veto_fallbacks_total" in body
+
+
+def test_mode_follows_readiness(monkeypatch):
+    async def warm_up():
+        return None
+
+    monkeypatch.setattr(main, "_warm_up", warm_up)
+    monkeypatch.setattr(main, "BLOCKCHAIN_AVAILABLE", True)
+    monkeypatch.setattr(main, "_readiness", {"rules": False, "agent": False})
+    assert 'veto_service_mode{mode="starting"} 1.0' in scrape()
+    main._readiness["rules"] = True
+    body = scrape()
+    assert 'veto_service_mode{mode="rules"} 1.0' in body
+    assert 'veto_service_mode{mode="starting"} 0.0' in body
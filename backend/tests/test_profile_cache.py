@@ -0,0 +1,33 @@
+"""Profiles built from failed RPC reads must never be cached"""
+from ttl_cache import TTLCache
+from conftest import wallet_node
+
+ADDRESS = "0x00000000000000000000000000000000000000aa"
+
+def test_failed_fetch_returns_error_and_is_not_cached(make_service):
+    node = wallet_node(tx_count=601)
+    cache = TTLCache()
+    service = make_service(node, use_batch=False, profile_cache=cache)
+
+    node.down = True
+    profile = service.get_wallet_profile(ADDRESS)
+    assert "error" in profile
+    assert "transaction_count" not in profile
+    assert len(cache) == 0
+
+    # Once the node is back, the real profile is fetched (and cached)
+    node.down = False
+    profile = service.get_wallet_profile(ADDRESS)
+    assert profile["transaction_count"] == 601
+    assert profile["balance_eth"] == 2.0
+    assert len(cache) == 1
+
+def test_single_failed_read_fails_the_profile(make_service):
+    node = wallet_node(tx_count=601)
+    node.handlers["eth_getBalance"] = {"error": {"code": -32000, "message": "header not found"}}
+    cache = TTLCache()
+    service = make_service(node, use_batch=False, profile_cache=cache)
+
+    profile = service.get_wallet_profile(ADDRESS)
+    assert "error" in profile
+    assert len(cache) == 0
@@ -0,0 +1,114 @@
+"""Hot-recipient selection (count-min sketch + coldest-first eviction) and the block follower"""
+import asyncio
+import random
+from collections import Counter
+
+from address_lists import address_bytes
+from profile_prewarmer import CountMinSketch, ProfilePrewarmer
+
+def random_addresses(count, seed):
+    rng = random.Random(seed)
+    return ["0x" + rng.randbytes(20).hex() for _ in range(count)]
+
+def record_times(prewarmer, address, times):
+    for _ in range(times):
+        prewarmer.record(address)
+
+def test_sketch_never_undercounts():
+    rng = random.Random(1)
+    addresses = random_addresses(2000, seed=2)
+    stream = [rng.choice(addresses[:50]) if rng.random() < 0.5 else rng.choice(addresses) for _ in range(20000)]
+    sketch = CountMinSketch(width=256, depth=4)
+    for address in stream:
+        sketch.add(address_bytes(address))
+    for address, count in Counter(stream).items():
+        assert sketch.estimate(address_bytes(address)) >= count
+
+def test_sketch_exact_without_collisions_and_decay_halves():
+    sketch = CountMinSketch()
+    key = address_bytes(random_addresses(1, seed=3)[0])
+    for expected in range(1, 8):
+        assert sketch.add(key) == expected
+    sketch.decay()
+    assert sketch.estimate(key) == 3
+
+def test_only_repeat_recipients_become_hot():
+    prewarmer = ProfilePrewarmer(max_hot=10, min_count=3)
+    once, thrice = random_addresses(2, seed=4)
+    record_times(prewarmer, once, 1)
+    record_times(prewarmer, thrice.upper().replace("0X", "0x"), 3)
+    assert prewarmer.hot_addresses() == {thrice.lower()}
+    prewarmer.record("not an address")
+    assert prewarmer.recorded == 4
+
+def test_full_hot_set_evicts_the_coldest():
+    prewarmer = ProfilePrewarmer(max_hot=3, min_count=2)
+    a, b, c, d, e = random_addresses(5, seed=5)
+    record_times(prewarmer, a, 5)
+    record_times(prewarmer, b, 2)
+    record_times(prewarmer, c, 6)
+    # b's count rises after it was first pushed: its old heap entry is stale
+    record_times(prewarmer, b, 1)
+    # Not hotter than the coldest (b at 3): not admitted
+    record_times(prewarmer, d, 3)
+    assert prewarmer.hot_addresses() == {a, b, c}
+    # Hotter: replaces b
+    record_times(prewarmer, d, 1)
+    assert prewarmer.hot_addresses() == {a, c, d}
+    record_times(prewarmer, e, 5)
+    assert prewarmer.hot_addresses() == {a, c, e}
+
+def test_hot_set_keeps_the_heaviest_recipients():
+    rng = random.Random(6)
+    heavy = random_addresses(20, seed=7)
+    light = random_addresses(500, seed=8)
+    prewarmer = ProfilePrewarmer(max_hot=20, min_count=3, sketch_width=65536)
+    stream = heavy * 10 + [rng.choice(light) for _ in range(1000)]
+    rng.shuffle(stream)
+    for address in stream:
+        prewarmer.record(address)
+    assert prewarmer.hot_addresses() == set(heavy)
+    assert len(prewarmer._heap) <= 4 * prewarmer.max_hot
+
+def test_decay_drops_cooled_recipients():
+    prewarmer = ProfilePrewarmer(max_hot=10, min_count=3, decay_every=100)
+    warm, hot = random_addresses(2, seed=9)
+    record_times(prewarmer, warm, 4)
+    record_times(prewarmer, hot, 96)
+    assert prewarmer.hot_addresses() == {hot}
+    assert prewarmer._coldest() == (48, hot)
+
+class FakeBlockchain:
+    def __init__(self, touched):
+        self.touched = touched
+        self.scans = 0
+        self.refreshed = []
+
+    async def scan_new_blocks(self):
+        self.scans += 1
+        return 2, self.touched
+
+    async def get_wallet_profile(self, address, use_cache=True):
+        self.refreshed.append(address)
+        return {"address": address}
+
+def test_follow_once_downloads_nothing_without_hot_recipients():
+    prewarmer = ProfilePrewarmer()
+    prewarmer.blockchain = FakeBlockchain(touched=set())
+    assert asyncio.run(prewarmer.follow_once()) == 0
+    assert prewarmer.blockchain.scans == 0
+
+def test_follow_once_refreshes_touched_hot_recipients():
+    hot, cold, untouched = random_addresses(3, seed=10)
+    prewarmer = ProfilePrewarmer(min_count=1)
+    prewarmer.record(hot)
+    prewarmer.record(untouched)
+    prewarmer.blockchain = FakeBlockchain(touched={hot.upper().replace("0X", "0x"), cold})
+    assert asyncio.run(prewarmer.follow_once()) == 1
+    assert prewarmer.blockchain.refreshed == [hot]
+    assert prewarmer.refreshes == 1 and prewarmer.blocks_followed == 2
+
+    # Too many blocks to scan: every hot recipient is refreshed
+    prewarmer.blockchain = FakeBlockchain(touched=None)
+    assert asyncio.run(prewarmer.follow_once()) == 2
+    assert sorted(prewarmer.blockchain.refreshed) == sorted([hot, untouched])
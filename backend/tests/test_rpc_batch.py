@@ -0,0 +1,60 @@
+"""
+JSON-RPC batching: only a node that rejects batches outright turns
+batching off; other failures retry the one lookup sequentially
+"""
+import asyncio
+
+from conftest import wallet_node
+
+ADDRESS = "0x" + "11" * 20
+
+
+def test_batch_rejection_switches_to_sequential(make_service):
+    node = wallet_node()
+    node.reject_batches = True
+    service = make_service(node)
+
+    profile = service.get_wallet_profile(ADDRESS, use_cache=False)
+
+    assert profile["transaction_count"] == 601
+    assert service.use_batch is False
+    batches = node.batches
+    service.get_wallet_profile(ADDRESS, use_cache=False)
+    assert node.batches == batches
+
+
+def test_per_call_error_keeps_batching(make_service):
+    node = wallet_node()
+    failures = iter([{"error": {"code": -32005, "message": "rate limit exceeded"}}])
+    node.handlers["eth_getBalance"] = lambda params: next(failures, hex(2 * 10**18))
+    service = make_service(node)
+
+    profile = service.get_wallet_profile(ADDRESS, use_cache=False)
+
+    assert profile["balance_eth"] == 2.0
+    assert service.use_batch is True
+    batches = node.batches
+    service.get_wallet_profile(ADDRESS, use_cache=False)
+    assert node.batches == batches + 1
+
+
+def test_async_profile_reads_are_one_batch(make_async_service):
+    node = wallet_node()
+    service = make_async_service(node)
+
+    profile = asyncio.run(service.get_wallet_profile(ADDRESS, use_cache=False))
+
+    assert profile["transaction_count"] == 601
+    assert node.batches == 1
+    assert node.calls.count("eth_getBalance") == 1
+
+
+def test_async_batch_rejection_switches_to_separate_calls(make_async_service):
+    node = wallet_node()
+    node.reject_batches = True
+    service = make_async_service(node)
+
+    profile = asyncio.run(service.get_wallet_profile(ADDRESS, use_cache=False))
+
+    assert profile["balance_eth"] == 2.0
+    assert service.use_batch is False
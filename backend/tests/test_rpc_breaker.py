@@ -0,0 +1,80 @@
+"""
+Per-endpoint circuit breaker: a half-open endpoint gets exactly one
+trial request; other traffic stays on healthy endpoints until it succeeds
+"""
+import threading
+import time
+
+from rpc_provider import EndpointPool, PooledHTTPProvider
+
+RESULT = b'{"jsonrpc": "2.0", "id": 0, "result": "0x1"}'
+
+
+class FakeResponse:
+    content = RESULT
+
+    def __init__(self, ok: bool = True):
+        self.ok = ok
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise ConnectionError("endpoint still down")
+
+
+class FakeSession:
+    """Stands in for a requests.Session; `gate` blocks posts until set"""
+
+    def __init__(self, ok: bool = True):
+        self.ok = ok
+        self.posts = 0
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def post(self, url, **kwargs):
+        self.posts += 1
+        self.gate.wait(5)
+        return FakeResponse(self.ok)
+
+
+def make_provider(recovering_ok: bool = True):
+    pool = EndpointPool(["http://recovering", "http://healthy"], failure_threshold=1, cooldown_seconds=30)
+    recovering, healthy = pool.endpoints
+    recovering.open_until = time.monotonic() - 1  # cooldown over: half-open
+    healthy.latency_ewma = 0.05  # unmeasured endpoints rank first, so the recovering one leads
+    provider = PooledHTTPProvider(pool, hedge_min_delay=None)
+    sessions = {"http://recovering": FakeSession(recovering_ok), "http://healthy": FakeSession()}
+    provider._sessions = sessions
+    return provider, recovering, sessions
+
+
+def test_half_open_admits_a_single_trial():
+    provider, recovering, sessions = make_provider()
+    sessions["http://recovering"].gate.clear()
+
+    trial = threading.Thread(target=provider.make_request, args=("eth_blockNumber", []))
+    trial.start()
+    while not recovering.trial_in_flight:
+        time.sleep(0.001)
+
+    for _ in range(5):
+        assert provider.make_request("eth_blockNumber", [])["result"] == "0x1"
+    assert sessions["http://recovering"].posts == 1
+    assert sessions["http://healthy"].posts == 5
+
+    sessions["http://recovering"].gate.set()
+    trial.join()
+    assert recovering.stats()["circuit"] == "closed"
+    provider.make_request("eth_blockNumber", [])
+    assert sessions["http://recovering"].posts == 2
+
+
+def test_failed_trial_reopens_the_breaker():
+    provider, recovering, sessions = make_provider(recovering_ok=False)
+
+    assert provider.make_request("eth_blockNumber", [])["result"] == "0x1"
+    assert recovering.stats()["circuit"] == "open"
+    assert not recovering.trial_in_flight
+
+    provider.make_request("eth_blockNumber", [])
+    assert sessions["http://recovering"].posts == 1
+    assert sessions["http://healthy"].posts == 2
@@ -0,0 +1,52 @@
+"""Per-sender amount statistics stay finite whatever amounts reach the store"""
+import json
+import math
+
+import pytest
+
+from sender_features import SenderFeatureStore
+
+SENDER = "0x" + "aa" * 20
+RECIPIENT = "0x" + "bb" * 20
+
+
+def test_non_finite_amount_leaves_sender_stats_intact(tmp_path):
+    store = SenderFeatureStore(snapshot_path=str(tmp_path / "senders.json"))
+    for amount in (100.0, 120.0, 80.0):
+        store.observe(SENDER, RECIPIENT, amount, now=1000.0)
+
+    features = store.observe(SENDER, RECIPIENT, math.nan, now=1001.0)
+    assert features["amount_zscore"] == 0.0
+    store.observe(SENDER, RECIPIENT, math.inf, now=1002.0)
+
+    store.snapshot()
+    restored = SenderFeatureStore(snapshot_path=str(tmp_path / "senders.json"))
+    restored.load()
+    features = restored.features(SENDER, now=1003.0)
+    assert features["amount_mean"] == pytest.approx(100.0)
+    assert math.isfinite(restored.observe(SENDER, RECIPIENT, 110.0, now=1004.0)["amount_zscore"])
+
+
+def test_poisoned_snapshot_resets_amount_stats(tmp_path):
+    path = tmp_path / "senders.json"
+    store = SenderFeatureStore(snapshot_path=str(path))
+    store.observe(SENDER, RECIPIENT, 100.0, now=1000.0)
+    store.snapshot()
+    data = json.loads(path.read_text())
+    data["senders"][SENDER.lower()]["mean"] = math.nan
+    path.write_text(json.dumps(data))
+
+    restored = SenderFeatureStore(snapshot_path=str(path))
+    restored.load()
+    features = restored.observe(SENDER, RECIPIENT, 100.0, now=1001.0)
+    assert features["prior_transfers"] == 0
+    assert restored.features(SENDER, now=1002.0)["amount_mean"] == 100.0
+
+
+@pytest.mark.parametrize("amount", [0, -5.0])
+def test_api_rejects_amounts_that_are_not_transfers(amount):
+    from pydantic import ValidationError
+    from main import TransferRequest
+
+    with pytest.raises(ValidationError):
+        TransferRequest(sender=SENDER, recipient=RECIPIENT, amount=amount)
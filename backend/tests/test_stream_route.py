@@ -0,0 +1,151 @@
+"""/api/analyze-transfer/stream: SSE event order, done/error events, and cancellation when the client goes away"""
+import asyncio
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+TRANSFER = {"sender": "0x" + "aa" * 20, "recipient": "0x" + "bb" * 20, "amount": 250.0}
+VERDICT = {"risk_score": 55, "risk_level": "MEDIUM", "vault_delay_seconds": 3600}
+DONE = {**VERDICT, "scam_explanation": "Fresh wallet.", "analysis_tier": "agent"}
+
+
+class StreamingAgent:
+    """stream_transaction plays back `script`: (event, data) pairs, or an exception to raise"""
+
+    def __init__(self, script):
+        self.script = script
+        self.closed = False
+        self.cancelled = False
+
+    async def stream_transaction(self, sender, recipient, amount, explain=False, deadline=None):
+        try:
+            for step in self.script:
+                if isinstance(step, Exception):
+                    raise step
+                if step == "hang":
+                    # A slow LLM: only ends when the request is cancelled
+                    await asyncio.Event().wait()
+                yield step
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def serve(monkeypatch):
+    def serve(script):
+        agent = StreamingAgent(script)
+        monkeypatch.setattr(main, "BLOCKCHAIN_AVAILABLE", True)
+        monkeypatch.setattr(main, "_readiness", {"rules": True, "agent": True})
+        monkeypatch.setattr(main, "get_fraud_agent", lambda: agent)
+        return agent
+    return serve
+
+
+def parse_sse(body):
+    events = []
+    for message in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def stream(payload=TRANSFER):
+    with TestClient(main.app) as client:
+        with client.stream("POST", "/api/analyze-transfer/stream", json=payload) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            return parse_sse(response.read().decode())
+
+
+@pytest.fixture(autouse=True)
+def no_startup(monkeypatch):
+    # TestClient runs the startup hooks: keep them off the network
+    async def warm_up():
+        return None
+    monkeypatch.setattr(main, "_warm_up", warm_up)
+
+
+def test_verdict_then_explanation_then_done(serve):
+    serve([
+        ("verdict", VERDICT),
+        ("explanation", {"delta": "Fresh "}),
+        ("explanation", {"delta": "wallet."}),
+        ("done", DONE)
+    ])
+    events = stream()
+    assert [event for event, _ in events] == ["verdict", "explanation", "explanation", "done"]
+    assert events[0][1] == VERDICT
+    assert "".join(data["delta"] for event, data in events if event == "explanation") == "Fresh wallet."
+    assert events[-1][1] == {**DONE, "stages_cut_short": []}
+
+
+def test_failure_after_verdict_ends_with_error_event(serve):
+    serve([("verdict", VERDICT), ("explanation", {"delta": "Fresh "}), RuntimeError("provider went away")])
+    events = stream()
+    assert [event for event, _ in events] == ["verdict", "explanation", "error"]
+    assert events[-1][1] == {"detail": "provider went away"}
+
+
+def test_failure_before_verdict_still_sends_verdict_and_done(serve):
+    serve([RuntimeError("profile fetch failed")])
+    events = stream()
+    assert [event for event, _ in events] == ["verdict", "done"]
+    assert events[0][1] == events[1][1]
+
+
+def test_invalid_recipient_rejected_before_streaming(serve):
+    serve([("verdict", VERDICT)])
+    with TestClient(main.app) as client:
+        response = client.post("/api/analyze-transfer/stream", json={**TRANSFER, "recipient": "nope"})
+    assert response.status_code == 400
+
+
+def test_client_disconnect_cancels_the_agent_stream(serve):
+    agent = serve([("verdict", VERDICT), "hang", ("done", DONE)])
+
+    async def run():
+        first_chunk = asyncio.Event()
+        sent = []
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": json.dumps(TRANSFER).encode(), "more_body": False}
+            # The client reads the verdict, then hangs up
+            await first_chunk.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and message.get("body"):
+                first_chunk.set()
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": "/api/analyze-transfer/stream",
+            "raw_path": b"/api/analyze-transfer/stream",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"content-type", b"application/json")],
+            "client": ("testclient", 50000),
+            "server": ("testserver", 80)
+        }
+        await asyncio.wait_for(main.app(scope, receive, send), timeout=5)
+        return sent
+
+    sent = asyncio.run(run())
+    bodies = [message["body"].decode() for message in sent if message["type"] == "http.response.body" and message.get("body")]
+    assert [event for event, _ in parse_sse("".join(bodies))] == ["verdict"]
+    assert agent.cancelled and agent.closed
@@ -0,0 +1,27 @@
+"""
+Non-finite transfer amounts: rejected at the API, and never able to
+break the agent verdict cache key
+"""
+import math
+
+import pytest
+from pydantic import ValidationError
+
+SENDER = "0x" + "aa" * 20
+RECIPIENT = "0x" + "bb" * 20
+
+
+@pytest.mark.parametrize("amount", [math.inf, -math.inf, math.nan])
+def test_transfer_request_rejects_non_finite_amounts(amount):
+    from main import TransferRequest
+
+    with pytest.raises(ValidationError):
+        TransferRequest(sender=SENDER, recipient=RECIPIENT, amount=amount)
+
+
+def test_verdict_key_handles_infinite_amount():
+    from fraud_agent import FraudDetectionAgent
+
+    profile = {"address": RECIPIENT, "transaction_count": 5, "wallet_age_days": 3, "balance_eth": 1.0}
+    key = FraudDetectionAgent.verdict_key(None, RECIPIENT, math.inf, profile, {"patterns_detected": []})
+    assert key[1] is None
@@ -0,0 +1,72 @@
+"""Incrementally maintained hop labels must match a full relabel of the same graph"""
+import random
+
+import pytest
+
+from transfer_graph import TransferGraph
+
+
+def address(i: int) -> bytes:
+    return i.to_bytes(20, "big")
+
+
+def labels(graph: TransferGraph) -> dict:
+    return {key: int(graph._hops[node]) for key, node in graph._ids.items()}
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_labels_match_full_relabel(seed):
+    rng = random.Random(seed)
+    flagged = {address(i) for i in rng.sample(range(300), 6)}
+    # Skewed endpoints so some wallets cross hub_degree part-way through
+    pairs = list(dict.fromkeys(
+        (address(int(rng.paretovariate(0.8)) % 300), address(rng.randrange(300)))
+        for _ in range(1500)
+    ))
+
+    incremental = TransferGraph(flagged.__contains__, hub_degree=5, compact_edges=200)
+    for start in range(0, len(pairs), 37):
+        incremental.add_edges(pairs[start:start + 37])
+
+    full = TransferGraph(flagged.__contains__, hub_degree=5)
+    full.load(pairs)
+
+    assert labels(incremental) == labels(full)
+
+
+def test_labels_passed_on_before_becoming_a_hub_are_withdrawn():
+    scam, mule, hub = address(1), address(2), address(3)
+    graph = TransferGraph({scam}.__contains__, hub_degree=3)
+    graph.add_edges([(scam, mule), (mule, hub), (hub, address(10))])
+    assert graph.proximity("0x" + address(10).hex())["hops_to_flagged"] == 3
+
+    # The middle wallet turns out to be an exchange
+    graph.add_edges([(address(20 + i), mule) for i in range(3)])
+
+    assert graph.proximity("0x" + mule.hex())["hops_to_flagged"] == 1
+    assert graph.proximity("0x" + hub.hex())["hops_to_flagged"] is None
+    assert graph.proximity("0x" + address(10).hex())["hops_to_flagged"] is None
+
+
+def test_indexer_updates_the_graph_after_commit_outside_its_lock(tmp_path):
+    pytest.importorskip("eth_tester")
+    from web3 import EthereumTesterProvider, Web3
+    from chain_indexer import TransferIndexer
+
+    w3 = Web3(EthereumTesterProvider())
+    sender, recipient = w3.eth.accounts[:2]
+    w3.eth.send_transaction({"from": sender, "to": recipient, "value": Web3.to_wei(0.001, "ether")})
+    held = []
+
+    class Graph(TransferGraph):
+        def add_edges(self, edges):
+            held.append(indexer._lock.locked() or indexer.db.in_transaction)
+            return super().add_edges(edges)
+
+    indexer = TransferIndexer(
+        w3, str(tmp_path / "index.db"), index_eth=True, start_block=0, graph=Graph(lambda key: False)
+    )
+    indexer.sync_once()
+
+    assert held == [False]
+    assert indexer.graph.proximity(recipient)["fan_in"] == 1
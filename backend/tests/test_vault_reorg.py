@@ -0,0 +1,111 @@
+"""Vault indexer counters and reorg rollback against an in-process chain"""
+import pytest
+
+pytest.importorskip("eth_tester")
+from web3 import EthereumTesterProvider, Web3
+
+from vault_indexer import VaultIndexer
+
+FUNDS_LOCKED = Web3.keccak(text="FundsLocked(uint256,address,address,uint256,uint256,string)")
+FUNDS_RECALLED = Web3.keccak(text="FundsRecalled(uint256,address,uint256)")
+
+# Test contract: emits LOG3/LOG4 with the topics and data passed in calldata
+# (four 32-byte topic words, zero-padded, then the data)
+_RUNTIME = bytes.fromhex(
+    "60803603" "806080600037" "606035" "80156020" "57" "604035602035600035"
+    "846000a400" "5b50604035602035600035836000a300"
+)
+_INIT = bytes([0x60, len(_RUNTIME), 0x60, 0x0c, 0x60, 0x00, 0x39, 0x60, len(_RUNTIME), 0x60, 0x00, 0xf3]) + _RUNTIME
+
+def _word(value) -> bytes:
+    if isinstance(value, int):
+        return value.to_bytes(32, "big")
+    if isinstance(value, str):
+        return bytes(12) + bytes.fromhex(value[2:])
+    return bytes(value)
+
+@pytest.fixture
+def chain(tmp_path):
+    provider = EthereumTesterProvider()
+    w3 = Web3(provider)
+    deployer = w3.eth.accounts[0]
+    receipt = w3.eth.get_transaction_receipt(w3.eth.send_transaction({"from": deployer, "data": _INIT}))
+    vault = receipt["contractAddress"]
+
+    def lock(tx_id: int, sender: str, amount: int = 10**18):
+        topics = [FUNDS_LOCKED, tx_id, sender, w3.eth.accounts[9]]
+        data = b"".join(_word(t) for t in topics) + amount.to_bytes(32, "big")
+        w3.eth.send_transaction({"from": deployer, "to": vault, "data": data, "gas": 200000})
+
+    def recall(tx_id: int, sender: str, amount: int = 10**18):
+        topics = [FUNDS_RECALLED, tx_id, sender, 0]
+        data = b"".join(_word(t) for t in topics) + amount.to_bytes(32, "big")
+        w3.eth.send_transaction({"from": deployer, "to": vault, "data": data, "gas": 200000})
+
+    def empty_block():
+        w3.eth.send_transaction({"from": deployer, "to": w3.eth.accounts[8], "value": 1})
+
+    indexer = VaultIndexer(w3, str(tmp_path / "vault.db"), vault, start_block=0)
+    return w3, provider.ethereum_tester, indexer, lock, recall, empty_block
+
+def test_reorg_of_block_without_stored_hash_is_reindexed(chain):
+    w3, tester, indexer, lock, _, empty_block = chain
+    alice, bob = w3.eth.accounts[1], w3.eth.accounts[2]
+
+    lock(1, alice)                     # event block: hash stored
+    snapshot = tester.take_snapshot()
+    empty_block()                      # no hash stored for this block
+    empty_block()                      # chunk end: hash stored
+    indexer.sync_once()
+    assert indexer.get_user_stats(alice)["active_locks"] == 1
+
+    # New branch from the event block: bob's lock lands in the block that
+    # had no stored hash, the old chunk-end block is replaced too
+    tester.revert_to_snapshot(snapshot)
+    lock(2, bob)
+    empty_block()
+    empty_block()
+
+    indexer.sync_once()
+    assert indexer.get_user_stats(alice)["active_locks"] == 1
+    assert indexer.get_user_stats(bob)["active_locks"] == 1
+    assert indexer.get_checkpoint() == w3.eth.block_number
+
+def test_reorg_below_every_stored_hash_reindexes_from_start(chain):
+    w3, tester, indexer, lock, _, empty_block = chain
+    alice, bob = w3.eth.accounts[1], w3.eth.accounts[2]
+
+    snapshot = tester.take_snapshot()
+    lock(1, alice)
+    empty_block()
+    indexer.sync_once()
+    assert indexer.get_user_stats(alice)["active_locks"] == 1
+
+    tester.revert_to_snapshot(snapshot)
+    lock(2, bob)
+    empty_block()
+    empty_block()
+
+    indexer.sync_once()
+    assert indexer.get_user_stats(alice)["active_locks"] == 0
+    assert indexer.get_user_stats(bob)["active_locks"] == 1
+
+def test_recall_of_lock_from_before_indexing_started(chain, tmp_path):
+    w3, _, indexer, lock, recall, _ = chain
+    alice = w3.eth.accounts[1]
+
+    lock(1, alice)
+    late = VaultIndexer(w3, str(tmp_path / "late.db"), indexer.vault_address, start_block=w3.eth.block_number + 1)
+    lock(2, alice)
+    recall(1, alice)
+    recall(2, alice)
+
+    late.sync_once()
+    stats = late.get_user_stats(alice)
+    assert stats["active_locks"] == 0
+    assert stats["scams_prevented"] == 2
+
+    indexer.sync_once()
+    stats = indexer.get_user_stats(alice)
+    assert stats["active_locks"] == 0
+    assert stats["scams_prevented"] == 2
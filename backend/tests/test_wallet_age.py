@@ -0,0 +1,35 @@
+"""Wallet age is measured on the chain's clock and estimates are labelled"""
+import blockchain_service
+from conftest import wallet_node
+
+ADDRESS = "0x00000000000000000000000000000000000000bb"
+DAY = 86400
+
+class StubHead:
+    """Chain head tracker with a fixed head, far from the wall clock"""
+    chain_id = 1
+
+    def __init__(self, block_number: int, timestamp: int):
+        self.block_number = block_number
+        self.timestamp = timestamp
+
+    def head(self):
+        return self.block_number
+
+    def head_timestamp(self):
+        return self.timestamp
+
+def test_age_is_measured_against_the_head_timestamp(make_service, monkeypatch):
+    head_time = 1_000_000_000  # 2001: the wall clock would add decades
+    monkeypatch.setitem(blockchain_service._first_activity, blockchain_service.Web3.to_checksum_address(ADDRESS), (10, head_time - 40 * DAY))
+    service = make_service(wallet_node(tx_count=50), use_batch=False, age_binary_search=True, chain_head=StubHead(1000, head_time))
+
+    profile = service.get_wallet_profile(ADDRESS)
+    assert profile["wallet_age_days"] == 40
+    assert profile["age_source"] == "first_activity"
+
+def test_receive_only_wallet_age_is_reported_as_estimate(make_service):
+    service = make_service(wallet_node(tx_count=0, balance_wei=10**18), use_batch=False, age_binary_search=True)
+
+    profile = service.get_wallet_profile(ADDRESS)
+    assert profile["age_source"] == "estimate"
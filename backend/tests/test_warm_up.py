@@ -0,0 +1,57 @@
+"""Startup: a failed first connection is retried, and verdicts are refused (never mocked) until rules are ready"""
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import main
+
+
+@pytest.fixture
+def flaky_chain(monkeypatch):
+    """The chain is unreachable for the first two connection attempts"""
+    attempts = []
+
+    def connect():
+        attempts.append(1)
+        if len(attempts) <= 2:
+            raise ConnectionError("node unreachable")
+
+    async def async_service():
+        return object()
+
+    monkeypatch.setattr(main, "BLOCKCHAIN_AVAILABLE", True)
+    monkeypatch.setattr(main, "_readiness", {"rules": False, "agent": False})
+    monkeypatch.setattr(main, "WARM_UP_RETRY_SECONDS", 0.01)
+    monkeypatch.setattr(main, "get_blockchain_service", connect)
+    monkeypatch.setattr(main, "get_async_blockchain_service", async_service)
+    monkeypatch.setattr(main, "get_risk_engine", lambda: None)
+    monkeypatch.setattr(main, "get_profile_prewarmer", lambda: None)
+    monkeypatch.setattr(main, "get_transfer_indexer", lambda: None)
+    monkeypatch.setattr(main, "get_vault_indexer", lambda: None)
+    monkeypatch.setattr(main, "get_fraud_agent", lambda: None)
+    return attempts
+
+
+def test_failed_warm_up_is_retried_until_ready(flaky_chain):
+    async def run():
+        task = asyncio.create_task(main._warm_up())
+        await asyncio.sleep(0)
+        # Still connecting: no mock verdicts, the caller is told to retry
+        assert main._service_mode() == "starting"
+        with pytest.raises(HTTPException) as raised:
+            main._require_started()
+        assert raised.value.status_code == 503
+        await asyncio.wait_for(task, timeout=5)
+
+    asyncio.run(run())
+    assert len(flaky_chain) == 3
+    assert main._service_mode() == "agent"
+
+
+def test_mock_verdicts_only_without_blockchain_stack(monkeypatch):
+    monkeypatch.setattr(main, "_readiness", {"rules": False, "agent": False})
+    monkeypatch.setattr(main, "BLOCKCHAIN_AVAILABLE", True)
+    assert main._service_mode() == "starting"
+    monkeypatch.setattr(main, "BLOCKCHAIN_AVAILABLE", False)
+    assert main._service_mode() == "degraded"
@@ -0,0 +1,259 @@
+"""
+Transfer Graph - Local wallet graph for proximity-to-scam scoring
+Interned addresses, CSR adjacency with an append-only delta, per-wallet
+fan-in/fan-out and incrementally maintained hops-to-nearest-flagged labels
+"""
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import threading
+
+import numpy as np
+
+from address_lists import address_bytes
+
+# hops value for wallets with no flagged address within MAX_HOPS
+UNREACHED = 255
+
+class TransferGraph:
+    """
+    Directed transfer edges (sender -> recipient, each pair once) over
+    interned addresses. Neighbors for proximity are undirected: funds
+    moving either way tie two wallets together.
+
+    Adjacency is a CSR (offsets/targets arrays) plus a dict of edges added
+    since the last compaction; the delta is merged into the CSR once it
+    holds compact_edges edges. hops[i] is the distance from wallet i to the
+    nearest flagged wallet (capped at max_hops). New edges and new flags
+    only ever shorten distances, so they are applied by relaxing outwards
+    from the changed wallets instead of recomputing. High-degree hubs
+    (exchanges, routers) get a label but don't pass it on, otherwise every
+    wallet would sit two hops from a scam. Removing flags needs a full
+    relabel, done when the flag source's version changes; so does a
+    labelled wallet becoming a hub, since labels it passed on before
+    crossing hub_degree must be withdrawn.
+    """
+
+    def __init__(
+        self,
+        is_flagged: Callable[[bytes], bool],
+        flag_version: Callable[[], int] = lambda: 0,
+        max_hops: int = 3,
+        hub_degree: int = 1000,
+        compact_edges: int = 50000
+    ):
+        self.is_flagged = is_flagged
+        self.flag_version = flag_version
+        self.max_hops = max_hops
+        self.hub_degree = hub_degree
+        self.compact_edges = compact_edges
+        self._lock = threading.Lock()
+
+        # Interning: 20-byte address <-> node id
+        self._ids: Dict[bytes, int] = {}
+        self._keys: List[bytes] = []
+
+        # Per-node arrays, grown by doubling
+        self._fan_in = np.zeros(1024, dtype=np.int32)
+        self._fan_out = np.zeros(1024, dtype=np.int32)
+        self._hops = np.full(1024, UNREACHED, dtype=np.uint8)
+
+        # Undirected CSR adjacency and the not-yet-compacted delta
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._targets = np.zeros(0, dtype=np.int32)
+        self._delta: Dict[int, List[int]] = {}
+        self._delta_edges = 0
+
+        self._seen_flag_version = flag_version()
+        self.edges = 0
+        self.flagged = 0
+        self.compactions = 0
+        self.relabels = 0
+
+    # ============================================
+    # Updates
+    # ============================================
+
+    def add_edges(self, edges: Iterable[Tuple[bytes, bytes]]) -> int:
+        """
+        Add new directed (sender, recipient) edges - each pair only once,
+        the caller deduplicates. Returns the number of wallets whose label
+        changed.
+        """
+        with self._lock:
+            if self.flag_version() != self._seen_flag_version:
+                self._relabel()
+            changed = 0
+            new_hub = False
+            for sender, recipient in edges:
+                u, v = self._intern(sender), self._intern(recipient)
+                self._fan_out[u] += 1
+                self._fan_in[v] += 1
+                new_hub = new_hub or self._became_hub(u) or self._became_hub(v)
+                self._delta.setdefault(u, []).append(v)
+                self._delta.setdefault(v, []).append(u)
+                self._delta_edges += 1
+                self.edges += 1
+                changed += self._relax_edge(u, v) + self._relax_edge(v, u)
+            if self._delta_edges >= self.compact_edges:
+                self._compact()
+            if new_hub:
+                before = self._hops[:len(self._keys)].copy()
+                self._relabel()
+                changed = int(np.count_nonzero(before != self._hops[:len(self._keys)]))
+            return changed
+
+    def load(self, edges: Iterable[Tuple[bytes, bytes]]) -> None:
+        """Bulk-build from stored edges (startup): one CSR build and one labelling pass"""
+        with self._lock:
+            senders, recipients = [], []
+            for sender, recipient in edges:
+                senders.append(self._intern(sender))
+                recipients.append(self._intern(recipient))
+            u = np.array(senders, dtype=np.int32)
+            v = np.array(recipients, dtype=np.int32)
+            n = len(self._keys)
+            self._fan_out[:n] += np.bincount(u, minlength=n).astype(np.int32)
+            self._fan_in[:n] += np.bincount(v, minlength=n).astype(np.int32)
+            self.edges += len(u)
+            self._build_csr(np.concatenate([u, v]), np.concatenate([v, u]))
+            self._relabel()
+
+    def refresh_flags(self) -> None:
+        """Re-check every wallet against the flag source (e.g. after a scam list swap)"""
+        with self._lock:
+            self._relabel()
+
+    def _intern(self, key: bytes) -> int:
+        node = self._ids.get(key)
+        if node is not None:
+            return node
+        node = len(self._keys)
+        if node >= len(self._hops):
+            size = len(self._hops) * 2
+            self._fan_in = np.resize(self._fan_in, size)
+            self._fan_in[node:] = 0
+            self._fan_out = np.resize(self._fan_out, size)
+            self._fan_out[node:] = 0
+            self._hops = np.resize(self._hops, size)
+            self._hops[node:] = UNREACHED
+        if self.is_flagged(key):
+            self._hops[node] = 0
+            self.flagged += 1
+        # Published last: lookups never see an id the arrays don't cover yet
+        self._keys.append(key)
+        self._ids[key] = node
+        return node
+
+    # ============================================
+    # Labels
+    # ============================================
+
+    def _neighbors(self, node: int):
+        if node + 1 < len(self._offsets):
+            yield from self._targets[self._offsets[node]:self._offsets[node + 1]].tolist()
+        yield from self._delta.get(node, ())
+
+    def _became_hub(self, node: int) -> bool:
+        """Degree just crossed hub_degree while the wallet could pass its label on"""
+        return (
+            self._fan_in[node] + self._fan_out[node] == self.hub_degree + 1
+            and 0 < self._hops[node] < self.max_hops
+        )
+
+    def _relax_edge(self, u: int, v: int) -> int:
+        """Label v through u if that's shorter, then propagate from v"""
+        hops_u = int(self._hops[u])
+        if hops_u >= self.max_hops or hops_u + 1 >= self._hops[v]:
+            return 0
+        if hops_u > 0 and self._fan_in[u] + self._fan_out[u] > self.hub_degree:
+            return 0
+        self._hops[v] = hops_u + 1
+        return 1 + self._propagate([v])
+
+    def _propagate(self, frontier: List[int]) -> int:
+        """Breadth-first relaxation from wallets whose label just dropped"""
+        changed = 0
+        queue = deque(frontier)
+        while queue:
+            node = queue.popleft()
+            hops = int(self._hops[node]) + 1
+            if hops > self.max_hops:
+                continue
+            if hops > 1 and self._fan_in[node] + self._fan_out[node] > self.hub_degree:
+                continue
+            for neighbor in self._neighbors(node):
+                if self._hops[neighbor] > hops:
+                    self._hops[neighbor] = hops
+                    changed += 1
+                    queue.append(neighbor)
+        return changed
+
+    def _relabel(self) -> None:
+        """Full labelling from scratch: the only way to handle unflagged wallets"""
+        self._seen_flag_version = self.flag_version()
+        n = len(self._keys)
+        self._hops[:] = UNREACHED
+        flagged = [node for node in range(n) if self.is_flagged(self._keys[node])]
+        self._hops[flagged] = 0
+        self.flagged = len(flagged)
+        self._propagate(flagged)
+        self.relabels += 1
+
+    # ============================================
+    # Compaction
+    # ============================================
+
+    def _compact(self) -> None:
+        """Merge the delta into the CSR arrays"""
+        rows, cols = [], []
+        for node, neighbors in self._delta.items():
+            rows.extend([node] * len(neighbors))
+            cols.extend(neighbors)
+        n = len(self._keys)
+        old_rows = np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int32), np.diff(self._offsets))
+        self._build_csr(
+            np.concatenate([old_rows, np.array(rows, dtype=np.int32)]),
+            np.concatenate([self._targets, np.array(cols, dtype=np.int32)]),
+            n
+        )
+        self.compactions += 1
+
+    def _build_csr(self, rows: np.ndarray, cols: np.ndarray, n: Optional[int] = None) -> None:
+        n = len(self._keys) if n is None else n
+        order = np.argsort(rows, kind="stable")
+        self._targets = cols[order].astype(np.int32)
+        self._offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=self._offsets[1:])
+        self._delta = {}
+        self._delta_edges = 0
+
+    # ============================================
+    # Lookups
+    # ============================================
+
+    def proximity(self, address: str) -> Optional[Dict]:
+        """
+        Graph signals for an address: hops to the nearest flagged wallet
+        (None beyond max_hops) and distinct counterparties each way.
+        None if the address has never been seen in an indexed transfer.
+        """
+        key = address_bytes(address)
+        node = self._ids.get(key) if key is not None else None
+        if node is None:
+            return None
+        hops = int(self._hops[node])
+        return {
+            "hops_to_flagged": hops if hops <= self.max_hops else None,
+            "fan_in": int(self._fan_in[node]),
+            "fan_out": int(self._fan_out[node])
+        }
+
+    def stats(self) -> Dict:
+        return {
+            "wallets": len(self._keys),
+            "edges": self.edges,
+            "flagged": self.flagged,
+            "pending_edges": self._delta_edges,
+            "compactions": self.compactions,
+            "relabels": self.relabels
+        }
@@ -0,0 +1,263 @@
+"""
+Vault Indexer - VetoVault event store
+Maintains per-user vault counters from FundsLocked / FundsReleased /
+FundsRecalled events so /api/vault-status is a single-row lookup
+"""
+from web3 import Web3
+from typing import Dict, List, Optional, Tuple
+import os
+import threading
+from chain_head import get_chain_head_tracker
+from chain_indexer import ChainIndexer
+from rpc_provider import create_web3
+
+FUNDS_LOCKED_TOPIC = Web3.keccak(text="FundsLocked(uint256,address,address,uint256,uint256,string)").to_0x_hex()
+FUNDS_RELEASED_TOPIC = Web3.keccak(text="FundsReleased(uint256,address,uint256)").to_0x_hex()
+FUNDS_RECALLED_TOPIC = Web3.keccak(text="FundsRecalled(uint256,address,uint256)").to_0x_hex()
+
+class VaultIndexer(ChainIndexer):
+    """
+    Indexes VetoVault events into materialized per-user counters:
+    - active_locks: transfers currently held in the vault
+    - total_protected: MNEE ever routed through the vault
+    - scams_prevented: transfers the sender recalled
+
+    Every applied event stores its counter deltas, so blocks replaced by a
+    reorg can be rolled back exactly. Hashes of recently indexed blocks are
+    kept for reorg_depth blocks; deeper history is treated as final.
+    """
+
+    def __init__(
+        self,
+        w3: Web3,
+        db_path: str,
+        vault_address: str,
+        token_decimals: int = 18,
+        reorg_depth: int = 64,
+        **kwargs
+    ):
+        self.vault_address = Web3.to_checksum_address(vault_address)
+        self.token_decimals = token_decimals
+        self.reorg_depth = reorg_depth
+        super().__init__(w3, db_path, name="vault", **kwargs)
+
+    def _create_tables(self) -> None:
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS vault_user_stats (
+                user TEXT PRIMARY KEY,
+                active_locks INTEGER NOT NULL DEFAULT 0,
+                total_protected REAL NOT NULL DEFAULT 0,
+                scams_prevented INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS vault_locks (
+                tx_id INTEGER PRIMARY KEY,
+                sender TEXT NOT NULL,
+                block INTEGER NOT NULL
+            )
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS vault_events (
+                block INTEGER NOT NULL,
+                log_index INTEGER NOT NULL,
+                user TEXT NOT NULL,
+                d_active INTEGER NOT NULL,
+                d_protected REAL NOT NULL,
+                d_scams INTEGER NOT NULL,
+                PRIMARY KEY (block, log_index)
+            )
+        """)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS vault_block_hashes (block INTEGER PRIMARY KEY, hash TEXT NOT NULL)"
+        )
+
+    # ============================================
+    # Indexing
+    # ============================================
+
+    def sync_once(self) -> int:
+        self._rollback_reorged_blocks()
+        return super().sync_once()
+
+    def _process_range(self, from_block: int, to_block: int) -> Tuple[List[Dict], Dict[int, str]]:
+        logs = self.w3.eth.get_logs({
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "address": self.vault_address,
+            "topics": [[FUNDS_LOCKED_TOPIC, FUNDS_RELEASED_TOPIC, FUNDS_RECALLED_TOPIC]]
+        })
+
+        events = []
+        hashes = {to_block: self.w3.eth.get_block(to_block)["hash"].to_0x_hex()}
+        for log in logs:
+            topics = [t.to_0x_hex() for t in log["topics"]]
+            data = bytes(log["data"])
+            events.append({
+                "topic": topics[0],
+                "tx_id": int(topics[1], 16),
+                "account": Web3.to_checksum_address("0x" + topics[2][-40:]),
+                "amount": int.from_bytes(data[0:32], "big") / 10 ** self.token_decimals,
+                "block": log["blockNumber"],
+                "log_index": log["logIndex"]
+            })
+            hashes[log["blockNumber"]] = log["blockHash"].to_0x_hex()
+        return events, hashes
+
+    def _store(self, rows: Tuple[List[Dict], Dict[int, str]]) -> None:
+        events, hashes = rows
+        for event in events:
+            self._apply(event)
+
+        self.db.executemany(
+            "INSERT OR REPLACE INTO vault_block_hashes (block, hash) VALUES (?, ?)",
+            hashes.items()
+        )
+        if hashes:
+            self.db.execute(
+                "DELETE FROM vault_block_hashes WHERE block < ?",
+                (max(hashes) - self.reorg_depth,)
+            )
+
+    def _apply(self, event: Dict) -> None:
+        """Turn one event into counter deltas and apply them"""
+        topic = event["topic"]
+        if topic == FUNDS_LOCKED_TOPIC:
+            # topics: txId, sender, receiver
+            user = event["account"]
+            deltas = (1, event["amount"], 0)
+            self.db.execute(
+                "INSERT OR REPLACE INTO vault_locks (tx_id, sender, block) VALUES (?, ?, ?)",
+                (event["tx_id"], user, event["block"])
+            )
+        elif topic == FUNDS_RECALLED_TOPIC:
+            # topics: txId, sender. A lock from before indexing started was
+            # never counted as active, but the prevented scam still counts
+            user = event["account"]
+            locked = self.db.execute("SELECT 1 FROM vault_locks WHERE tx_id = ?", (event["tx_id"],)).fetchone()
+            deltas = (-1 if locked is not None else 0, 0.0, 1)
+        else:
+            # FundsReleased topics: txId, receiver - counters belong to the original sender
+            row = self.db.execute("SELECT sender FROM vault_locks WHERE tx_id = ?", (event["tx_id"],)).fetchone()
+            if row is None:
+                return  # Locked before indexing started
+            user = row[0]
+            deltas = (-1, 0.0, 0)
+
+        self.db.execute(
+            "INSERT OR IGNORE INTO vault_events VALUES (?, ?, ?, ?, ?, ?)",
+            (event["block"], event["log_index"], user, *deltas)
+        )
+        self._add_to_user(user, *deltas)
+
+    def _add_to_user(self, user: str, d_active: int, d_protected: float, d_scams: int) -> None:
+        self.db.execute(
+            "INSERT INTO vault_user_stats (user, active_locks, total_protected, scams_prevented) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT(user) DO UPDATE SET "
+            "active_locks = active_locks + excluded.active_locks, "
+            "total_protected = total_protected + excluded.total_protected, "
+            "scams_prevented = scams_prevented + excluded.scams_prevented",
+            (user, d_active, d_protected, d_scams)
+        )
+
+    # ============================================
+    # Reorg handling
+    # ============================================
+
+    def _rollback_reorged_blocks(self) -> Optional[int]:
+        """
+        Compare stored block hashes with the chain, newest first. If the
+        checkpoint block was replaced, undo every event above the newest
+        block that still matches and rewind the checkpoint there.
+        Returns the block rolled back to, or None if nothing changed.
+        """
+        with self._lock:
+            stored = self.db.execute(
+                "SELECT block, hash FROM vault_block_hashes ORDER BY block DESC"
+            ).fetchall()
+        if not stored:
+            return None
+
+        # Hashes are only stored for chunk ends and event blocks, so the fork
+        # can be anywhere above the newest stored block that still matches
+        reorged = False
+        rollback_to = (self.start_block or 0) - 1  # nothing matches: reindex everything
+        for block, stored_hash in stored:
+            chain_block = self.w3.eth.get_block(block)
+            if chain_block is not None and chain_block["hash"].to_0x_hex() == stored_hash:
+                rollback_to = block
+                break
+            reorged = True
+        if not reorged:
+            return None
+
+        # Every block after rollback_to may have been replaced
+        with self._lock, self.db:
+            reverted = self.db.execute(
+                "SELECT user, d_active, d_protected, d_scams FROM vault_events WHERE block > ?",
+                (rollback_to,)
+            ).fetchall()
+            for user, d_active, d_protected, d_scams in reverted:
+                self._add_to_user(user, -d_active, -d_protected, -d_scams)
+            self.db.execute("DELETE FROM vault_events WHERE block > ?", (rollback_to,))
+            self.db.execute("DELETE FROM vault_locks WHERE block > ?", (rollback_to,))
+            self.db.execute("DELETE FROM vault_block_hashes WHERE block > ?", (rollback_to,))
+            self._save_checkpoint(rollback_to)
+        print(f"⚠️ Vault indexer: reorg detected, rolled back {len(reverted)} events to block {rollback_to}")
+        return rollback_to
+
+    # ============================================
+    # Lookups
+    # ============================================
+
+    def get_user_stats(self, address: str) -> Dict:
+        """Materialized vault counters for a sender (zeros if never seen)"""
+        with self._lock:
+            row = self.db.execute(
+                "SELECT active_locks, total_protected, scams_prevented FROM vault_user_stats WHERE user = ?",
+                (Web3.to_checksum_address(address),)
+            ).fetchone()
+        active_locks, total_protected, scams_prevented = row or (0, 0.0, 0)
+        return {
+            "active_locks": active_locks,
+            "total_protected": total_protected,
+            "scams_prevented": scams_prevented
+        }
+
+# Singleton instance
+_vault_indexer: Optional[VaultIndexer] = None
+_vault_indexer_lock = threading.Lock()
+
+def get_vault_indexer() -> Optional[VaultIndexer]:
+    """Get or create the vault indexer (None unless VAULT_INDEXER_ENABLED=true)"""
+    global _vault_indexer
+    if _vault_indexer is None and os.getenv("VAULT_INDEXER_ENABLED", "false").lower() == "true":
+        with _vault_indexer_lock:
+            if _vault_indexer is None:
+                vault_address = os.getenv("VETO_VAULT_ADDRESS")
+                if not vault_address:
+                    raise Exception("VETO_VAULT_ADDRESS not set in environment")
+                _vault_indexer = VaultIndexer(
+                    create_web3(),
+                    db_path=os.getenv("INDEXER_DB_PATH", "veto_index.db"),
+                    vault_address=vault_address,
+                    token_decimals=int(os.getenv("MNEE_DECIMALS", 18)),
+                    reorg_depth=int(os.getenv("VAULT_REORG_DEPTH", 64)),
+                    start_block=int(os.getenv("VETO_VAULT_DEPLOY_BLOCK", 0)),
+                    chunk_size=int(os.getenv("INDEXER_CHUNK_SIZE", 2000)),
+                    poll_interval=float(os.getenv("INDEXER_POLL_SECONDS", 5)),
+                    chain_head=get_chain_head_tracker()
+                )
+    return _vault_indexer
+
+if __name__ == "__main__":
+    # Index against a local node: ETHEREUM_RPC_URL=http://127.0.0.1:8545 VETO_VAULT_ADDRESS=0x... python vault_indexer.py
+    import time
+    from dotenv import load_dotenv
+    load_dotenv()
+    os.environ.setdefault("VAULT_INDEXER_ENABLED", "true")
+    indexer = get_vault_indexer()
+    while True:
+        processed = indexer.sync_once()
+        print(f"Indexed {processed} blocks - checkpoint {indexer.get_checkpoint()}")
+        time.sleep(indexer.poll_interval)